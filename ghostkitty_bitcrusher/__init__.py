@@ -2,11 +2,25 @@
 GhostKitty Bitcrusher - Audio bitcrusher with real-time preview.
 """
 
+import importlib
+
 __version__ = "2.0.0"
 __author__ = "CATHOUSEMP3"
 
-from .bitcrusher import BitCrusher
-from .gui import GhostKittyGUI
-from .audio_engine import AudioEngine
+# Exports are resolved on first access so headless users (batch workers,
+# scripts) never import the GUI toolkit or the audio device layer
+_EXPORTS = {
+    "BitCrusher": ".bitcrusher",
+    "RealtimeCrusher": ".realtime",
+    "GhostKittyGUI": ".gui",
+    "AudioEngine": ".audio_engine",
+}
+
+__all__ = ["BitCrusher", "RealtimeCrusher", "GhostKittyGUI", "AudioEngine"]
+
 
-__all__ = ["BitCrusher", "GhostKittyGUI", "AudioEngine"]
+def __getattr__(name):
+    if name in _EXPORTS:
+        module = importlib.import_module(_EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,9 @@
+"""
+Allow ``python -m ghostkitty_bitcrusher``.
+"""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
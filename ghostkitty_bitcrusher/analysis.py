@@ -0,0 +1,293 @@
+"""
+Audio analysis - single-pass, per-channel level and loudness metrics.
+"""
+
+import math
+import numpy as np
+from typing import Any, Dict, Iterable, Optional
+
+
+# Frames per analysis block when a whole array is analyzed
+ANALYSIS_BLOCK_FRAMES = 65536
+
+# Loudness gating (ITU-R BS.1770): 400 ms blocks every 100 ms, 3 s short-term
+HOP_SECONDS = 0.1
+MOMENTARY_HOPS = 4
+SHORT_TERM_HOPS = 30
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+
+# Gating histogram: block loudness in 0.01 LU bins over [-70, +30) LUFS
+HISTOGRAM_STEP = 0.01
+HISTOGRAM_MAX = 30.0
+
+
+def k_weighting(sample_rate: int) -> np.ndarray:
+    """
+    BS.1770 K-weighting filter as second-order sections for any sample rate.
+
+    The pre-filter shelf and RLB high-pass are derived from their analog
+    prototypes, reproducing the standard 48 kHz coefficients.
+
+    Args:
+        sample_rate: Sample rate in Hz.
+
+    Returns:
+        (2, 6) ``sos`` array for ``scipy.signal.sosfilt``.
+    """
+    # Stage 1: high shelf, about +4 dB above 1.5 kHz
+    k = math.tan(math.pi * 1681.974450955533 / sample_rate)
+    q = 0.7071752369554196
+    vh = 10.0 ** (3.999843853973347 / 20.0)
+    vb = vh ** 0.4996667741545416
+    a0 = 1.0 + k / q + k * k
+    shelf = [
+        (vh + vb * k / q + k * k) / a0,
+        2.0 * (k * k - vh) / a0,
+        (vh - vb * k / q + k * k) / a0,
+        1.0,
+        2.0 * (k * k - 1.0) / a0,
+        (1.0 - k / q + k * k) / a0,
+    ]
+
+    # Stage 2: RLB high-pass at about 38 Hz
+    k = math.tan(math.pi * 38.13547087602444 / sample_rate)
+    q = 0.5003270373238773
+    a0 = 1.0 + k / q + k * k
+    highpass = [1.0, -2.0, 1.0, 1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0]
+
+    return np.array([shelf, highpass])
+
+
+def _power(planar: np.ndarray) -> np.ndarray:
+    """Sum of squares over the last axis of channel-major samples, channels last."""
+    if planar.ndim == 3:
+        return np.einsum("kij,kij->ik", planar, planar, dtype=np.float64)
+    return np.einsum("ij,ij->i", planar, planar, dtype=np.float64)
+
+
+def _lufs(power: np.ndarray) -> np.ndarray:
+    """Loudness of channel-summed mean-square K-weighted power."""
+    with np.errstate(divide="ignore"):
+        return -0.691 + 10.0 * np.log10(power)
+
+
+class AudioAnalyzer:
+    """
+    Streaming per-channel level, zero-crossing and loudness analysis.
+
+    Feed blocks of any length in order with ``feed``; ``result`` may be
+    called at any point. Every sample is read once. Memory is O(1) in the
+    stream length: running per-channel sums, the K-weighting filter
+    state, the last 3 s of 100 ms power sums, and a fixed-size histogram
+    of gating-block loudness. Integrated loudness is gated from that
+    histogram, so its relative gate is exact to 0.01 LU.
+
+    Loudness follows BS.1770 / EBU R128 (K-weighting, 400 ms momentary
+    and 3 s short-term windows on a 100 ms hop, -70 LUFS absolute and
+    -10 LU relative gates) with all channels weighted 1.0, which is the
+    standard weighting for mono and stereo.
+    """
+
+    def __init__(self, channels: int, sample_rate: int = 44100):
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.frames = 0
+
+        self._sumsq = np.zeros(channels)
+        self._max = np.full(channels, -np.inf)
+        self._min = np.full(channels, np.inf)
+        self._crossings = np.zeros(channels, dtype=np.int64)
+        self._last_sign: Optional[np.ndarray] = None
+
+        # K-weighting filter and its state across blocks
+        self._sos = k_weighting(sample_rate)
+        self._zi = np.zeros((len(self._sos), channels, 2))
+
+        # Current partial 100 ms hop, then the last completed hops
+        self._hop = max(1, int(round(HOP_SECONDS * sample_rate)))
+        self._hop_fill = 0
+        self._hop_weighted = np.zeros(channels)
+        self._hop_plain = np.zeros(channels)
+        self._history_weighted = np.zeros((0, channels))
+        self._history_plain = np.zeros((0, channels))
+
+        self._momentary_max = -np.inf
+        self._short_term_max = -np.inf
+        self._short_term_rms_max = np.zeros(channels)
+
+        bins = int(round((HISTOGRAM_MAX - ABSOLUTE_GATE) / HISTOGRAM_STEP))
+        self._gate_counts = np.zeros(bins, dtype=np.int64)
+        self._gate_power = np.zeros(bins)
+
+    def feed(self, block: np.ndarray):
+        """
+        Analyze the next block of the stream.
+
+        Args:
+            block: (frames, channels) samples, or (frames,) for mono.
+        """
+        from scipy import signal
+
+        if block.ndim == 1:
+            block = block.reshape(-1, 1)
+        if not len(block):
+            return
+        if block.shape[1] != self.channels:
+            raise ValueError(f"Expected {self.channels} channels, got {block.shape[1]}")
+
+        # Channel-major copy: reductions along contiguous rows are several
+        # times faster than down the columns of interleaved frames
+        planar = np.ascontiguousarray(block.T)
+
+        self.frames += planar.shape[1]
+        self._sumsq += np.einsum("ij,ij->i", planar, planar, dtype=np.float64)
+        np.maximum(self._max, planar.max(axis=1), out=self._max)
+        np.minimum(self._min, planar.min(axis=1), out=self._min)
+
+        # Sign changes, including the one across the previous block boundary
+        sign = np.signbit(planar)
+        self._crossings += np.count_nonzero(sign[:, 1:] != sign[:, :-1], axis=1)
+        if self._last_sign is not None:
+            self._crossings += self._last_sign != sign[:, 0]
+        self._last_sign = sign[:, -1].copy()
+
+        weighted, self._zi = signal.sosfilt(self._sos, planar, axis=1, zi=self._zi)
+        self._add_hops(weighted, planar)
+
+    def _add_hops(self, weighted: np.ndarray, plain: np.ndarray):
+        """Split (channels, frames) power sums into 100 ms hops and score new windows."""
+        hop = self._hop
+        frames = weighted.shape[1]
+        start = min(frames, hop - self._hop_fill)
+        self._hop_weighted += _power(weighted[:, :start])
+        self._hop_plain += _power(plain[:, :start])
+        self._hop_fill += start
+        if self._hop_fill < hop:
+            return
+
+        whole = (frames - start) // hop
+        stop = start + whole * hop
+        hops_weighted = np.vstack((
+            self._hop_weighted, _power(weighted[:, start:stop].reshape(self.channels, whole, hop))
+        ))
+        hops_plain = np.vstack((
+            self._hop_plain, _power(plain[:, start:stop].reshape(self.channels, whole, hop))
+        ))
+
+        self._hop_weighted = _power(weighted[:, stop:])
+        self._hop_plain = _power(plain[:, stop:])
+        self._hop_fill = frames - stop
+
+        self._score(hops_weighted, hops_plain)
+
+    def _score(self, hops_weighted: np.ndarray, hops_plain: np.ndarray):
+        """Update window maxima and the gating histogram with new hops."""
+        keep = SHORT_TERM_HOPS - 1
+        weighted = np.vstack((self._history_weighted, hops_weighted))
+        plain = np.vstack((self._history_plain, hops_plain))
+        first_new = len(self._history_weighted)
+
+        # Running sums give every window ending at a new hop
+        cumulative = np.vstack((np.zeros((1, self.channels)), np.cumsum(weighted, axis=0)))
+        cumulative_plain = np.vstack((np.zeros((1, self.channels)), np.cumsum(plain, axis=0)))
+        ends = np.arange(first_new + 1, len(weighted) + 1)
+
+        momentary = ends[ends >= MOMENTARY_HOPS]
+        if len(momentary):
+            power = cumulative[momentary] - cumulative[momentary - MOMENTARY_HOPS]
+            loudness = _lufs(power.sum(axis=1) / (MOMENTARY_HOPS * self._hop))
+            self._momentary_max = max(self._momentary_max, float(loudness.max()))
+
+            # Gating blocks are the momentary windows; bin by loudness
+            gated = loudness >= ABSOLUTE_GATE
+            index = ((loudness[gated] - ABSOLUTE_GATE) / HISTOGRAM_STEP).astype(np.int64)
+            np.minimum(index, len(self._gate_counts) - 1, out=index)
+            self._gate_counts += np.bincount(index, minlength=len(self._gate_counts))
+            self._gate_power += np.bincount(
+                index, weights=power.sum(axis=1)[gated] / (MOMENTARY_HOPS * self._hop),
+                minlength=len(self._gate_power)
+            )
+
+        short = ends[ends >= SHORT_TERM_HOPS]
+        if len(short):
+            span = SHORT_TERM_HOPS * self._hop
+            power = cumulative[short] - cumulative[short - SHORT_TERM_HOPS]
+            loudness = _lufs(power.sum(axis=1) / span)
+            self._short_term_max = max(self._short_term_max, float(loudness.max()))
+
+            squares = cumulative_plain[short] - cumulative_plain[short - SHORT_TERM_HOPS]
+            np.maximum(
+                self._short_term_rms_max, np.sqrt(squares.max(axis=0) / span),
+                out=self._short_term_rms_max
+            )
+
+        self._history_weighted = weighted[-keep:]
+        self._history_plain = plain[-keep:]
+
+    def integrated_loudness(self) -> float:
+        """Gated integrated loudness in LUFS (-inf when everything is gated out)."""
+        counts = self._gate_counts
+        total = counts.sum()
+        if not total:
+            return -math.inf
+
+        # Relative gate from the mean power of blocks above the absolute gate
+        threshold = float(_lufs(self._gate_power.sum() / total)) + RELATIVE_GATE
+        first = max(0, int(math.ceil((threshold - ABSOLUTE_GATE) / HISTOGRAM_STEP)))
+        kept = counts[first:].sum()
+        if not kept:
+            return -math.inf
+        return float(_lufs(self._gate_power[first:].sum() / kept))
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Metrics for everything fed so far.
+
+        Returns:
+            Dict with per-channel arrays ``rms``, ``peak``, ``max``,
+            ``min``, ``dynamic_range``, ``zero_crossings`` and
+            ``short_term_rms_max`` (3 s windows); ``length`` in frames; and
+            ``integrated_lufs``, ``momentary_lufs_max`` (400 ms) and
+            ``short_term_lufs_max`` (3 s) over all channels.
+        """
+        frames = max(1, self.frames)
+        empty = self.frames == 0
+        maximum = np.zeros(self.channels) if empty else self._max
+        minimum = np.zeros(self.channels) if empty else self._min
+        return {
+            "rms": np.sqrt(self._sumsq / frames),
+            "peak": np.maximum(np.abs(maximum), np.abs(minimum)),
+            "max": maximum.copy(),
+            "min": minimum.copy(),
+            "dynamic_range": maximum - minimum,
+            "zero_crossings": self._crossings.copy(),
+            "short_term_rms_max": self._short_term_rms_max.copy(),
+            "length": self.frames,
+            "integrated_lufs": self.integrated_loudness(),
+            "momentary_lufs_max": self._momentary_max,
+            "short_term_lufs_max": self._short_term_max,
+        }
+
+
+def analyze_blocks(
+    blocks: Iterable[np.ndarray],
+    channels: int,
+    sample_rate: int = 44100,
+) -> Dict[str, Any]:
+    """
+    Analyze a stream of blocks in one pass (see ``AudioAnalyzer``).
+
+    Args:
+        blocks: Consecutive (frames, channels) blocks, e.g.
+            ``AudioSource.blocks``.
+        channels: Channel count.
+        sample_rate: Sample rate in Hz.
+
+    Returns:
+        ``AudioAnalyzer.result()``.
+    """
+    analyzer = AudioAnalyzer(channels, sample_rate)
+    for block in blocks:
+        analyzer.feed(block)
+    return analyzer.result()
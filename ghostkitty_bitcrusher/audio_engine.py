@@ -2,26 +2,45 @@
 Audio Engine - file loading, processing, and playback.
 """
 
+import os
+import threading
 import numpy as np
 import soundfile as sf
-import pygame
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from .backends import AudioBackend, AudioStream, backend_from_env
 from .bitcrusher import BitCrusher
+from .cache import StageCache
+from .live import LivePipeline
+from .peaks import PeakPyramid, cache_path, prune_cache
+from .playback import StreamingPlayback
+from .realtime import RealtimeCrusher
+from .scheduler import RenderScheduler
+from .sources import AudioSource, open_source
+from .stats import ProcessingStats
+from .streaming import DEFAULT_BLOCK_SIZE, render_blocks, render_file, write_blocks
 
 
 class AudioEngine:
-    """Audio engine for file I/O and playback."""
+    """
+    Audio engine for file I/O and playback.
+
+    Args:
+        backend: Audio device layer; defaults to the one named by the
+            ``GHOSTKITTY_AUDIO_BACKEND`` environment variable, else pygame
+            (see ``backends.backend_from_env``).
+    """
     
-    def __init__(self):
+    def __init__(self, backend: Optional[AudioBackend] = None):
         self.sample_rate = 44100
         self.channels = 2
+        self.backend = backend or backend_from_env()
         
-        # Simple pygame setup
-        pygame.mixer.init(frequency=self.sample_rate, size=-16, channels=self.channels, buffer=512)
-        
-        self.bitcrusher = BitCrusher()
-        self.current_audio = None
+        self.bitcrusher = BitCrusher(dtype=np.float32)
+        self.bitcrusher.stage_cache = StageCache(max_bytes=512 * 1024 * 1024)
+        self.source: Optional[AudioSource] = None
         self.processed_audio = None
+        # Parameters processed_audio was rendered with
+        self.processed_params: Optional[Dict[str, Any]] = None
         self.is_playing = False
         
         # Simple processing parameters
@@ -30,34 +49,105 @@ class AudioEngine:
             "downsample_factor": 1.0,
             "mix": 1.0,
             "waveshape": 0.0,
-            "noise": 0.0
+            "waveshape_curve": "tanh",
+            "noise": 0.0,
+            "downsample_mode": "polyphase"
         }
         
         # Dummy callbacks for compatibility
         self.level_callback = None
         self.progress_callback = None
         self.waveform_callback = None
+        self.render_callback = None
+        self.export_callback = None
+
+        # Full renders run on a background worker; only the latest wins
+        self.scheduler = RenderScheduler(self.bitcrusher)
+        self.scheduler.on_complete = self._on_render_complete
+        self.scheduler.on_block = self._on_render_block
+        self.scheduler.on_release = self._release_source
+        # Identifies the loaded source in stage cache keys
+        self._source_id = 0
+        # Background users of each source; replaced sources are closed once
+        # their last user lets go
+        self._source_lock = threading.Lock()
+        self._source_users: Dict[AudioSource, int] = {}
+        self._retired: List[AudioSource] = []
+
+        # Streaming playback renders blocks on demand in the device callback
+        # Playback reads noise from a table so the callback does no RNG work
+        self.realtime = RealtimeCrusher(
+            max_frames=256, channels=self.channels, noise_table_frames=1 << 17
+        )
+        self.realtime.set_params(**self.processing_params)
+        self.playback = StreamingPlayback(self.realtime, block_size=256)
+        self._output: Optional[AudioStream] = None
+        # Device buffer size; also the delay between rendering and hearing
+        self.output_chunksize = 512
+
+        # Live input runs its own duplex pipeline at the device rate; the
+        # prefill absorbs jitter between separate input and output devices
+        self.live: Optional[LivePipeline] = None
+        self.live_sample_rate = 48000
+        self.live_chunksize = 128
+        self.live_prefill = 128
+
+        # Exports write on their own thread and can be cancelled between blocks
+        self._export_thread: Optional[threading.Thread] = None
+        self._export_cancel = threading.Event()
 
-        # Keep a reference to the current Sound object so it isn't garbage-collected
-        self._current_sound = None
+        # Waveform peaks of the source and of the latest render
+        self.dry_peaks: Optional[PeakPyramid] = None
+        self.wet_peaks: Optional[PeakPyramid] = None
+        # Peak files are kept here across sessions (None disables)
+        self.peak_cache_dir: Optional[str] = os.path.join(
+            os.path.expanduser("~"), ".cache", "ghostkitty-bitcrusher", "peaks"
+        )
+        self._filename: Optional[str] = None
     
+    @property
+    def current_audio(self) -> Optional[np.ndarray]:
+        """The loaded audio as one array (materializes the whole source)."""
+        if self.source is None:
+            return None
+        return self.source.to_array()
+
     def load_audio_file(self, filename: str) -> bool:
-        """Load an audio file."""
+        """Open an audio file; samples are read lazily by block."""
         try:
             print(f"Loading audio file: {filename}")
 
-            audio_data, sample_rate = sf.read(filename, dtype=np.float32)
+            # Uncompressed WAV is memory-mapped; mono is broadcast to stereo
+            source = open_source(filename, channels=self.channels)
 
-            # Convert mono to stereo
-            if len(audio_data.shape) == 1:
-                audio_data = np.column_stack((audio_data, audio_data))
+            # The old source is closed once a running render lets go of it
+            self.stop_playback()
+            self.playback.close()
+            self.scheduler.cancel()
 
-            self.current_audio = audio_data
-            self.sample_rate = sample_rate
+            self._retire_source(self.source)
+            self.source = source
+            self.processed_audio = None
+            self.processed_params = None
+            self._source_id += 1
+            self.bitcrusher.stage_cache.clear()
+            self.sample_rate = source.samplerate
+            self.realtime.sample_rate = source.samplerate
+            self._filename = filename
 
-            duration = audio_data.shape[0] / sample_rate
-            channels = audio_data.shape[1]
-            print(f"Audio loaded: {duration:.1f}s, {channels}ch, {sample_rate}Hz")
+            # Dry peaks come from disk, or are built in the background
+            self.wet_peaks = PeakPyramid(source.frames, source.channels)
+            self.dry_peaks = self._load_peaks(None)
+            if self.dry_peaks is None:
+                self._hold_source(source)
+                threading.Thread(
+                    target=self._build_dry_peaks, args=(source,), name="peaks", daemon=True
+                ).start()
+            elif self.waveform_callback:
+                self.waveform_callback("dry")
+
+            duration = source.frames / source.samplerate
+            print(f"Audio loaded: {duration:.1f}s, {source.channels}ch, {source.samplerate}Hz")
             
             self._process_audio()
 
@@ -68,39 +158,197 @@ class AudioEngine:
             return False
 
     def _process_audio(self):
-        """Process the full audio with current parameters."""
-        if self.current_audio is None:
+        """Schedule a background render of the full audio with current parameters."""
+        if self.source is None:
             return
 
-        self.processed_audio = self.bitcrusher.process_audio(
-            self.current_audio.copy(),
-            **self.processing_params
+        # Peaks of an earlier render with these parameters show up at once;
+        # otherwise the current ones are overwritten block by block
+        peaks = self._load_peaks(self.processing_params)
+        if peaks is not None:
+            self.wet_peaks = peaks
+            if self.waveform_callback:
+                self.waveform_callback("wet")
+
+        self._hold_source(self.source)
+        self.scheduler.submit(
+            self.source, self.processing_params, cache_key=self._source_id
         )
-    
-    def start_playback(self) -> bool:
-        """Start audio playback."""
-        if self.processed_audio is None:
-            print("No processed audio to play.")
-            return False
 
+    def _on_render_complete(self, processed: np.ndarray, params: Dict[str, Any]):
+        """Store a finished render (called on the render worker thread)."""
+        self.processed_audio = processed
+        self.processed_params = params
+        if self.wet_peaks is not None and self.wet_peaks.frames == len(processed):
+            self._save_peaks(self.wet_peaks, params)
+        if self.render_callback:
+            self.render_callback(params)
+
+    def _on_render_block(self, audio, position: int, processed: np.ndarray):
+        """Fold a finished render block into the wet peaks (render worker thread)."""
+        peaks = self.wet_peaks
+        if audio is not self.source or peaks is None:
+            return
+        peaks.update(position, processed)
+        if self.waveform_callback:
+            self.waveform_callback("wet")
+
+    def _build_dry_peaks(self, source: AudioSource, block_size: int = 1 << 20):
+        """Summarize a newly loaded source (peaks thread)."""
         try:
-            pygame.mixer.stop()
+            peaks = PeakPyramid(source.frames, source.channels)
+            self.dry_peaks = peaks
+            for position in range(0, source.frames, block_size):
+                if self.source is not source:
+                    return
+                stop = min(source.frames, position + block_size)
+                peaks.update(position, source.read(position, stop))
+                if self.waveform_callback:
+                    self.waveform_callback("dry")
 
-            # Reinitialize mixer if sample rate changed
-            pygame.mixer.quit()
-            pygame.mixer.init(
-                frequency=self.sample_rate, size=-16,
-                channels=self.channels, buffer=1024
-            )
+            if self.source is source:
+                self._save_peaks(peaks, None)
+
+        except Exception as e:
+            print(f"Failed to build waveform peaks: {e}")
+        finally:
+            self._release_source(source)
+
+    def _hold_source(self, source: AudioSource):
+        """Keep ``source`` open for a background user until it is released."""
+        with self._source_lock:
+            self._source_users[source] = self._source_users.get(source, 0) + 1
+
+    def _release_source(self, audio):
+        """Drop one background user of ``audio``, closing it if it was retired."""
+        with self._source_lock:
+            users = self._source_users.get(audio, 0) - 1
+            if users > 0:
+                self._source_users[audio] = users
+                return
+            self._source_users.pop(audio, None)
+            if audio not in self._retired:
+                return
+            self._retired.remove(audio)
+        audio.close()
+
+    def _retire_source(self, source: Optional[AudioSource]):
+        """Close a replaced source now, or when its last background user finishes."""
+        if source is None:
+            return
+        with self._source_lock:
+            if source in self._source_users:
+                self._retired.append(source)
+                return
+        source.close()
+
+    def _peak_path(self, params: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Cache file for the source's dry peaks (None) or a render's peaks."""
+        if self.peak_cache_dir is None or self._filename is None:
+            return None
+        if params is not None and params.get("noise", 0.0) > 0.0:
+            # Unseeded noise differs between sessions
+            params = dict(params)
+            params.setdefault("seed", self.bitcrusher.noise.seed)
+        return cache_path(self.peak_cache_dir, self._filename, params)
+
+    def _load_peaks(self, params: Optional[Dict[str, Any]]) -> Optional[PeakPyramid]:
+        try:
+            path = self._peak_path(params)
+            if path is None or not os.path.exists(path):
+                return None
+            peaks = PeakPyramid.load(path)
+            if self.source is None or peaks.frames != self.source.frames:
+                return None
+            return peaks
+
+        except Exception as e:
+            print(f"Failed to load waveform peaks: {e}")
+            return None
+
+    def _save_peaks(self, peaks: PeakPyramid, params: Optional[Dict[str, Any]]):
+        try:
+            path = self._peak_path(params)
+            if path is not None:
+                os.makedirs(self.peak_cache_dir, exist_ok=True)
+                peaks.save(path)
+                prune_cache(self.peak_cache_dir)
+
+        except Exception as e:
+            print(f"Failed to save waveform peaks: {e}")
+
+    def playback_position(self) -> int:
+        """Source frame being heard now (interpolated between device callbacks)."""
+        return self.playback.clock(self.sample_rate, latency=self.output_chunksize)
+
+    def level_at(self, position: Optional[int] = None) -> Tuple[float, float]:
+        """
+        Output level from the precomputed envelope, without touching audio.
+
+        The render's peaks double as a ~10 ms RMS/peak envelope (see
+        ``PeakPyramid.level_at``), so a meter can poll this every GUI frame
+        at O(1) cost. The source's peaks stand in until a render exists.
 
-            audio_int = (self.processed_audio * 32767).astype(np.int16)
+        Args:
+            position: Source frame (defaults to ``playback_position()``).
 
-            # Ensure data is C-contiguous for pygame
-            if not audio_int.flags["C_CONTIGUOUS"]:
-                audio_int = np.ascontiguousarray(audio_int)
+        Returns:
+            ``(rms, peak)``; zeros when nothing is loaded.
+        """
+        peaks = self.wet_peaks if self.processed_params is not None else self.dry_peaks
+        if peaks is None:
+            return 0.0, 0.0
+        if position is None:
+            position = self.playback_position()
+        return peaks.level_at(position)
 
-            self._current_sound = pygame.sndarray.make_sound(audio_int)
-            self._current_sound.play()
+    def get_waveform(self, start: int, stop: int, pixels: int, wet: bool = False):
+        """
+        Waveform columns of the source or the render for drawing.
+
+        Args:
+            start: First frame of the view.
+            stop: End frame of the view.
+            pixels: Number of columns.
+            wet: Summarize the processed render instead of the source.
+
+        Returns:
+            ``(mins, maxs, rms)`` arrays of shape (pixels, channels) (see
+            ``PeakPyramid.query``), or None before any peaks exist.
+        """
+        peaks = self.wet_peaks if wet else self.dry_peaks
+        if peaks is None:
+            return None
+
+        if wet:
+            # Deep zooms read samples from a finished, current render only
+            current = self.processed_params == self.processing_params
+            audio = self.processed_audio if current else None
+        else:
+            audio = self.source
+        return peaks.query(start, stop, pixels, audio)
+    
+    def start_playback(self) -> bool:
+        """Start streaming playback of the loaded audio."""
+        if self.source is None:
+            print("No audio to play.")
+            return False
+
+        self.stop_live_input()
+        self.stop_playback()
+        try:
+            # Reopen the device only if the sample rate changed
+            if self._output is None or self._output.sample_rate != self.sample_rate:
+                if self._output is not None:
+                    self._output.close()
+                self._output = self.backend.open_output(
+                    self.playback.fill, self.sample_rate, self.channels,
+                    chunksize=self.output_chunksize
+                )
+
+            self.playback.load(self.source)
+            self.playback.is_playing = True
+            self._output.start()
             self.is_playing = True
             return True
 
@@ -110,28 +358,66 @@ class AudioEngine:
 
     def stop_playback(self):
         """Stop audio playback."""
-        pygame.mixer.stop()
-        self._current_sound = None
+        self.playback.is_playing = False
+        if self._output is not None:
+            self._output.stop()
         self.is_playing = False
     
     def update_processing_params(self, **params):
-        """Update processing parameters and reprocess audio."""
+        """Update processing parameters and schedule a re-render."""
         self.processing_params.update(params)
+
+        # Heard by streaming playback within one device buffer
+        self.realtime.set_params(**params)
+        if self.live is not None:
+            self.live.set_params(**params)
         
         # Reprocess audio if loaded
-        if self.current_audio is not None:
+        if self.source is not None:
             self._process_audio()
 
+    def enable_stats(self, enabled: bool = True, trace_memory: bool = False):
+        """
+        Turn processing instrumentation on or off.
+
+        Renders and streaming playback share one ``ProcessingStats``.
+
+        Args:
+            enabled: Attach (True) or detach (False) the stats object.
+            trace_memory: Also record per-stage allocations (slower).
+        """
+        stats = ProcessingStats(trace_memory=trace_memory) if enabled else None
+        self.bitcrusher.stats = stats
+        self.realtime.stats = stats
+        if self.live is not None:
+            self.live.crusher.stats = stats
+
+    def get_processing_stats(self) -> Optional[Dict[str, Any]]:
+        """Per-stage timings and realtime deadline counters, or None when disabled."""
+        if self.bitcrusher.stats is None:
+            return None
+        return self.bitcrusher.stats.get_stats()
+
+    def get_prometheus_metrics(self) -> str:
+        """Processing stats in the Prometheus text format (empty when disabled)."""
+        if self.bitcrusher.stats is None:
+            return ""
+        return self.bitcrusher.stats.to_prometheus()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Stage cache hit/miss counters and memory use."""
+        return self.bitcrusher.stage_cache.get_stats()
+
     def get_audio_info(self) -> Optional[Dict[str, Any]]:
         """Get information about the loaded audio."""
-        if self.current_audio is None:
+        if self.source is None:
             return None
         
         return {
-            "duration": len(self.current_audio) / self.sample_rate,
-            "channels": self.current_audio.shape[1] if len(self.current_audio.shape) > 1 else 1,
+            "duration": self.source.frames / self.sample_rate,
+            "channels": self.source.channels,
             "sample_rate": self.sample_rate,
-            "samples": len(self.current_audio)
+            "samples": self.source.frames
         }
     
     def save_audio_file(self, filename: str, audio_data: Optional[np.ndarray] = None) -> bool:
@@ -152,29 +438,183 @@ class AudioEngine:
             print(f"Failed to save audio: {e}")
             return False
 
+    @property
+    def is_exporting(self) -> bool:
+        """Whether an export is running."""
+        return self._export_thread is not None and self._export_thread.is_alive()
+
+    def export_audio(self, filename: str, block_size: int = DEFAULT_BLOCK_SIZE) -> bool:
+        """
+        Export the loaded audio with current parameters on a background thread.
+
+        A finished background render with matching parameters is written
+        as is; otherwise the source is rendered block by block while
+        writing, so memory stays bounded either way. Progress goes to
+        ``progress_callback`` and completion to ``export_callback``, both
+        from the export thread.
+
+        Args:
+            filename: Destination audio file.
+            block_size: Samples per written block.
+
+        Returns:
+            True if the export was started.
+        """
+        if self.source is None:
+            print("No audio to export.")
+            return False
+
+        if self.is_exporting:
+            print("An export is already running.")
+            return False
+
+        params = dict(self.processing_params)
+        processed = self.processed_audio
+        # Held open for the export when it renders from the source
+        source = None
+
+        if processed is not None and self.processed_params == params:
+            blocks = (
+                processed[start:start + block_size]
+                for start in range(0, len(processed), block_size)
+            )
+        else:
+            source = self.source
+            self._hold_source(source)
+            blocks = render_blocks(
+                self.bitcrusher, self.source.blocks(block_size), block_size,
+                cache_key=self._source_id, **params
+            )
+
+        self._export_cancel = threading.Event()
+        self._export_thread = threading.Thread(
+            target=self._run_export,
+            args=(filename, blocks, self.source.frames, self._export_cancel, source),
+            name="export",
+            daemon=True
+        )
+        self._export_thread.start()
+        return True
+
+    def cancel_export(self):
+        """Stop a running export at its next block; the partial file is removed."""
+        self._export_cancel.set()
+
+    def _run_export(self, filename, blocks, frames, cancel, source=None):
+        success = False
+        try:
+            success = write_blocks(
+                blocks, filename, self.sample_rate, self.channels, frames,
+                progress=self.progress_callback, cancel=cancel
+            )
+            if success:
+                print(f"Audio exported: {filename}")
+            else:
+                print(f"Export cancelled: {filename}")
+
+        except Exception as e:
+            print(f"Failed to export audio: {e}")
+        finally:
+            if source is not None:
+                self._release_source(source)
+
+        if self.export_callback:
+            self.export_callback(filename, success)
+
+    def render_to_file(self, input_filename: str, output_filename: str) -> bool:
+        """Render a file straight to disk in blocks with current parameters."""
+        try:
+            frames = render_file(
+                self.bitcrusher, input_filename, output_filename,
+                **self.processing_params
+            )
+            print(f"Audio rendered: {output_filename} ({frames} frames)")
+            return True
+
+        except Exception as e:
+            print(f"Failed to render audio: {e}")
+            return False
+
     def start_live_input(self) -> bool:
-        """Live input (not implemented)."""
-        print("Live input is not available in this version.")
-        return False
+        """Process the input device to the output device until stopped."""
+        if self.live is not None:
+            return True
+
+        # Playback gives up the output device
+        self.stop_playback()
+        if self._output is not None:
+            self._output.close()
+            self._output = None
+
+        try:
+            live = LivePipeline(
+                self.backend,
+                sample_rate=self.live_sample_rate,
+                channels=self.channels,
+                chunksize=self.live_chunksize,
+                block_size=self.live_chunksize,
+                prefill=self.live_prefill,
+                params=self.processing_params,
+            )
+            live.crusher.stats = self.realtime.stats
+            live.start()
+            self.live = live
+            return True
+
+        except Exception as e:
+            print(f"Live input failed: {e}")
+            return False
 
     def stop_live_input(self):
-        """Stop live input (no-op)."""
-        pass
+        """Stop live input."""
+        if self.live is not None:
+            self.live.stop()
+            self.live = None
+
+    def get_live_stats(self) -> Optional[Dict[str, Any]]:
+        """Latency and xrun counters of live input, or None when it is off."""
+        if self.live is None:
+            return None
+        return self.live.get_stats()
+
+    def set_backend(self, backend: AudioBackend):
+        """Switch audio device layer; playback stops and reopens on the new one."""
+        self.stop_live_input()
+        self.stop_playback()
+        if self._output is not None:
+            self._output.close()
+            self._output = None
+        self.backend = backend
 
     def cleanup_audio(self):
         """Release audio resources."""
+        self.scheduler.shutdown()
+        self.cancel_export()
+        self.stop_live_input()
         self.stop_playback()
-        try:
-            pygame.mixer.quit()
-        except Exception:
-            pass
+        if self._output is not None:
+            self._output.close()
+            self._output = None
+        self.playback.close()
+        self._retire_source(self.source)
+        self.source = None
     
     # Callback setters for GUI compatibility
     def set_level_callback(self, callback):
         self.level_callback = callback
     
     def set_progress_callback(self, callback):
+        """Called from the export thread with the completed fraction."""
         self.progress_callback = callback
     
     def set_waveform_callback(self, callback):
+        """Called with "dry" or "wet" when those peaks change (from worker threads)."""
         self.waveform_callback = callback
+
+    def set_render_callback(self, callback):
+        """Called from the render worker thread with the rendered params."""
+        self.render_callback = callback
+
+    def set_export_callback(self, callback):
+        """Called from the export thread with (filename, success)."""
+        self.export_callback = callback
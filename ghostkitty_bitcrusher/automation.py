@@ -0,0 +1,319 @@
+"""
+Parameter automation - per-sample parameter curves for offline renders.
+"""
+
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+class Automation:
+    """
+    A parameter value for every sample of a stream.
+
+    Values are addressed by absolute stream position, so block, parallel
+    and whole-file renders see the same curve. Positions before the start
+    take the first value and positions past the end the last.
+    """
+
+    @property
+    def key(self) -> Optional[tuple]:
+        """Hashable identity, or None when the curve cannot be keyed by value."""
+        raise NotImplementedError
+
+    def values(self, start: int, stop: int) -> np.ndarray:
+        """Float64 values for frames ``[start, stop)``."""
+        raise NotImplementedError
+
+    def block(self, start: int, like: np.ndarray) -> np.ndarray:
+        """
+        Values for the frames of ``like`` from ``start``, in its dtype and shape.
+
+        Stages combine these with the signal elementwise, so no broadcasting
+        is involved in the per-sample arithmetic.
+        """
+        return frame_values(self.values(start, start + len(like)), like)
+
+    def max(self) -> float:
+        """Largest value anywhere on the curve."""
+        raise NotImplementedError
+
+    def phase(self, start: int, stop: int) -> np.ndarray:
+        """
+        Hold phase for frames ``[start, stop)`` when the curve is a downsample factor.
+
+        The phase advances by ``1 / max(factor, 1)`` per sample from 0 at
+        frame 0, so sample-and-hold starts a new held sample wherever its
+        integer part changes.
+        """
+        raise NotImplementedError
+
+
+class Envelope(Automation):
+    """
+    Breakpoint envelope.
+
+    Args:
+        points: ``(position, value)`` pairs with positions in frames (see
+            ``from_seconds``), in any order.
+        interpolation: "linear" ramps between points; "step" holds each
+            value until the next point.
+    """
+
+    def __init__(self, points: Sequence[Tuple[float, float]], interpolation: str = "linear"):
+        if not points:
+            raise ValueError("An envelope needs at least one point")
+        if interpolation not in ("linear", "step"):
+            raise ValueError(f"Unknown interpolation '{interpolation}' (use 'linear' or 'step')")
+
+        ordered = sorted((float(position), float(value)) for position, value in points)
+        self.positions = np.array([position for position, _ in ordered])
+        self.levels = np.array([value for _, value in ordered])
+        self.interpolation = interpolation
+        self._slopes = np.zeros(len(self.levels))
+        if interpolation == "linear" and len(self.levels) > 1:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                slopes = np.diff(self.levels) / np.diff(self.positions)
+            # Coincident points make a jump, not a ramp
+            self._slopes[:-1] = np.where(np.isfinite(slopes), slopes, 0.0)
+        self._phase_segments: Optional[tuple] = None
+
+    @classmethod
+    def from_seconds(
+        cls,
+        points: Sequence[Tuple[float, float]],
+        sample_rate: int = 44100,
+        interpolation: str = "linear",
+    ) -> "Envelope":
+        """Envelope with breakpoint times in seconds."""
+        return cls([(time * sample_rate, value) for time, value in points], interpolation)
+
+    @property
+    def key(self) -> tuple:
+        return (
+            "envelope", self.interpolation,
+            tuple(self.positions.tolist()), tuple(self.levels.tolist()),
+        )
+
+    def _at(self, frames: np.ndarray) -> np.ndarray:
+        if self.interpolation == "linear":
+            return np.interp(frames, self.positions, self.levels)
+        index = np.searchsorted(self.positions, frames, side="right") - 1
+        return self.levels[np.maximum(index, 0)]
+
+    def values(self, start: int, stop: int) -> np.ndarray:
+        # Segment by segment: a block usually lies within one, and a ramp
+        # is far cheaper to generate than to interpolate per sample
+        out = np.empty(stop - start)
+        for first, last, index in _spans(self.positions, start, stop):
+            piece = out[first - start:last - start]
+            if index < 0:
+                piece.fill(self.levels[0])
+            elif self._slopes[index]:
+                offset = np.arange(last - first) + (first - self.positions[index])
+                np.multiply(offset, self._slopes[index], out=piece)
+                piece += self.levels[index]
+            else:
+                piece.fill(self.levels[index])
+        return out
+
+    def block(self, start: int, like: np.ndarray) -> np.ndarray:
+        # Ramps scale a cached per-channel frame counter, so a block costs
+        # two passes over block-sized memory whatever the channel count.
+        # The counter restarts on a fixed grid of absolute positions, so a
+        # frame gets the same rounding however a render is split
+        out = np.empty(like.shape, dtype=like.dtype)
+        stop = start + len(like)
+        for first, last, index in _spans(self.positions, start, stop):
+            if index < 0 or not self._slopes[index]:
+                out[first - start:last - start].fill(self.levels[max(index, 0)])
+                continue
+
+            # Python floats combine with the signal's dtype without upcasting
+            slope = float(self._slopes[index])
+            while first < last:
+                anchor = first - first % RAMP_FRAMES
+                end = min(last, anchor + RAMP_FRAMES)
+                piece = out[first - start:end - start]
+                counter = _frame_counter(like)[first - anchor:end - anchor]
+                np.multiply(counter, slope, out=piece)
+                piece += float(self.levels[index] + slope * (anchor - self.positions[index]))
+                first = end
+        return out
+
+    def max(self) -> float:
+        return float(self.levels.max())
+
+    def _segments(self) -> tuple:
+        """
+        Breakpoints of the factor clamped to >= 1, with the phase at each.
+
+        Clamping a linear segment that crosses 1 adds a breakpoint at the
+        crossing, so the clamped curve stays piecewise linear (or
+        piecewise constant for step envelopes) and integrates exactly.
+        """
+        if self._phase_segments is not None:
+            return self._phase_segments
+
+        positions = np.concatenate(([0.0], self.positions[self.positions > 0]))
+        levels = self._at(positions)
+
+        points = [(positions[0], levels[0])]
+        for p0, v0, p1, v1 in zip(positions, levels, positions[1:], levels[1:]):
+            if self.interpolation == "linear" and (v0 - 1.0) * (v1 - 1.0) < 0:
+                points.append((p0 + (1.0 - v0) / (v1 - v0) * (p1 - p0), 1.0))
+            points.append((p1, v1))
+
+        starts = np.array([p for p, _ in points])
+        left = np.maximum(np.array([v for _, v in points]), 1.0)
+        slopes = np.zeros(len(starts))
+        if self.interpolation == "linear":
+            # The last segment holds the final value forever
+            slopes[:-1] = np.diff(left) / np.diff(starts)
+
+        # Phase at each breakpoint: integral of 1 / factor over each segment
+        integrals = [
+            _integral(length, level, slope)
+            for length, level, slope in zip(np.diff(starts), left[:-1], slopes[:-1])
+        ]
+        phase = np.concatenate(([0.0], np.cumsum(integrals)))
+
+        self._phase_segments = (starts, left, slopes, phase)
+        return self._phase_segments
+
+    def phase(self, start: int, stop: int) -> np.ndarray:
+        starts, left, slopes, phase = self._segments()
+        out = np.empty(stop - start)
+        for first, last, index in _spans(starts, start, stop):
+            piece = out[first - start:last - start]
+            if index < 0:
+                piece.fill(0.0)
+                continue
+            offset = np.arange(last - first) + (first - starts[index])
+            piece[:] = _integral(offset, left[index], slopes[index])
+            piece += phase[index]
+        return out
+
+
+def _spans(breakpoints: np.ndarray, start: int, stop: int) -> List[Tuple[int, int, int]]:
+    """
+    Split frames ``[start, stop)`` at ``breakpoints``.
+
+    Returns:
+        ``(first, last, index)`` per piece, where ``index`` is the last
+        breakpoint at or before the piece (-1 before the first).
+    """
+    spans: List[Tuple[int, int, int]] = []
+    if stop <= start:
+        return spans
+
+    # Frame f belongs to the last breakpoint at or before it
+    first_index, last_index = np.searchsorted(breakpoints, [start, stop - 1], side="right") - 1
+    first = start
+    for index in range(int(first_index), int(last_index) + 1):
+        last = stop
+        if index + 1 < len(breakpoints):
+            last = min(stop, int(np.ceil(breakpoints[index + 1])))
+        if last > first:
+            spans.append((first, last, index))
+            first = last
+    return spans
+
+
+def _integral(length, level: float, slope: float):
+    """Integral of ``1 / f`` over ``length`` frames of ``f = level + slope * t``."""
+    if abs(slope) < 1e-12:
+        return length / level
+    return np.log1p(slope / level * length) / slope
+
+
+class ArrayAutomation(Automation):
+    """
+    Explicit per-sample values, e.g. a curve computed with NumPy.
+
+    The hold phase for a downsample factor is a running sum over the whole
+    array, built on first use and kept (one float64 per sample).
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.array = np.asarray(values, dtype=np.float64).reshape(-1)
+        if not len(self.array):
+            raise ValueError("Automation arrays need at least one value")
+        self._phase: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    @property
+    def key(self) -> None:
+        return None
+
+    def values(self, start: int, stop: int) -> np.ndarray:
+        count = len(self.array)
+        if 0 <= start and stop <= count:
+            return self.array[start:stop]
+        index = np.clip(np.arange(start, stop), 0, count - 1)
+        return self.array[index]
+
+    def max(self) -> float:
+        return float(self.array.max())
+
+    def phase(self, start: int, stop: int) -> np.ndarray:
+        with self._lock:
+            if self._phase is None:
+                steps = 1.0 / np.maximum(self.array, 1.0)
+                self._phase = np.concatenate(([0.0], np.cumsum(steps)))
+
+        count = len(self.array)
+        frames = np.arange(start, stop)
+        inside = np.clip(frames, 0, count)
+        # Past the end the last value continues
+        beyond = np.maximum(frames - count, 0) / max(self.array[-1], 1.0)
+        return self._phase[inside] + beyond
+
+
+def as_automation(value: Any) -> Any:
+    """Wrap arrays as ``ArrayAutomation``; other values are returned unchanged."""
+    if isinstance(value, np.ndarray):
+        return ArrayAutomation(value)
+    return value
+
+
+def is_automated(value: Any) -> bool:
+    """Whether a parameter value is an automation curve (or an array for one)."""
+    return isinstance(value, (Automation, np.ndarray))
+
+
+# Envelope ramps are generated in runs of this many frames from multiples
+# of it (the fused block size, so a fused block is one run)
+RAMP_FRAMES = 16384
+
+# Frame counters 0 .. RAMP_FRAMES - 1 per channel, keyed by (shape, dtype)
+_COUNTERS: Dict[Tuple[tuple, np.dtype], np.ndarray] = {}
+
+
+def _frame_counter(like: np.ndarray) -> np.ndarray:
+    """Frame index of every sample of a ``RAMP_FRAMES`` run shaped like ``like``."""
+    key = (like.shape[1:], like.dtype)
+    counter = _COUNTERS.get(key)
+    if counter is None:
+        counter = frame_values(np.arange(RAMP_FRAMES, dtype=np.float64), like[:0])
+        _COUNTERS[key] = counter
+    return counter
+
+
+def frame_values(values: np.ndarray, like: np.ndarray) -> np.ndarray:
+    """
+    Per-frame ``values`` in ``like``'s dtype and shape.
+
+    Multi-channel values are written out per channel: NumPy broadcasts a
+    (frames, 1) column against interleaved frames an order of magnitude
+    slower than it combines two arrays of the same shape. Values already
+    in that shape are only converted to the dtype.
+    """
+    if values.shape[1:] == like.shape[1:]:
+        return values.astype(like.dtype, copy=False)
+    if like.ndim == 1 or like.shape[1] == 1:
+        return values.astype(like.dtype, copy=False).reshape((len(values),) + like.shape[1:])
+    expanded = np.empty((len(values),) + like.shape[1:], dtype=like.dtype)
+    for channel in range(like.shape[1]):
+        expanded[:, channel] = values
+    return expanded
@@ -0,0 +1,475 @@
+"""
+Audio backends - sound card, null and file-loopback devices behind one interface.
+"""
+
+import os
+import threading
+import time
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Union
+from .sources import AudioSource, ArraySource, open_source
+
+
+# Output callbacks fill a float32 (frames, channels) buffer in place; input
+# callbacks receive one, valid only during the call
+StreamCallback = Callable[[np.ndarray], Any]
+
+# Environment variable naming the backend the engine uses by default
+BACKEND_ENV = "GHOSTKITTY_AUDIO_BACKEND"
+# Input file for the loopback backend when it is chosen by BACKEND_ENV
+LOOPBACK_SOURCE_ENV = "GHOSTKITTY_LOOPBACK_SOURCE"
+
+
+class AudioStream:
+    """
+    An open device stream.
+
+    The callback runs on the backend's audio thread once per ``chunksize``
+    frames while the stream is started.
+    """
+
+    def __init__(self, callback: StreamCallback, sample_rate: int, channels: int, chunksize: int):
+        self.callback = callback
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.chunksize = chunksize
+
+    def start(self):
+        """Start (or resume) the callback."""
+        raise NotImplementedError
+
+    def stop(self):
+        """Pause the callback."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release the device."""
+        raise NotImplementedError
+
+
+class AudioBackend:
+    """
+    Base class for audio device layers.
+
+    A backend opens output streams, whose callback fills each device
+    buffer, and input streams, whose callback receives each captured
+    buffer. Samples are float32 frames in both directions.
+    """
+
+    name = ""
+
+    def open_output(
+        self,
+        callback: StreamCallback,
+        sample_rate: int,
+        channels: int = 2,
+        chunksize: int = 512,
+    ) -> AudioStream:
+        """
+        Open a stopped output stream.
+
+        Args:
+            callback: Called with each (chunksize, channels) float32 buffer
+                to fill.
+            sample_rate: Sample rate in Hz.
+            channels: Channel count.
+            chunksize: Frames per device buffer.
+
+        Returns:
+            The stream.
+        """
+        raise NotImplementedError
+
+    def open_input(
+        self,
+        callback: StreamCallback,
+        sample_rate: int,
+        channels: int = 2,
+        chunksize: int = 512,
+    ) -> AudioStream:
+        """
+        Open a stopped input stream.
+
+        Args:
+            callback: Called with each captured (chunksize, channels)
+                float32 buffer.
+            sample_rate: Sample rate in Hz.
+            channels: Channel count.
+            chunksize: Frames per device buffer.
+
+        Returns:
+            The stream.
+        """
+        raise NotImplementedError
+
+
+class _PygameStream(AudioStream):
+    """SDL audio device running a stream callback."""
+
+    def __init__(self, callback, sample_rate, channels, chunksize, capture: bool):
+        from pygame._sdl2 import audio as sdl_audio
+        from pygame._sdl2 import sdl2
+
+        super().__init__(callback, sample_rate, channels, chunksize)
+        sdl2.init_subsystem(sdl2.INIT_AUDIO)
+        self._device = sdl_audio.AudioDevice(
+            devicename=None,
+            iscapture=capture,
+            frequency=sample_rate,
+            audioformat=sdl_audio.AUDIO_F32,
+            numchannels=channels,
+            chunksize=chunksize,
+            allowed_changes=0,
+            callback=self._callback,
+        )
+
+    def _callback(self, device, memory):
+        self.callback(np.frombuffer(memory, dtype=np.float32).reshape(-1, self.channels))
+
+    def start(self):
+        self._device.pause(0)
+
+    def stop(self):
+        self._device.pause(1)
+
+    def close(self):
+        self._device.close()
+
+
+class PygameBackend(AudioBackend):
+    """
+    Sound card access through SDL (pygame-ce).
+
+    pygame is imported and SDL's audio subsystem is initialized only when
+    the first stream is opened, so nothing touches an audio device until
+    playback or capture starts.
+    """
+
+    name = "pygame"
+
+    def open_output(self, callback, sample_rate, channels=2, chunksize=512):
+        return _PygameStream(callback, sample_rate, channels, chunksize, capture=False)
+
+    def open_input(self, callback, sample_rate, channels=2, chunksize=512):
+        return _PygameStream(callback, sample_rate, channels, chunksize, capture=True)
+
+
+class _ClockedStream(AudioStream):
+    """Stream driven by a ``ClockedBackend``'s clock thread."""
+
+    def __init__(self, backend, callback, sample_rate, channels, chunksize, capture: bool):
+        super().__init__(callback, sample_rate, channels, chunksize)
+        self.backend = backend
+        self.capture = capture
+        self.running = False
+        self.buffer = np.zeros((chunksize, channels), dtype=np.float32)
+
+    def start(self):
+        self.running = True
+        self.backend._wake()
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        self.running = False
+        self.backend._detach(self)
+
+
+class ClockedBackend(AudioBackend):
+    """
+    Virtual device driven by a thread instead of a sound card.
+
+    Every period of ``chunksize`` frames, the clock thread hands one input
+    buffer to each started input stream, then asks each started output
+    stream for one buffer, so a duplex pipeline sees input and output on
+    one clock as it would on a real device. All streams of a backend share
+    its sample rate and period.
+
+    With ``realtime`` the periods follow the wall clock, and a period
+    whose callbacks finish after its deadline is counted as late (an xrun
+    on a real device; the clock then resynchronizes). Without it, periods
+    run back to back as fast as the callbacks return, which measures the
+    throughput of the whole callback path; a period is then counted as
+    late when its callbacks took longer than its audio lasts.
+    """
+
+    def __init__(self, realtime: bool = True, record: bool = False):
+        self.realtime = realtime
+        # Output buffers are kept here when recording
+        self.record = record
+        self.recorded: List[np.ndarray] = []
+
+        self.sample_rate: Optional[int] = None
+        self.chunksize: Optional[int] = None
+        self._streams: List[_ClockedStream] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        self.periods = 0
+        self.late_periods = 0
+        self.busy_seconds = 0.0
+        self.max_busy_seconds = 0.0
+
+    def open_output(self, callback, sample_rate, channels=2, chunksize=512):
+        return self._attach(callback, sample_rate, channels, chunksize, capture=False)
+
+    def open_input(self, callback, sample_rate, channels=2, chunksize=512):
+        return self._attach(callback, sample_rate, channels, chunksize, capture=True)
+
+    def _attach(self, callback, sample_rate, channels, chunksize, capture) -> _ClockedStream:
+        with self._lock:
+            if self._streams and (sample_rate, chunksize) != (self.sample_rate, self.chunksize):
+                raise ValueError(
+                    f"Streams on one {self.name} backend share {self.sample_rate} Hz "
+                    f"and {self.chunksize}-frame periods"
+                )
+            self.sample_rate, self.chunksize = sample_rate, chunksize
+            stream = _ClockedStream(self, callback, sample_rate, channels, chunksize, capture)
+            self._streams.append(stream)
+        return stream
+
+    def _detach(self, stream: _ClockedStream):
+        with self._lock:
+            if stream in self._streams:
+                self._streams.remove(stream)
+
+    def _wake(self):
+        """Start the clock thread if it is not running."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-clock", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        period = self.chunksize / self.sample_rate
+        deadline = time.perf_counter()
+
+        while True:
+            # Decided under the lock so a stream started meanwhile either
+            # keeps this thread running or starts a new one
+            with self._lock:
+                streams = [stream for stream in self._streams if stream.running]
+                if not streams:
+                    self._thread = None
+                    return
+
+            started = time.perf_counter()
+            for stream in streams:
+                if stream.capture:
+                    self.fill_input(stream.buffer)
+                    stream.callback(stream.buffer)
+            for stream in streams:
+                if not stream.capture:
+                    stream.buffer.fill(0.0)
+                    stream.callback(stream.buffer)
+                    if self.record:
+                        self.recorded.append(stream.buffer.copy())
+            finished = time.perf_counter()
+
+            busy = finished - started
+            self.periods += 1
+            self.busy_seconds += busy
+            self.max_busy_seconds = max(self.max_busy_seconds, busy)
+
+            if not self.realtime:
+                if busy > period:
+                    self.late_periods += 1
+                continue
+
+            deadline += period
+            if finished > deadline:
+                self.late_periods += 1
+                deadline = finished
+            else:
+                time.sleep(deadline - finished)
+
+    def fill_input(self, buffer: np.ndarray):
+        """Write the next captured period into ``buffer`` (clock thread)."""
+        buffer.fill(0.0)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every stream is stopped and the clock thread has exited.
+
+        Returns:
+            False if ``timeout`` seconds passed first.
+        """
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def recorded_audio(self) -> np.ndarray:
+        """Everything the output streams produced, as one array (with ``record``)."""
+        if not self.recorded:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(self.recorded)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Period counters: callbacks run, late periods and callback load."""
+        period = (self.chunksize or 0) / (self.sample_rate or 1)
+        return {
+            "periods": self.periods,
+            "late_periods": self.late_periods,
+            "busy_seconds": self.busy_seconds,
+            "max_busy_seconds": self.max_busy_seconds,
+            "max_load": self.max_busy_seconds / period if period else 0.0,
+            "audio_seconds": self.periods * period,
+        }
+
+
+class NullBackend(ClockedBackend):
+    """
+    Device that consumes output and captures silence.
+
+    For headless machines and load tests of the realtime path; see
+    ``ClockedBackend`` for pacing and the late-period counters.
+    """
+
+    name = "null"
+
+
+class FileLoopbackBackend(ClockedBackend):
+    """
+    Device whose input is an audio file, for testing live processing.
+
+    Input streams receive the file period by period (samples are passed
+    through as they are, so open streams at the file's ``sample_rate``).
+    After the end the input is silent and ``finished`` is set, unless
+    ``loop`` starts the file over. Output is consumed as by the null
+    device, and kept in ``recorded`` with ``record``.
+
+    Args:
+        source: File name, ``AudioSource`` or (frames, channels) array.
+        loop: Repeat the file instead of ending.
+        realtime: Pace periods by the wall clock.
+        record: Keep every output buffer.
+        sample_rate: Sample rate of an array source.
+    """
+
+    name = "loopback"
+
+    def __init__(
+        self,
+        source: Union[str, AudioSource, np.ndarray],
+        loop: bool = False,
+        realtime: bool = True,
+        record: bool = False,
+        sample_rate: int = 44100,
+    ):
+        super().__init__(realtime=realtime, record=record)
+        self.source = source
+        self.loop = loop
+        self.array_sample_rate = sample_rate
+        self.position = 0
+        self.finished = threading.Event()
+        self._opened: Optional[AudioSource] = None
+
+    def open_input(self, callback, sample_rate, channels=2, chunksize=512):
+        # Each input stream plays the file from the start; the previous
+        # opening (e.g. the probe of file_sample_rate) is closed unless the
+        # caller owns it
+        previous, self._opened = self._opened, self._open(channels)
+        if previous is not None and previous is not self.source:
+            previous.close()
+        self.position = 0
+        self.finished.clear()
+        return super().open_input(callback, sample_rate, channels, chunksize)
+
+    def _open(self, channels: int) -> AudioSource:
+        if isinstance(self.source, AudioSource):
+            return self.source
+        if isinstance(self.source, np.ndarray):
+            return ArraySource(self.source, self.array_sample_rate, channels=channels)
+        return open_source(self.source, channels=channels)
+
+    @property
+    def file_sample_rate(self) -> int:
+        """Sample rate of the input file."""
+        if self._opened is None:
+            self._opened = self._open(2)
+        return self._opened.samplerate
+
+    def fill_input(self, buffer: np.ndarray):
+        source = self._opened
+        written = 0
+        while source is not None and written < len(buffer):
+            if self.position >= source.frames:
+                if not self.loop or not source.frames:
+                    self.finished.set()
+                    break
+                self.position = 0
+            stop = min(source.frames, self.position + len(buffer) - written)
+            block = source.read(self.position, stop)
+            buffer[written:written + len(block)] = block
+            written += len(block)
+            self.position = stop
+        buffer[written:] = 0.0
+
+
+_BACKENDS: Dict[str, Callable[..., AudioBackend]] = {}
+
+
+def register_backend(name: str, factory: Callable[..., AudioBackend]):
+    """Register a backend class (or factory) under ``name``."""
+    _BACKENDS[name] = factory
+
+
+def get_backend(name: str, **options) -> AudioBackend:
+    """
+    Create a registered backend.
+
+    Args:
+        name: Backend name ("pygame", "null" or "loopback").
+        **options: Backend options (e.g. ``realtime``, ``source``).
+
+    Returns:
+        A new backend instance.
+    """
+    try:
+        factory = _BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown audio backend '{name}' (available: {', '.join(_BACKENDS)})"
+        ) from None
+    if factory is FileLoopbackBackend and options.get("source") is None:
+        raise ValueError("The loopback audio backend needs a 'source' file or array")
+    return factory(**options)
+
+
+def backend_from_env(default: str = "pygame") -> AudioBackend:
+    """
+    Create the backend named by ``BACKEND_ENV``.
+
+    The loopback backend reads its (looped) input file from
+    ``LOOPBACK_SOURCE_ENV``.
+
+    Args:
+        default: Backend name when ``BACKEND_ENV`` is unset.
+
+    Returns:
+        A new backend instance.
+    """
+    name = os.environ.get(BACKEND_ENV, default)
+    if name != "loopback":
+        return get_backend(name)
+
+    source = os.environ.get(LOOPBACK_SOURCE_ENV)
+    if not source:
+        raise ValueError(
+            f"{BACKEND_ENV}=loopback needs an input file in {LOOPBACK_SOURCE_ENV}"
+        )
+    return get_backend(name, source=source, loop=True)
+
+
+def available_backends() -> List[str]:
+    """Names of the registered backends."""
+    return list(_BACKENDS)
+
+
+register_backend("pygame", PygameBackend)
+register_backend("null", NullBackend)
+register_backend("loopback", FileLoopbackBackend)
@@ -0,0 +1,516 @@
+"""
+Benchmark harness - reproducible throughput and memory measurements.
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from .backends import FileLoopbackBackend, NullBackend
+from .bitcrusher import BitCrusher
+from .decimation import available_modes
+from .live import LivePipeline
+from .playback import StreamingPlayback
+from .realtime import RealtimeCrusher
+from .sources import ArraySource, open_source
+from .streaming import render_file, render_presets, write_blocks
+from .waveshaping import available_curves
+
+
+SAMPLE_RATE = 44100
+DEFAULT_LENGTHS = (1.0, 10.0, 60.0)
+DEFAULT_CHANNELS = (1, 2)
+DEFAULT_DTYPES = ("float32", "float64")
+BUFFER_SIZES = (64, 128, 256, 512, 1024)
+
+# Seconds of audio pushed through the chunk processors per measurement
+REALTIME_SECONDS = 2.0
+
+# Modules whose cold import time is tracked; pool workers pay it on start
+IMPORT_MODULES = ("ghostkitty_bitcrusher.bitcrusher", "ghostkitty_bitcrusher.cli")
+IMPORT_BUDGET = 0.2
+
+# Stage parameters for the per-stage benchmarks
+STAGE_PARAMS = {"bit_depth": 6, "downsample_factor": 3.0, "waveshape": 0.5, "noise": 0.1}
+
+
+def synthetic_signal(frames: int, channels: int, dtype: str = "float32", seed: int = 0) -> np.ndarray:
+    """
+    Deterministic test signal: a log sine sweep plus low-level noise.
+
+    Args:
+        frames: Length in samples.
+        channels: Channel count (1 gives a 1-D array).
+        dtype: Sample dtype.
+        seed: Noise seed.
+
+    Returns:
+        Signal in [-1, 1].
+    """
+    t = np.arange(frames, dtype=np.float64) / SAMPLE_RATE
+    duration = max(frames / SAMPLE_RATE, 1e-9)
+    # 20 Hz to 20 kHz over the signal's length
+    rate = np.log(1000.0) / duration
+    sweep = 0.7 * np.sin(2 * np.pi * 20.0 * (np.exp(rate * t) - 1.0) / rate)
+
+    rng = np.random.default_rng(seed)
+    signal = np.empty((frames, channels), dtype=dtype)
+    for channel in range(channels):
+        signal[:, channel] = sweep + 0.05 * rng.standard_normal(frames)
+
+    return signal[:, 0] if channels == 1 else signal
+
+
+def _time(run: Callable[[], Any], repeats: int) -> float:
+    """Best wall time of ``repeats`` runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_memory(run: Callable[[], Any]) -> int:
+    """Peak bytes allocated by one run above what was live before it."""
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - baseline)
+
+
+def measure_import_time(module: str, runs: int = 5) -> float:
+    """
+    Median time to import ``module`` in a fresh interpreter.
+
+    Only the import itself is timed, not interpreter startup.
+
+    Args:
+        module: Dotted module name.
+        runs: Fresh interpreters to sample.
+
+    Returns:
+        Import time in seconds.
+    """
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - start)"
+    )
+
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], env=env, check=True,
+            stdout=subprocess.PIPE, universal_newlines=True
+        ).stdout
+        samples.append(float(output.split()[-1]))
+    return sorted(samples)[len(samples) // 2]
+
+
+def case_id(name: str, params: Dict[str, Any]) -> str:
+    """Stable identifier used to match results across runs."""
+    return name + "".join(f" {key}={params[key]}" for key in sorted(params))
+
+
+class BenchmarkSuite:
+    """
+    Sweep of benchmark cases over lengths, channel counts and dtypes, plus
+    the cold import time of the processing core.
+
+    Every case runs on synthetic signals with fixed seeds. Throughput is the
+    best of ``repeats`` timed runs; peak memory comes from one extra run
+    under ``tracemalloc`` (NumPy reports its buffers to it). Nothing touches
+    an audio device or the GUI: ``device.playback`` drives streaming
+    playback from a ``NullBackend`` clock at full speed, and also reports
+    the periods whose callback took longer than the audio it produced.
+    ``live.duplex`` runs the live pipeline on a file-loopback device the
+    same way and adds its xruns and measured latency. ``render_presets``
+    renders a file with every preset in one pass; ``render_file.presets``
+    renders it once per preset for comparison.
+    """
+
+    def __init__(
+        self,
+        lengths: Sequence[float] = DEFAULT_LENGTHS,
+        channels: Sequence[int] = DEFAULT_CHANNELS,
+        dtypes: Sequence[str] = DEFAULT_DTYPES,
+        repeats: int = 3,
+        downsample_mode: str = "polyphase",
+        name_filter: Optional[str] = None,
+    ):
+        self.lengths = list(lengths)
+        self.channels = list(channels)
+        self.dtypes = list(dtypes)
+        self.repeats = repeats
+        self.downsample_mode = downsample_mode
+        self.name_filter = name_filter
+        self.presets = BitCrusher().get_presets()
+        self._workdir: Optional[str] = None
+
+    def cases(self) -> Iterator[Tuple[str, Dict[str, Any], Callable[[], Tuple[Callable[[], Any], int]]]]:
+        """
+        Yield ``(name, params, prepare)`` for every case in the sweep.
+
+        ``prepare`` builds the inputs and returns ``(run, samples)``, where
+        ``samples`` is the number of samples one ``run`` processes, or
+        ``(run, samples, extra)`` where ``extra()`` returns additional
+        result fields once all runs are done.
+        """
+        for seconds in self.lengths:
+            frames = int(seconds * SAMPLE_RATE)
+            for channels in self.channels:
+                for dtype in self.dtypes:
+                    shape = {"seconds": seconds, "channels": channels, "dtype": dtype}
+
+                    for preset in self.presets:
+                        yield ("process_audio", dict(shape, preset=preset),
+                               self._process_audio(frames, channels, dtype, preset))
+
+                    for stage, options in self._stages():
+                        yield ("stage." + stage, dict(shape, **options),
+                               self._stage(frames, channels, dtype, stage, options))
+
+                    yield ("analyze_audio", shape, self._analyze(frames, channels, dtype))
+
+                for subtype in ("PCM_16", "FLOAT"):
+                    shape = {"seconds": seconds, "channels": channels, "subtype": subtype}
+                    yield ("file.load", shape, self._load(frames, channels, subtype))
+                    yield ("file.save", shape, self._save(frames, channels, subtype))
+
+                shape = {"seconds": seconds, "channels": channels}
+                yield ("render_presets", shape, self._presets(frames, channels, True))
+                yield ("render_file.presets", shape, self._presets(frames, channels, False))
+
+        for buffer_size in BUFFER_SIZES:
+            for preset in self.presets:
+                params = {"buffer": buffer_size, "preset": preset}
+                yield ("process_realtime_chunk", params, self._chunks(buffer_size, preset, False))
+                yield ("RealtimeCrusher.process", params, self._chunks(buffer_size, preset, True))
+                yield ("device.playback", params, self._device(buffer_size, preset))
+                yield ("live.duplex", params, self._live(buffer_size, preset))
+
+    def _stages(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        yield "reduce_bit_depth", {"bit_depth": STAGE_PARAMS["bit_depth"]}
+        yield "reduce_bit_depth_int", {"bit_depth": STAGE_PARAMS["bit_depth"]}
+        for mode in available_modes():
+            yield "downsample_and_upsample", {"factor": STAGE_PARAMS["downsample_factor"], "mode": mode}
+        for curve in available_curves():
+            yield "apply_waveshaping", {"drive": STAGE_PARAMS["waveshape"], "curve": curve}
+        yield "add_noise", {"amount": STAGE_PARAMS["noise"]}
+
+    def _process_audio(self, frames, channels, dtype, preset):
+        def prepare():
+            bitcrusher = BitCrusher(dtype=dtype, seed=0)
+            audio = synthetic_signal(frames, channels, dtype)
+            out = np.empty_like(audio)
+            params = dict(self.presets[preset], downsample_mode=self.downsample_mode)
+            return (lambda: bitcrusher.process_audio(audio, out=out, **params)), audio.size
+        return prepare
+
+    def _stage(self, frames, channels, dtype, stage, options):
+        def prepare():
+            bitcrusher = BitCrusher(dtype=dtype, seed=0)
+            audio = synthetic_signal(frames, channels, dtype)
+            out = np.empty_like(audio)
+
+            if stage == "reduce_bit_depth_int":
+                pcm = np.rint(audio * 32767).astype(np.int16)
+                pcm_out = np.empty_like(pcm)
+                return (lambda: bitcrusher.reduce_bit_depth_int(pcm, options["bit_depth"], out=pcm_out)), pcm.size
+            if stage == "reduce_bit_depth":
+                return (lambda: bitcrusher.reduce_bit_depth(audio, options["bit_depth"], out=out)), audio.size
+            if stage == "downsample_and_upsample":
+                return (lambda: bitcrusher.downsample_and_upsample(
+                    audio, options["factor"], options["mode"], out=out)), audio.size
+            if stage == "apply_waveshaping":
+                return (lambda: bitcrusher.apply_waveshaping(
+                    audio, options["drive"], out=out, curve=options["curve"])), audio.size
+            return (lambda: bitcrusher.add_noise(audio, options["amount"], out=out)), audio.size
+        return prepare
+
+    def _analyze(self, frames, channels, dtype):
+        def prepare():
+            bitcrusher = BitCrusher(dtype=dtype)
+            audio = synthetic_signal(frames, channels, dtype)
+            return (lambda: bitcrusher.analyze_audio(audio)), audio.size
+        return prepare
+
+    def _load(self, frames, channels, subtype):
+        def prepare():
+            path = os.path.join(self._workdir, f"load_{frames}_{channels}_{subtype}.wav")
+            if not os.path.exists(path):
+                sf.write(path, synthetic_signal(frames, channels), SAMPLE_RATE, subtype=subtype)
+
+            def run():
+                source = open_source(path)
+                source.to_array()
+                source.close()
+            return run, frames * channels
+        return prepare
+
+    def _save(self, frames, channels, subtype):
+        def prepare():
+            path = os.path.join(self._workdir, "save.wav")
+            audio = synthetic_signal(frames, channels)
+
+            def run():
+                blocks = (audio[start:start + 65536] for start in range(0, frames, 65536))
+                write_blocks(blocks, path, SAMPLE_RATE, channels, frames, subtype=subtype)
+            return run, audio.size
+        return prepare
+
+    def _presets(self, frames, channels, shared):
+        def prepare():
+            path = os.path.join(self._workdir, f"presets_{frames}_{channels}.wav")
+            if not os.path.exists(path):
+                sf.write(path, synthetic_signal(frames, channels), SAMPLE_RATE, subtype="PCM_16")
+            bitcrusher = BitCrusher(dtype="float32", seed=0)
+            output = os.path.join(self._workdir, "preset_{preset}.wav")
+
+            if shared:
+                def run():
+                    render_presets(
+                        bitcrusher, path, list(self.presets), output,
+                        downsample_mode=self.downsample_mode
+                    )
+            else:
+                def run():
+                    for preset, params in self.presets.items():
+                        render_file(
+                            bitcrusher, path, output.format(preset=preset),
+                            downsample_mode=self.downsample_mode, **params
+                        )
+            return run, frames * channels * len(self.presets)
+        return prepare
+
+    def _chunks(self, buffer_size, preset, stateful):
+        def prepare():
+            params = self.presets[preset]
+            frames = int(REALTIME_SECONDS * SAMPLE_RATE) // buffer_size * buffer_size
+            audio = synthetic_signal(frames, 2, "float32")
+            chunks = [audio[start:start + buffer_size] for start in range(0, frames, buffer_size)]
+
+            if stateful:
+                crusher = RealtimeCrusher(max_frames=buffer_size, channels=2, seed=0)
+                crusher.set_params(**params)
+
+                def run():
+                    for chunk in chunks:
+                        crusher.process(chunk)
+            else:
+                bitcrusher = BitCrusher(seed=0)
+
+                def run():
+                    for chunk in chunks:
+                        bitcrusher.process_realtime_chunk(chunk, **params)
+            return run, audio.size
+        return prepare
+
+    def _device(self, buffer_size, preset):
+        def prepare():
+            frames = int(REALTIME_SECONDS * SAMPLE_RATE) // buffer_size * buffer_size
+            source = ArraySource(synthetic_signal(frames, 2, "float32"), SAMPLE_RATE)
+            crusher = RealtimeCrusher(
+                max_frames=256, channels=2, seed=0, noise_table_frames=1 << 17
+            )
+            crusher.set_params(**self.presets[preset])
+            playback = StreamingPlayback(crusher, block_size=256)
+            backend = NullBackend(realtime=False)
+
+            def fill(out):
+                if playback.fill(out) < len(out):
+                    stream.stop()
+            stream = backend.open_output(fill, SAMPLE_RATE, 2, buffer_size)
+
+            def run():
+                playback.load(source)
+                playback.is_playing = True
+                stream.start()
+                backend.wait()
+
+            def extra():
+                stats = backend.get_stats()
+                return {key: stats[key] for key in ("periods", "late_periods", "max_load")}
+            return run, frames * 2, extra
+        return prepare
+
+    def _live(self, buffer_size, preset):
+        def prepare():
+            frames = int(REALTIME_SECONDS * SAMPLE_RATE) // buffer_size * buffer_size
+            backend = FileLoopbackBackend(
+                synthetic_signal(frames, 2, "float32"), realtime=False, sample_rate=SAMPLE_RATE
+            )
+            live = LivePipeline(
+                backend, SAMPLE_RATE, 2, chunksize=buffer_size,
+                block_size=min(buffer_size, 128), params=self.presets[preset], seed=0,
+            )
+
+            def run():
+                live.start()
+                backend.finished.wait()
+                live.stop()
+                backend.wait()
+
+            def extra():
+                stats = live.get_stats()
+                return {
+                    "late_periods": backend.late_periods,
+                    "xruns": stats["xruns"],
+                    "latency_ms": stats["latency_ms"],
+                    "round_trip_ms": stats["round_trip_ms"],
+                }
+            return run, frames * 2, extra
+        return prepare
+
+    def run(self, progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Run every selected case.
+
+        Args:
+            progress: Called with each result as it is recorded.
+
+        Returns:
+            Report with ``meta`` (environment) and ``results``.
+        """
+        results: List[Dict[str, Any]] = []
+        self._workdir = tempfile.mkdtemp(prefix="ghostkitty-bench-")
+
+        try:
+            for module in IMPORT_MODULES:
+                params = {"module": module}
+                identifier = case_id("import", params)
+                if self.name_filter and self.name_filter not in identifier:
+                    continue
+
+                seconds = measure_import_time(module)
+                result = {
+                    "id": identifier,
+                    "name": "import",
+                    "params": params,
+                    "samples": 1,
+                    "seconds": seconds,
+                    "samples_per_sec": 1.0 / max(seconds, 1e-12),
+                    "realtime_factor": 0.0,
+                    "peak_bytes": 0,
+                    "within_budget": seconds < IMPORT_BUDGET,
+                }
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+
+            for name, params, prepare in self.cases():
+                identifier = case_id(name, params)
+                if self.name_filter and self.name_filter not in identifier:
+                    continue
+
+                prepared = prepare()
+                run, samples = prepared[:2]
+                run()  # Warm up caches, tables and page mappings
+                seconds = _time(run, self.repeats)
+                peak = _peak_memory(run)
+
+                audio_seconds = samples / params.get("channels", 2) / SAMPLE_RATE
+                result = {
+                    "id": identifier,
+                    "name": name,
+                    "params": params,
+                    "samples": samples,
+                    "seconds": seconds,
+                    "samples_per_sec": samples / max(seconds, 1e-12),
+                    "realtime_factor": audio_seconds / max(seconds, 1e-12),
+                    "peak_bytes": peak,
+                }
+                if len(prepared) > 2:
+                    result.update(prepared[2]())
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+        finally:
+            shutil.rmtree(self._workdir, ignore_errors=True)
+
+        return {"meta": environment(), "results": results}
+
+
+def environment() -> Dict[str, Any]:
+    """Machine and library versions recorded with every report."""
+    import scipy
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "soundfile": sf.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_report(report: Dict[str, Any], filename: str):
+    """Write a report as JSON."""
+    with open(filename, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(filename: str) -> Dict[str, Any]:
+    """Read a report written by ``save_report``."""
+    with open(filename) as f:
+        return json.load(f)
+
+
+def compare_reports(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.10,
+) -> List[Dict[str, Any]]:
+    """
+    Find cases whose throughput dropped by more than ``threshold``.
+
+    Cases are matched by ``id``; cases missing from either report are
+    ignored.
+
+    Args:
+        baseline: Reference report.
+        current: New report.
+        threshold: Allowed fractional throughput loss (0.10 = 10%).
+
+    Returns:
+        One entry per regressed case with both throughputs and the change.
+    """
+    reference = {result["id"]: result for result in baseline["results"]}
+    regressions = []
+
+    for result in current["results"]:
+        before = reference.get(result["id"])
+        if before is None:
+            continue
+
+        change = result["samples_per_sec"] / before["samples_per_sec"] - 1.0
+        if change < -threshold:
+            regressions.append({
+                "id": result["id"],
+                "baseline": before["samples_per_sec"],
+                "current": result["samples_per_sec"],
+                "change": change,
+            })
+
+    return regressions
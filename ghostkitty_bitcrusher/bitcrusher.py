@@ -3,106 +3,338 @@ Core Bitcrusher Audio Processing Engine.
 """
 
 import numpy as np
-from scipy import signal
-from typing import Optional
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import os
 import threading
+from .analysis import ANALYSIS_BLOCK_FRAMES, AudioAnalyzer
+from .automation import as_automation, frame_values, is_automated
+from .cache import StageCache
+from .chain import EffectChain, ExecutionPlan
+from .decimation import get_decimator
+from .noise import NoiseGenerator
+from .stats import ProcessingStats
+from .waveshaping import get_shaper
+
+
+# Frames per scratch piece for stages that need temporaries
+SCRATCH_FRAMES = 65536
+
+# Compiled effect-chain plans kept per processor
+MAX_PLANS = 64
+
+
+def _passthrough(audio: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+    """Return ``audio`` unchanged, copied into ``out`` when one is given."""
+    if out is None or out is audio:
+        return audio
+    np.copyto(out, audio)
+    return out
+
+
+def _bypassed(audio: np.ndarray, bypass: np.ndarray) -> Optional[np.ndarray]:
+    """Copy of the frames an automated stage leaves alone, or None if there are none."""
+    return audio[bypass] if bypass.any() else None
 
 
 class BitCrusher:
     """Advanced bitcrusher with multiple processing algorithms."""
     
-    def __init__(self):
+    def __init__(self, dtype=np.float64, seed: Optional[int] = None):
         self.sample_rate = 44100
         self.is_processing = False
         self.processing_lock = threading.Lock()
-        # Use 64-bit float for better quality and performance
-        self.dtype = np.float64
-        
-    def reduce_bit_depth(self, audio: np.ndarray, bit_depth: int) -> np.ndarray:
+        # Processing precision; float32 halves memory traffic on long renders
+        self.dtype = np.dtype(dtype)
+        # Optional cache of upstream stage results for renders with a cache_key
+        self.stage_cache: Optional[StageCache] = None
+        # Integer-domain quantization tables, keyed by (dtype, bit_depth)
+        self._int_tables = {}
+        # Noise for renders without their own seed; identical on every render
+        self.noise = NoiseGenerator(seed)
+        # Sequential noise for the stateless legacy chunk path
+        self._chunk_rng = np.random.default_rng(self.noise.seed)
+        # Optional per-stage instrumentation; None costs one check per stage
+        self.stats: Optional[ProcessingStats] = None
+        # Compiled plans keyed by (chain key, cache boundary)
+        self._plans: "OrderedDict[tuple, ExecutionPlan]" = OrderedDict()
+
+    def stream_context(
+        self,
+        downsample_factor: float = 1.0,
+        downsample_mode: str = "fft",
+        chain: Optional[EffectChain] = None,
+    ) -> int:
+        """
+        Context needed on each side of a block for seamless block rendering.
+
+        Args:
+            downsample_factor: Downsampling factor (1.0+) or automation curve.
+            downsample_mode: Decimation engine name.
+            chain: Effect chain to render instead of the fixed pipeline.
+
+        Returns:
+            Context length in samples (0 when no stage looks across samples).
+        """
+        if chain is None and is_automated(downsample_factor):
+            chain = EffectChain().add("downsample", factor=downsample_factor, mode=downsample_mode)
+        if chain is not None:
+            return chain.compile().context()
+        if downsample_factor <= 1.0:
+            return 0
+        return get_decimator(downsample_mode).context(downsample_factor)
+
+    def reduce_bit_depth(
+        self,
+        audio: np.ndarray,
+        bit_depth: int,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
         """
         Reduce bit depth for quantization distortion.
 
         Args:
             audio: Input audio array.
-            bit_depth: Target bit depth (1-16).
+            bit_depth: Target bit depth (1-16), or an array with one per
+                frame. Per-frame depths may be fractional, giving step
+                sizes between those of whole bit depths.
+            out: Destination array (may be ``audio`` for in-place operation).
 
         Returns:
             Bit-reduced audio.
         """
-        if bit_depth >= 16:
-            return audio
+        automated = isinstance(bit_depth, np.ndarray)
+        if automated:
+            bypass = bit_depth >= 16
+            kept = _bypassed(audio, bypass)
+        elif bit_depth >= 16:
+            return _passthrough(audio, out)
             
-        # Calculate quantization levels
-        levels = 2 ** bit_depth
-        max_val = levels - 1
-        
         # Normalize to 0-1 range, quantize, then scale back
-        normalized = (audio + 1.0) / 2.0
-        quantized = np.round(normalized * max_val) / max_val
-        
-        return (quantized * 2.0) - 1.0
+        out = np.add(audio, 1.0, out=out)
+
+        # Calculate quantization levels (per frame in the output dtype,
+        # rounding like a scalar operand would)
+        if automated:
+            max_val = frame_values(np.maximum(bit_depth, 1.0), out)
+            np.exp2(max_val, out=max_val)
+            max_val -= 1.0
+        else:
+            levels = 2 ** bit_depth
+            max_val = levels - 1
+
+        out /= 2.0
+        out *= max_val
+        np.round(out, out=out)
+        out /= max_val
+        out *= 2.0
+        out -= 1.0
+        if automated and kept is not None:
+            out[bypass] = kept
+        return out
     
-    def downsample_and_upsample(self, audio: np.ndarray, factor: float) -> np.ndarray:
+    def reduce_bit_depth_int(
+        self,
+        audio: np.ndarray,
+        bit_depth: int,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Reduce bit depth of integer PCM without converting to float.
+
+        Matches ``reduce_bit_depth`` on the float view of the samples
+        (``x / 32768`` for int16, ``x / 2**31`` for int32) with the float
+        result written back as PCM. int16 uses a 65536-entry lookup table
+        and is exact; int32 (24-bit PCM read as int32) finds the
+        quantization level with integer arithmetic and looks up its output
+        value on the 24-bit grid, matching except for round-half-even ties
+        in the float path.
+
+        Args:
+            audio: int16 or int32 PCM samples.
+            bit_depth: Target bit depth (a whole number of bits, 1-16).
+            out: Destination array of the input's dtype (may be ``audio``).
+
+        Returns:
+            Bit-reduced PCM samples.
+        """
+        if bit_depth >= 16:
+            return _passthrough(audio, out)
+
+        if audio.dtype not in (np.int16, np.int32):
+            raise ValueError(f"Integer bit reduction needs int16 or int32 PCM, got {audio.dtype}")
+        if not float(bit_depth).is_integer():
+            raise ValueError(f"Integer bit reduction needs a whole bit depth, got {bit_depth}")
+        bit_depth = int(bit_depth)
+
+        table = self._int_table(audio.dtype, bit_depth)
+        if out is None:
+            out = np.empty_like(audio)
+
+        max_val = 2 ** bit_depth - 1
+        for start in range(0, len(audio), SCRATCH_FRAMES):
+            piece = audio[start:start + SCRATCH_FRAMES]
+            if audio.dtype == np.int16:
+                # Flipping the sign bit maps -32768..32767 onto 0..65535
+                index = piece.view(np.uint16) ^ np.uint16(0x8000)
+            else:
+                # level = round((x + 2**31) * max_val / 2**32)
+                index = piece.astype(np.int64)
+                index += 2 ** 31
+                index *= max_val
+                index += 2 ** 31
+                index >>= 32
+            np.take(table, index, out=out[start:start + SCRATCH_FRAMES])
+
+        return out
+
+    def _int_table(self, dtype: np.dtype, bit_depth: int) -> np.ndarray:
+        """Build (once) the integer lookup table for ``reduce_bit_depth_int``."""
+        key = (np.dtype(dtype).str, bit_depth)
+        table = self._int_tables.get(key)
+        if table is not None:
+            return table
+
+        if dtype == np.int16:
+            # Every possible input sample through the float path
+            values = self.reduce_bit_depth(np.arange(-32768, 32768) / 32768.0, bit_depth)
+        else:
+            # Every quantization level's float output
+            max_val = 2 ** bit_depth - 1
+            values = np.arange(max_val + 1) / max_val * 2.0 - 1.0
+
+        # Convert like libsndfile writing floats: round at 32-bit scale,
+        # then drop the low bits (int32 keeps the 24-bit grid so 24-bit
+        # files match the float path and full-scale values cannot wrap)
+        full = np.clip(np.rint(values * 2.0 ** 31), -2 ** 31, 2 ** 31 - 1).astype(np.int64)
+        if dtype == np.int16:
+            table = (full >> 16).astype(np.int16)
+        else:
+            table = ((full >> 8) << 8).astype(np.int32)
+
+        self._int_tables[key] = table
+        return table
+
+    def downsample_and_upsample(
+        self,
+        audio: np.ndarray,
+        factor: float,
+        mode: str = "fft",
+        position: int = 0,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
         """
         Downsample then upsample for aliasing artifacts.
 
         Args:
             audio: Input audio array (mono or stereo).
-            factor: Downsampling factor (1.0 = no change, higher = more crushing).
+            factor: Downsampling factor (1.0 = no change, higher = more
+                crushing), or an ``Automation`` curve (or per-sample array
+                from stream position 0) of factors.
+            mode: Decimation engine - "hold" (sample-and-hold, fastest),
+                "polyphase" (FIR resampling) or "fft" (reference).
+                Automated factors always use sample-and-hold, since the
+                resampling engines need one fixed ratio.
+            position: Absolute stream position of ``audio[0]`` for block renders.
+            out: Destination array (may be ``audio`` for in-place operation).
 
         Returns:
             Processed audio with aliasing artifacts.
         """
+        if is_automated(factor):
+            return get_decimator("hold").process_automated(
+                audio, as_automation(factor), position, out=out
+            )
         if factor <= 1.0:
-            return audio
-
-        original_len = len(audio)
-        target_len = max(1, int(original_len / factor))
-
-        # Handle mono vs stereo via axis parameter
-        if audio.ndim == 1:
-            downsampled = signal.resample(audio, target_len)
-            upsampled = signal.resample(downsampled, original_len)
-        else:
-            downsampled = signal.resample(audio, target_len, axis=0)
-            upsampled = signal.resample(downsampled, original_len, axis=0)
+            return _passthrough(audio, out)
 
-        return upsampled
+        return get_decimator(mode).process(audio, factor, position, out=out)
     
-    def apply_waveshaping(self, audio: np.ndarray, drive: float = 0.5) -> np.ndarray:
+    def apply_waveshaping(
+        self,
+        audio: np.ndarray,
+        drive: float = 0.5,
+        out: Optional[np.ndarray] = None,
+        curve: str = "tanh",
+    ) -> np.ndarray:
         """
         Apply waveshaping distortion.
 
         Args:
             audio: Input audio array.
-            drive: Distortion amount (0.0-1.0).
+            drive: Distortion amount (0.0-1.0), or an array with one per
+                frame (frames with zero drive pass through).
+            out: Destination array (may be ``audio`` for in-place operation).
+            curve: Transfer curve ("tanh", or any registered in
+                ``ghostkitty_bitcrusher.waveshaping``).
 
         Returns:
             Waveshaped audio.
         """
+        if isinstance(drive, np.ndarray):
+            bypass = drive <= 0.0
+            kept = _bypassed(audio, bypass)
+            out = get_shaper(curve).process_automated(audio, drive, out=out)
+            if kept is not None:
+                out[bypass] = kept
+            return out
+
         if drive <= 0.0:
-            return audio
-            
-        # Apply soft clipping with adjustable drive
-        driven = audio * (1.0 + drive * 3.0)
-        return np.tanh(driven) * 0.8
+            return _passthrough(audio, out)
+
+        return get_shaper(curve).process(audio, drive, out=out)
     
-    def add_noise(self, audio: np.ndarray, amount: float = 0.1) -> np.ndarray:
+    def add_noise(
+        self,
+        audio: np.ndarray,
+        amount: float = 0.1,
+        out: Optional[np.ndarray] = None,
+        position: int = 0,
+        seed: Optional[int] = None,
+    ) -> np.ndarray:
         """
         Add digital noise.
 
+        Noise is addressed by stream position (see ``NoiseGenerator``), so
+        any split of a render into blocks or segments adds the same noise.
+        It is generated in scratch-sized pieces so no full-size noise array
+        is allocated.
+
         Args:
             audio: Input audio array.
-            amount: Noise amount (0.0-1.0).
+            amount: Noise amount (0.0-1.0), or an array with one per frame.
+            out: Destination array (may be ``audio`` for in-place operation).
+            position: Absolute stream position of ``audio[0]``.
+            seed: Noise seed for this render, or a ``NoiseGenerator`` to
+                draw from (defaults to ``self.noise``).
 
         Returns:
             Audio with added noise.
         """
-        if amount <= 0.0:
-            return audio
-            
-        noise = np.random.normal(0, amount * 0.1, audio.shape)
-        return audio + noise
+        automated = isinstance(amount, np.ndarray)
+        if automated:
+            gain = amount * 0.1
+        elif amount <= 0.0:
+            return _passthrough(audio, out)
+
+        if seed is None:
+            generator = self.noise
+        elif isinstance(seed, NoiseGenerator):
+            generator = seed
+        else:
+            generator = NoiseGenerator(seed)
+        out = _passthrough(audio, out if out is not None else np.empty_like(audio))
+        scratch = np.empty((min(len(out), SCRATCH_FRAMES),) + out.shape[1:], dtype=np.float32)
+
+        for start in range(0, len(out), SCRATCH_FRAMES):
+            piece = out[start:start + SCRATCH_FRAMES]
+            noise = generator.fill(scratch[:len(piece)], position + start)
+            if automated:
+                noise *= frame_values(gain[start:start + SCRATCH_FRAMES], noise)
+            else:
+                noise *= amount * 0.1
+            piece += noise
+        return out
     
     def process_audio(
         self,
@@ -112,10 +344,35 @@ class BitCrusher:
         mix: float = 1.0,
         waveshape: float = 0.0,
         noise: float = 0.0,
+        downsample_mode: str = "fft",
+        cache_key: Optional[Hashable] = None,
+        out: Optional[np.ndarray] = None,
+        seed: Optional[int] = None,
+        waveshape_curve: str = "tanh",
+        chain: Optional[EffectChain] = None,
     ) -> np.ndarray:
         """
         Main processing pipeline with all effects.
 
+        The parameters describe the fixed chain bit depth, downsample,
+        waveshape, noise, mix, clip; pass ``chain`` to reorder or repeat
+        stages instead. Either way the chain is compiled once per parameter
+        set into an ``ExecutionPlan`` that skips no-op stages and runs each
+        run of elementwise stages as one cache-blocked pass. Without
+        downsampling the default chain reads and writes the signal once;
+        with it, once on each side of the downsampler and once inside it.
+
+        ``bit_depth``, ``downsample_factor``, ``waveshape``, ``noise`` and
+        ``mix`` may each be an ``Envelope`` (or other ``Automation``) or a
+        per-sample array instead of a number. Curves are evaluated per
+        fused block, so automated renders make the same passes as static
+        ones. An automated downsample factor always uses sample-and-hold.
+
+        Stages run in place on a single output buffer, so a render holds at
+        most the input (converted to ``dtype`` if needed) and the output at
+        full size; everything else is scratch-sized. The FFT and polyphase
+        decimation engines allocate their own temporaries.
+
         Args:
             audio: Input audio array.
             bit_depth: Target bit depth (1-16).
@@ -123,49 +380,265 @@ class BitCrusher:
             mix: Wet/dry mix (0.0-1.0).
             waveshape: Waveshaping amount (0.0-1.0).
             noise: Noise amount (0.0-1.0).
+            downsample_mode: Decimation engine ("hold", "polyphase", "fft").
+            cache_key: Identity of ``audio`` for ``stage_cache`` lookups;
+                renders without a key are never cached.
+            out: Destination array of ``dtype`` with the input's shape; may
+                be ``audio`` itself for fully in-place processing.
+            seed: Noise seed for this render (defaults to the instance's).
+            waveshape_curve: Waveshaping transfer curve name.
+            chain: Effect chain to render; overrides the stage parameters.
 
         Returns:
             Processed audio.
         """
         with self.processing_lock:
             self.is_processing = True
-            
+
             try:
-                # Start with a copy of the original in 64-bit
-                processed = audio.astype(self.dtype)
-                original = processed.copy()  # Keep original for mix
-                
-                # Apply bit depth reduction
-                processed = self.reduce_bit_depth(processed, bit_depth)
-                
-                # Apply downsampling/upsampling
-                if downsample_factor > 1.0:
-                    processed = self.downsample_and_upsample(processed, downsample_factor)
-                
-                # Apply waveshaping
-                if waveshape > 0.0:
-                    processed = self.apply_waveshaping(processed, waveshape)
-                
-                # Add noise
-                if noise > 0.0:
-                    processed = self.add_noise(processed, noise)
-                
-                # Apply wet/dry mix with original 64-bit precision
-                if mix < 1.0:
-                    processed = original * (1.0 - mix) + processed * mix
-                
-                # Ensure we don't clip
-                processed = np.clip(processed, -1.0, 1.0)
-                
-                # Ensure output is C-contiguous for pygame compatibility
-                if not processed.flags['C_CONTIGUOUS']:
-                    processed = np.ascontiguousarray(processed)
-                
-                return processed
-                
+                plan = self._params_plan(chain, cache_key, dict(
+                    bit_depth=bit_depth, downsample_factor=downsample_factor, mix=mix,
+                    waveshape=waveshape, noise=noise, downsample_mode=downsample_mode,
+                    seed=seed, waveshape_curve=waveshape_curve
+                ))
+                return self._process(audio, 0, 0, 0, cache_key, out, plan)
             finally:
                 self.is_processing = False
-    
+
+    def process_audio_parallel(
+        self,
+        audio: np.ndarray,
+        workers: Optional[int] = None,
+        segment_size: Optional[int] = None,
+        **params
+    ) -> np.ndarray:
+        """
+        Render one signal across CPU cores.
+
+        The signal is split into segments that are rendered concurrently on
+        a thread pool (NumPy and SciPy release the GIL for the heavy work),
+        each with ``stream_context`` samples of overlap on both sides, and
+        written into one output array. Noise is position-addressed, so with
+        the hold and polyphase engines the result is identical to
+        ``process_audio``. The FFT engine resamples each window as if it
+        were periodic, so its seams differ by up to about 3e-2 on full-band
+        noise, and the first and last ``stream_context`` samples by up to
+        about 0.7, since the whole-file render wraps the file's other end
+        around there.
+
+        Args:
+            audio: Input audio array.
+            workers: Worker threads (defaults to the CPU count).
+            segment_size: Samples per segment (defaults to a few segments
+                per worker, at least 65536).
+            **params: Processing parameters as for ``process_audio``.
+
+        Returns:
+            Processed audio.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        workers = workers or os.cpu_count() or 1
+        total = len(audio)
+        if segment_size is None:
+            segment_size = max(65536, -(-total // (workers * 4)))
+
+        cache_key = params.pop("cache_key", None)
+        chain = params.pop("chain", None)
+
+        output = np.empty(audio.shape, dtype=self.dtype)
+
+        def render_segment(start: int):
+            stop = min(total, start + segment_size)
+            window_start = max(0, start - context)
+            window_stop = min(total, stop + context)
+            self._process(
+                audio[window_start:window_stop],
+                start - window_start, window_stop - stop, window_start,
+                cache_key, output[start:stop], plan
+            )
+
+        with self.processing_lock:
+            self.is_processing = True
+
+            try:
+                plan = self._params_plan(chain, cache_key, params)
+                context = plan.context()
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    # list() re-raises the first segment failure
+                    list(pool.map(render_segment, range(0, total, segment_size)))
+                return output
+            finally:
+                self.is_processing = False
+
+    def process_block(
+        self,
+        audio: np.ndarray,
+        context_before: int = 0,
+        context_after: int = 0,
+        position: int = 0,
+        bit_depth: int = 8,
+        downsample_factor: float = 1.0,
+        mix: float = 1.0,
+        waveshape: float = 0.0,
+        noise: float = 0.0,
+        downsample_mode: str = "fft",
+        cache_key: Optional[Hashable] = None,
+        out: Optional[np.ndarray] = None,
+        seed: Optional[int] = None,
+        waveshape_curve: str = "tanh",
+        chain: Optional[EffectChain] = None,
+    ) -> np.ndarray:
+        """
+        Process one block of a longer stream.
+
+        The block carries ``context_before`` samples of the preceding signal
+        and ``context_after`` samples of the following signal (see
+        ``stream_context``). Only the samples in between are returned, so
+        consecutive blocks join without seams at the downsampling stage.
+
+        Args:
+            audio: Block with surrounding context.
+            context_before: Leading context samples.
+            context_after: Trailing context samples.
+            position: Absolute stream position of ``audio[0]``.
+            bit_depth: Target bit depth (1-16).
+            downsample_factor: Downsampling factor (1.0+).
+            mix: Wet/dry mix (0.0-1.0).
+            waveshape: Waveshaping amount (0.0-1.0).
+            noise: Noise amount (0.0-1.0).
+            downsample_mode: Decimation engine ("hold", "polyphase", "fft").
+            cache_key: Identity of the stream for ``stage_cache`` lookups.
+            out: Destination for the block without its context.
+            seed: Noise seed for the stream (defaults to the instance's).
+            waveshape_curve: Waveshaping transfer curve name.
+            chain: Effect chain to render; overrides the stage parameters.
+
+        Returns:
+            Processed block without its context.
+        """
+        with self.processing_lock:
+            self.is_processing = True
+
+            try:
+                plan = self._params_plan(chain, cache_key, dict(
+                    bit_depth=bit_depth, downsample_factor=downsample_factor, mix=mix,
+                    waveshape=waveshape, noise=noise, downsample_mode=downsample_mode,
+                    seed=seed, waveshape_curve=waveshape_curve
+                ))
+                return self._process(
+                    audio, context_before, context_after, position, cache_key, out, plan
+                )
+            finally:
+                self.is_processing = False
+
+    def _plan(self, chain: EffectChain, cache_boundary: bool) -> ExecutionPlan:
+        """Compiled plan for ``chain``, reused across calls with the same stages."""
+        if not chain.cacheable:
+            # Array automation is keyed by identity; caching would keep it alive
+            return chain.compile(cache_boundary)
+
+        key = (chain.key, cache_boundary)
+        plan = self._plans.get(key)
+        if plan is not None:
+            self._plans.move_to_end(key)
+            return plan
+
+        plan = chain.compile(cache_boundary)
+        self._plans[key] = plan
+        while len(self._plans) > MAX_PLANS:
+            self._plans.popitem(last=False)
+        return plan
+
+    def _params_plan(
+        self,
+        chain: Optional[EffectChain],
+        cache_key: Optional[Hashable],
+        params: Dict[str, Any],
+    ) -> ExecutionPlan:
+        """Plan for an explicit chain, or for the fixed pipeline with ``params``."""
+        if chain is None:
+            chain = EffectChain.from_params(**params)
+        return self._plan(chain, cache_key is not None and self.stage_cache is not None)
+
+    def _process(
+        self,
+        audio: np.ndarray,
+        context_before: int,
+        context_after: int,
+        position: int,
+        cache_key: Optional[Hashable],
+        out: Optional[np.ndarray],
+        plan: ExecutionPlan,
+    ) -> np.ndarray:
+        """Run a compiled plan on ``out``, trimming context after the last downsampler."""
+        stats = self.stats
+        if stats is not None:
+            total_mark = stats.start()
+
+        source = audio if audio.dtype == self.dtype else audio.astype(self.dtype)
+        end = len(source) - context_after
+        original = source[context_before:end]  # Dry signal for mix
+
+        if out is None:
+            out = np.empty(original.shape, dtype=self.dtype)
+        elif plan.uses_mix and np.may_share_memory(out, source):
+            # In-place render still needs the dry signal for mixing
+            source = source.copy()
+            original = source[context_before:end]
+
+        steps = plan.steps
+
+        # Context is only needed up to the last downsampler; with context
+        # the steps before it work on a block-sized window buffer
+        barrier = plan.barrier
+        windowed = barrier >= 0 and (context_before or context_after)
+
+        current = source if barrier >= 0 else original
+
+        # Resume after the deepest cached prefix of the cacheable steps
+        cache = self.stage_cache if cache_key is not None else None
+        keys = []
+        done = 0
+        if cache is not None and plan.cached_steps:
+            block_key = (cache_key, position, len(audio), context_before, context_after)
+            for step in steps[:plan.cached_steps]:
+                keys.append((keys[-1] if keys else (block_key,)) + step.key)
+            done, cached = cache.longest_prefix(keys)
+            if cached is not None:
+                current = cached
+
+        target = out
+        if windowed and done <= barrier:
+            target = np.empty(source.shape, dtype=self.dtype)
+
+        for depth in range(done, len(steps)):
+            step = steps[depth]
+            if depth <= barrier:
+                step_position, dry = position, source
+            else:
+                step_position, dry = position + context_before, original
+
+            if stats is not None:
+                mark = stats.start()
+            current = step.run(self, current, target, step_position, dry)
+            if stats is not None:
+                stats.stop(step.name, mark, current.size)
+
+            if windowed and depth == barrier:
+                np.copyto(out, current[context_before:end])
+                current = target = out
+            if depth < len(keys):
+                cache.put(keys[depth], current.copy())
+
+        if current is not out:
+            np.copyto(out, current)
+
+        if stats is not None:
+            stats.stop("total", total_mark, out.size)
+
+        return out
+
     def process_realtime_chunk(
         self,
         chunk: np.ndarray,
@@ -175,7 +648,16 @@ class BitCrusher:
         waveshape: float = 0.0,
         noise: float = 0.0,
     ) -> np.ndarray:
-        """Process a small chunk for real-time playback (low latency)."""
+        """
+        Process a small chunk for real-time playback (low latency).
+
+        Stateless: the hold phase restarts on every call. Use
+        ``RealtimeCrusher`` for seamless, allocation-free streaming.
+        """
+        stats = self.stats
+        if stats is not None:
+            mark = stats.start()
+
         # Create a copy for processing
         processed = chunk.astype(np.float32, copy=True)
         original = chunk.astype(np.float32, copy=True)
@@ -194,10 +676,7 @@ class BitCrusher:
             step = max(1, int(downsample_factor))
             if step > 1:
                 # Simple hold-and-repeat for aliasing effect
-                for i in range(0, len(processed), step):
-                    end_idx = min(i + step, len(processed))
-                    if i < len(processed):
-                        processed[i:end_idx] = processed[i]
+                processed = processed[(np.arange(len(processed)) // step) * step]
         
         # Waveshaping — consistent with full processing pipeline
         if waveshape > 0.0:
@@ -206,8 +685,8 @@ class BitCrusher:
         
         # Add noise
         if noise > 0.0:
-            noise_data = np.random.normal(0, noise * 0.05, processed.shape).astype(np.float32)
-            processed = processed + noise_data
+            noise_data = self._chunk_rng.standard_normal(processed.shape, dtype=np.float32)
+            processed = processed + noise_data * np.float32(noise * 0.05)
         
         # Apply mix
         if mix < 1.0:
@@ -217,6 +696,10 @@ class BitCrusher:
         result = np.clip(processed, -1.0, 1.0)
         if not result.flags['C_CONTIGUOUS']:
             result = np.ascontiguousarray(result)
+
+        if stats is not None:
+            elapsed = stats.stop("realtime_chunk", mark, result.size)
+            stats.record_deadline(elapsed, len(chunk) / self.sample_rate)
             
         return result
     
@@ -274,12 +757,30 @@ class BitCrusher:
             }
         }
     
-    def analyze_audio(self, audio: np.ndarray) -> dict:
-        """Analyze audio and return metrics."""
-        return {
-            "rms": np.sqrt(np.mean(audio**2)),
-            "peak": np.max(np.abs(audio)),
-            "length": len(audio),
-            "dynamic_range": np.max(audio) - np.min(audio),
-            "zero_crossings": len(np.where(np.diff(np.signbit(audio)))[0])
-        }
+    def analyze_audio(self, audio: np.ndarray, sample_rate: Optional[int] = None) -> dict:
+        """
+        Analyze audio and return metrics.
+
+        Every metric comes from one blocked pass with O(1) extra memory
+        (see ``AudioAnalyzer``); feed an ``AudioAnalyzer`` directly to
+        analyze a stream.
+
+        Args:
+            audio: (frames, channels) or mono (frames,) samples.
+            sample_rate: Sample rate for loudness (defaults to ``self.sample_rate``).
+
+        Returns:
+            ``AudioAnalyzer.result()``: level metrics per channel (scalars
+            for mono input), plus windowed and integrated loudness.
+        """
+        channels = 1 if audio.ndim == 1 else audio.shape[1]
+        analyzer = AudioAnalyzer(channels, sample_rate or self.sample_rate)
+        for start in range(0, len(audio), ANALYSIS_BLOCK_FRAMES):
+            analyzer.feed(audio[start:start + ANALYSIS_BLOCK_FRAMES])
+
+        result = analyzer.result()
+        if audio.ndim == 1:
+            for key, value in result.items():
+                if isinstance(value, np.ndarray):
+                    result[key] = value[0].item()
+        return result
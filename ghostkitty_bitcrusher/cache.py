@@ -0,0 +1,86 @@
+"""
+Stage cache - memory-budgeted LRU store for intermediate stage results.
+"""
+
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class StageCache:
+    """
+    LRU cache of stage outputs keyed by input identity and stage prefix.
+
+    A key is ``(input_key, stage_1, ..., stage_n)`` where each stage entry
+    holds that stage's parameters, so an entry stands for the signal after
+    the first ``n`` stages. Changing a downstream parameter (noise, mix)
+    leaves upstream keys unchanged and their results are reused. Cached
+    arrays are read-only; entries are evicted least-recently-used first
+    once ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def longest_prefix(self, keys: List[Hashable]) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Find the deepest cached stage prefix.
+
+        Args:
+            keys: Prefix keys ordered from one stage to all stages.
+
+        Returns:
+            ``(depth, array)`` for the deepest hit, or ``(0, None)``.
+        """
+        with self._lock:
+            for depth in range(len(keys), 0, -1):
+                array = self._entries.get(keys[depth - 1])
+                if array is not None:
+                    self._entries.move_to_end(keys[depth - 1])
+                    self.hits += 1
+                    return depth, array
+
+            self.misses += 1
+            return 0, None
+
+    def put(self, key: Hashable, array: np.ndarray):
+        """Store a stage result, evicting old entries to stay within budget."""
+        if array.nbytes > self.max_bytes:
+            return
+
+        array.flags.writeable = False
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.nbytes
+
+            self._entries[key] = array
+            self.current_bytes += array.nbytes
+
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory use."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,448 @@
+"""
+Effect chains - declarative stage lists compiled into fused execution plans.
+"""
+
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .automation import Automation, as_automation
+from .decimation import get_decimator
+from .noise import NOISE_BLOCK_FRAMES
+
+
+# Frames per fused block. Blocks are aligned to absolute stream position on
+# noise block boundaries, so each noise block is generated exactly once
+FUSED_BLOCK_FRAMES = NOISE_BLOCK_FRAMES
+
+# Parameters of each stage kind, in key order, with their defaults
+STAGE_PARAMS: Dict[str, Tuple[Tuple[str, Any], ...]] = {
+    "bit_depth": (("bits", 8),),
+    "downsample": (("factor", 1.0), ("mode", "fft")),
+    "waveshape": (("drive", 0.0), ("curve", "tanh")),
+    "noise": (("amount", 0.0), ("seed", None)),
+    "mix": (("amount", 1.0),),
+    "clip": (("limit", 1.0),),
+}
+
+# Stages that map each sample on its own and can share one pass
+ELEMENTWISE = frozenset(("bit_depth", "waveshape", "noise", "mix", "clip"))
+
+# Stages whose results depend on the input signal alone and may be cached
+UPSTREAM = frozenset(("bit_depth", "downsample", "waveshape"))
+
+# Parameters that accept automation curves, per stage kind
+AUTOMATABLE = {
+    "bit_depth": "bits",
+    "downsample": "factor",
+    "waveshape": "drive",
+    "noise": "amount",
+    "mix": "amount",
+}
+
+
+class ChainStage:
+    """One stage of an effect chain: a kind and its parameters."""
+
+    def __init__(self, kind: str, **params):
+        if kind not in STAGE_PARAMS:
+            raise ValueError(
+                f"Unknown stage '{kind}' (available: {', '.join(STAGE_PARAMS)})"
+            )
+        defaults = STAGE_PARAMS[kind]
+        unknown = set(params) - {name for name, _ in defaults}
+        if unknown:
+            raise ValueError(f"Unknown parameter(s) for {kind}: {', '.join(sorted(unknown))}")
+
+        self.kind = kind
+        self.params = {
+            name: as_automation(params.get(name, default)) for name, default in defaults
+        }
+        for name, value in self.params.items():
+            if isinstance(value, Automation) and AUTOMATABLE.get(kind) != name:
+                raise ValueError(f"{kind} parameter '{name}' cannot be automated")
+
+    @property
+    def automation(self) -> Optional[Automation]:
+        """The stage's automation curve, if its parameter is automated."""
+        value = self.params.get(AUTOMATABLE.get(self.kind, ""))
+        return value if isinstance(value, Automation) else None
+
+    @property
+    def key(self) -> tuple:
+        """Hashable identity: the kind followed by the parameter values."""
+        return (self.kind,) + tuple(
+            (value.key or ("array", id(value))) if isinstance(value, Automation) else value
+            for value in self.params.values()
+        )
+
+    @property
+    def cacheable(self) -> bool:
+        """Whether the key identifies the stage by value (arrays are not keyed)."""
+        automation = self.automation
+        return automation is None or automation.key is not None
+
+    @property
+    def is_noop(self) -> bool:
+        """Whether the stage leaves every signal unchanged."""
+        if self.automation is not None:
+            return False
+        p = self.params
+        if self.kind == "bit_depth":
+            return p["bits"] >= 16
+        if self.kind == "downsample":
+            return p["factor"] <= 1.0
+        if self.kind == "waveshape":
+            return p["drive"] <= 0.0
+        if self.kind == "noise":
+            return p["amount"] <= 0.0
+        if self.kind == "mix":
+            return p["amount"] >= 1.0
+        return False
+
+    @property
+    def elementwise(self) -> bool:
+        """Whether each output sample depends only on the same input sample."""
+        return self.kind in ELEMENTWISE
+
+    def __repr__(self) -> str:
+        args = ", ".join(f"{name}={value!r}" for name, value in self.params.items())
+        return f"ChainStage({self.kind!r}, {args})"
+
+
+class EffectChain:
+    """
+    An ordered list of effect stages.
+
+    Stages may be reordered or repeated freely::
+
+        chain = EffectChain().add("waveshape", drive=0.3).add("bit_depth", bits=6)
+        chain.add("waveshape", drive=0.5, curve="fold").add("clip")
+
+    The main parameter of each stage (see ``AUTOMATABLE``) may be an
+    ``Automation`` curve or a per-sample array instead of a number.
+
+    A chain is a description only; ``compile`` turns it into an
+    ``ExecutionPlan``. Pass a chain as ``chain`` to ``BitCrusher.process_audio``,
+    ``process_block`` or ``render_blocks`` to render it.
+    """
+
+    def __init__(self, stages: Optional[Iterable[ChainStage]] = None):
+        self.stages: List[ChainStage] = list(stages or [])
+
+    def add(self, kind: str, **params) -> "EffectChain":
+        """
+        Append a stage.
+
+        Args:
+            kind: Stage kind ("bit_depth", "downsample", "waveshape",
+                "noise", "mix" or "clip").
+            **params: Stage parameters (see ``STAGE_PARAMS``).
+
+        Returns:
+            The chain, for chaining calls.
+        """
+        self.stages.append(ChainStage(kind, **params))
+        return self
+
+    @classmethod
+    def from_params(
+        cls,
+        bit_depth: int = 8,
+        downsample_factor: float = 1.0,
+        mix: float = 1.0,
+        waveshape: float = 0.0,
+        noise: float = 0.0,
+        downsample_mode: str = "fft",
+        seed: Optional[int] = None,
+        waveshape_curve: str = "tanh",
+    ) -> "EffectChain":
+        """The fixed ``process_audio`` pipeline for a parameter set (values may be automated)."""
+        return (
+            cls()
+            .add("bit_depth", bits=bit_depth)
+            .add("downsample", factor=downsample_factor, mode=downsample_mode)
+            .add("waveshape", drive=waveshape, curve=waveshape_curve)
+            .add("noise", amount=noise, seed=seed)
+            .add("mix", amount=mix)
+            .add("clip")
+        )
+
+    @property
+    def key(self) -> tuple:
+        """Hashable identity of the whole chain."""
+        return tuple(stage.key for stage in self.stages)
+
+    @property
+    def cacheable(self) -> bool:
+        """Whether plans and stage results for this chain may be cached by key."""
+        return all(stage.cacheable for stage in self.stages)
+
+    def compile(self, cache_boundary: bool = False) -> "ExecutionPlan":
+        """
+        Build the execution plan for this chain.
+
+        Args:
+            cache_boundary: End a fused step where the cacheable leading
+                stages end, so their result can go into a stage cache.
+
+        Returns:
+            The plan.
+        """
+        return ExecutionPlan(self, cache_boundary)
+
+    def __repr__(self) -> str:
+        return f"EffectChain({self.stages!r})"
+
+
+class PlanStep:
+    """
+    One pass of an execution plan.
+
+    A step is either a single stage that looks across samples (the
+    downsampler) or a run of elementwise stages fused into one pass. A
+    fused pass walks the signal in ``FUSED_BLOCK_FRAMES`` blocks and runs
+    every stage on a block while it is still in cache, so the run costs one
+    read and one write of the signal instead of one of each per stage.
+    """
+
+    def __init__(self, stages: List[ChainStage], cacheable: bool):
+        self.stages = stages
+        self.cacheable = cacheable and all(stage.cacheable for stage in stages)
+        self.fused = stages[0].elementwise
+        self.key = tuple(stage.key for stage in stages)
+        self.name = "+".join(stage.kind for stage in stages)
+
+    def run(
+        self,
+        bitcrusher,
+        audio: np.ndarray,
+        out: np.ndarray,
+        position: int,
+        dry: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Run the step.
+
+        Args:
+            bitcrusher: Processor providing the stage implementations.
+            audio: Step input.
+            out: Destination with ``audio``'s shape (may be ``audio``).
+            position: Absolute stream position of ``audio[0]``.
+            dry: Chain input aligned with ``audio``, for mix stages.
+
+        Returns:
+            ``out``.
+        """
+        if not self.fused:
+            # An automated factor goes through as the curve itself: the
+            # hold grid depends on its running phase, not per-frame values
+            p = self.stages[0].params
+            return bitcrusher.downsample_and_upsample(
+                audio, p["factor"], p["mode"], position, out=out
+            )
+
+        size = FUSED_BLOCK_FRAMES
+        scratch = None
+        if any(stage.kind == "mix" for stage in self.stages):
+            scratch = np.empty((min(len(audio), size),) + audio.shape[1:], dtype=out.dtype)
+
+        start = 0
+        while start < len(audio):
+            stop = min(len(audio), start + size - (position + start) % size)
+            block = audio[start:stop]
+            target = out[start:stop]
+            for stage in self.stages:
+                block = _apply(
+                    bitcrusher, stage, block, target, position + start,
+                    dry[start:stop], scratch
+                )
+            start = stop
+
+        return out
+
+
+def _apply(bitcrusher, stage, block, target, position, dry, scratch) -> np.ndarray:
+    """Run one elementwise stage from ``block`` into ``target``."""
+    p = stage.params
+    kind = stage.kind
+    automation = stage.automation
+    if automation is not None:
+        p = dict(p)
+        p[AUTOMATABLE[kind]] = automation.block(position, target)
+
+    if kind == "bit_depth":
+        return bitcrusher.reduce_bit_depth(block, p["bits"], out=target)
+    if kind == "waveshape":
+        return bitcrusher.apply_waveshaping(block, p["drive"], out=target, curve=p["curve"])
+    if kind == "noise":
+        return bitcrusher.add_noise(
+            block, p["amount"], out=target, position=position, seed=p["seed"]
+        )
+    if kind == "mix":
+        mix = p["amount"]
+        np.multiply(block, mix, out=target)
+        if automation is not None:
+            # Per-sample dry gain in scratch: ``mix`` may be a view of the
+            # caller's automation array
+            gain = np.subtract(1.0, mix, out=scratch[:len(dry)])
+            wet = np.multiply(dry, gain, out=gain)
+        else:
+            wet = np.multiply(dry, 1.0 - mix, out=scratch[:len(dry)])
+        return np.add(target, wet, out=target)
+
+    limit = p["limit"]
+    return np.clip(block, -limit, limit, out=target)
+
+
+class ExecutionPlan:
+    """
+    A compiled effect chain.
+
+    Compiling drops no-op stages (16-bit quantization, a downsample factor
+    of 1, zero drive or noise, a fully wet mix; automated stages are always
+    kept) and groups each run of adjacent elementwise stages into one
+    fused ``PlanStep``. Only downsample stages, which read neighbouring
+    samples, break a run. Automated stages evaluate their curve once per
+    fused block, so automation adds no passes over the signal.
+
+    Attributes:
+        steps: Passes in order.
+        barrier: Index of the last non-elementwise step, or -1. Block
+            context is needed up to and including this step.
+        cached_steps: Number of leading steps that may be cached.
+    """
+
+    def __init__(self, chain: EffectChain, cache_boundary: bool = False):
+        self.key = chain.key
+        stages = [stage for stage in chain.stages if not stage.is_noop]
+
+        # Leading stages that only depend on the input signal
+        upstream = 0
+        while upstream < len(stages) and stages[upstream].kind in UPSTREAM:
+            upstream += 1
+
+        self.steps: List[PlanStep] = []
+        run: List[ChainStage] = []
+        for index, stage in enumerate(stages):
+            boundary = cache_boundary and index == upstream
+            if run and (not stage.elementwise or boundary):
+                self.steps.append(PlanStep(run, index <= upstream))
+                run = []
+            if stage.elementwise:
+                run.append(stage)
+            else:
+                self.steps.append(PlanStep([stage], index < upstream))
+        if run:
+            self.steps.append(PlanStep(run, len(stages) <= upstream))
+
+        self.barrier = max(
+            (index for index, step in enumerate(self.steps) if not step.fused), default=-1
+        )
+        self.cached_steps = 0
+        while self.cached_steps < len(self.steps) and self.steps[self.cached_steps].cacheable:
+            self.cached_steps += 1
+
+        self._downsamplers = [
+            (stage.params["factor"], stage.params["mode"])
+            for stage in stages if stage.kind == "downsample"
+        ]
+
+    @property
+    def uses_mix(self) -> bool:
+        """Whether any step mixes in the dry signal."""
+        return any(stage.kind == "mix" for step in self.steps for stage in step.stages)
+
+    def context(self) -> int:
+        """Context needed on each side of a block for seamless block rendering."""
+        return sum(
+            get_decimator("hold").context(factor.max()) if isinstance(factor, Automation)
+            else get_decimator(mode).context(factor)
+            for factor, mode in self._downsamplers
+        )
+
+    def __repr__(self) -> str:
+        return f"ExecutionPlan([{', '.join(step.name for step in self.steps)}])"
+
+
+class SharedPlan:
+    """
+    Several chains over one input, compiled into one tree of passes.
+
+    Stages are merged by key into a prefix tree, so chains that start with
+    the same stages (e.g. the same bit depth) share the passes for them.
+    Each unbranched run of elementwise stages in the tree is fused into one
+    ``PlanStep``, as in ``ExecutionPlan``. Every pass therefore runs once
+    per block however many chains contain it, and passes at the same
+    depth are independent of each other.
+
+    Attributes:
+        nodes: Passes as ``(step, parent)``, where ``parent`` is the index
+            of the pass whose output the step reads (-1 for the input).
+            Parents precede their children.
+        levels: Node indices grouped by depth in the tree.
+        windowed: Per pass, whether it or a pass below it reads
+            neighbouring samples, so it needs the block context. The other
+            passes run on the block alone.
+        outputs: Chain name -> index of the pass producing its result (-1
+            when every stage of the chain is a no-op).
+    """
+
+    def __init__(self, chains: Dict[str, EffectChain]):
+        self.plans = {name: chain.compile() for name, chain in chains.items()}
+
+        # Prefix tree of stages: [stage, children by stage key, chains ending here]
+        root: list = [None, {}, []]
+        for name, chain in chains.items():
+            node = root
+            for stage in chain.stages:
+                if not stage.is_noop:
+                    node = node[1].setdefault(stage.key, [stage, {}, []])
+            node[2].append(name)
+
+        self.nodes: List[Tuple[PlanStep, int]] = []
+        self.levels: List[List[int]] = []
+        self.outputs: Dict[str, int] = {name: -1 for name in root[2]}
+
+        pending = [(child, -1, 0) for child in root[1].values()]
+        while pending:
+            node, parent, depth = pending.pop(0)
+            # Extend the pass down the tree while nothing branches off
+            run = [node[0]]
+            while (
+                node[0].elementwise and not node[2] and len(node[1]) == 1
+                and next(iter(node[1].values()))[0].elementwise
+            ):
+                node = next(iter(node[1].values()))
+                run.append(node[0])
+
+            index = len(self.nodes)
+            self.nodes.append((PlanStep(run, False), parent))
+            if depth == len(self.levels):
+                self.levels.append([])
+            self.levels[depth].append(index)
+            for name in node[2]:
+                self.outputs[name] = index
+            pending.extend((child, index, depth + 1) for child in node[1].values())
+
+        # Children follow their parents, so walk back up from the leaves
+        self.windowed = [not step.fused for step, _ in self.nodes]
+        for index in range(len(self.nodes) - 1, -1, -1):
+            parent = self.nodes[index][1]
+            if parent >= 0 and self.windowed[index]:
+                self.windowed[parent] = True
+
+    @property
+    def passes(self) -> int:
+        """Passes over the signal per block."""
+        return len(self.nodes)
+
+    @property
+    def separate_passes(self) -> int:
+        """Passes the chains would make rendered one by one."""
+        return sum(len(plan.steps) for plan in self.plans.values())
+
+    def context(self) -> int:
+        """Context on each side of a block that satisfies every chain."""
+        return max((plan.context() for plan in self.plans.values()), default=0)
+
+    def __repr__(self) -> str:
+        return f"SharedPlan({self.passes} passes for {len(self.plans)} chains)"
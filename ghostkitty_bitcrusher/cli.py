@@ -0,0 +1,379 @@
+"""
+Command-line interface - GUI launcher and headless batch rendering.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+import soundfile as sf
+
+from .bitcrusher import BitCrusher
+from .decimation import available_modes
+from .waveshaping import available_curves
+from .streaming import DEFAULT_BLOCK_SIZE, render_file, render_presets
+
+
+OUTPUT_FORMATS = ("wav", "flac", "ogg", "aiff")
+
+# One processor per worker process, reused across files
+_worker_bitcrusher: Optional[BitCrusher] = None
+
+
+def _render_one(task: Tuple[str, str, Dict[str, Any], int]) -> Dict[str, Any]:
+    """Render one file in a worker process (no GUI or audio device imports)."""
+    global _worker_bitcrusher
+    input_path, output_path, params, block_size = task
+
+    if _worker_bitcrusher is None:
+        _worker_bitcrusher = BitCrusher()
+
+    result = {"input": input_path, "output": output_path, "frames": 0, "error": None}
+    start = time.perf_counter()
+
+    try:
+        info = sf.info(input_path)
+        result["frames"] = render_file(
+            _worker_bitcrusher, input_path, output_path, block_size, **params
+        )
+        result["samples"] = result["frames"] * info.channels
+        result["duration"] = result["frames"] / info.samplerate
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def _collect(future: Future, task: Tuple[str, str, Dict[str, Any], int]) -> Dict[str, Any]:
+    """Result of a worker future, or a failure record if the worker died."""
+    try:
+        return future.result()
+    except Exception as e:
+        # e.g. BrokenProcessPool when a worker process was killed
+        input_path, output_path = task[:2]
+        error = str(e) or type(e).__name__
+        return {"input": input_path, "output": output_path, "frames": 0, "error": error}
+
+
+def _expand_inputs(patterns: List[str]) -> List[str]:
+    """Expand input globs, keeping order and dropping duplicates."""
+    paths: List[str] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) or (
+            [pattern] if os.path.isfile(pattern) else []
+        )
+        for path in matches:
+            if os.path.isfile(path) and path not in paths:
+                paths.append(path)
+    return paths
+
+
+def _output_paths(inputs: List[str], output_dir: str, fmt: str) -> List[str]:
+    """
+    Output path for each input, mirroring its directory under ``output_dir``.
+
+    Directories are taken relative to the deepest directory containing every
+    input, so ``stems/a/kick.wav`` and ``stems/b/kick.wav`` render to
+    ``a/kick`` and ``b/kick`` instead of the same file.
+    """
+    folders = [os.path.dirname(os.path.abspath(path)) for path in inputs]
+    base = os.path.commonpath(folders)
+
+    outputs = []
+    for input_path, folder in zip(inputs, folders):
+        stem = os.path.splitext(os.path.basename(input_path))[0]
+        target = os.path.normpath(os.path.join(output_dir, os.path.relpath(folder, base)))
+        output_path = os.path.join(target, f"{stem}.{fmt}")
+        if os.path.abspath(output_path) == os.path.abspath(input_path):
+            output_path = os.path.join(target, f"{stem}_crushed.{fmt}")
+        outputs.append(output_path)
+    return outputs
+
+
+def _duplicates(paths: List[str]) -> List[str]:
+    """Paths that occur more than once (e.g. ``kick.wav`` and ``kick.flac``)."""
+    seen, repeated = set(), []
+    for path in paths:
+        key = os.path.normcase(os.path.abspath(path))
+        if key in seen and path not in repeated:
+            repeated.append(path)
+        seen.add(key)
+    return repeated
+
+
+def _batch_params(args: argparse.Namespace) -> Dict[str, Any]:
+    """Build processing parameters from a preset plus explicit overrides."""
+    params: Dict[str, Any] = {
+        "downsample_mode": args.downsample_mode,
+        "waveshape_curve": args.waveshape_curve,
+    }
+
+    if args.preset:
+        presets = BitCrusher().get_presets()
+        if args.preset not in presets:
+            raise ValueError(
+                f"Unknown preset '{args.preset}' (available: {', '.join(presets)})"
+            )
+        params.update(presets[args.preset])
+
+    overrides = {
+        "bit_depth": args.bit_depth,
+        "downsample_factor": args.downsample,
+        "mix": args.mix,
+        "waveshape": args.waveshape,
+        "noise": args.noise,
+        "seed": args.seed,
+    }
+    params.update({k: v for k, v in overrides.items() if v is not None})
+    return params
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    """Render every matching input file; returns the process exit code."""
+    try:
+        params = _batch_params(args)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+
+    inputs = _expand_inputs(args.inputs)
+    if not inputs:
+        print("Error: no input files matched.")
+        return 1
+
+    outputs = _output_paths(inputs, args.output_dir, args.format)
+    clashes = _duplicates(outputs)
+    if clashes:
+        for output_path in clashes:
+            sources = [i for i, o in zip(inputs, outputs) if o == output_path]
+            print(f"Error: {', '.join(sources)} would all render to {output_path}")
+        return 2
+
+    tasks = []
+    for input_path, output_path in zip(inputs, outputs):
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        tasks.append((input_path, output_path, params, args.block_size))
+
+    print(f"Rendering {len(tasks)} file(s) with {args.workers} worker(s)...")
+    start = time.perf_counter()
+    failures = 0
+    total_samples = 0
+
+    if args.workers <= 1:
+        completed = (_render_one(task) for task in tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=args.workers)
+        futures = {pool.submit(_render_one, task): task for task in tasks}
+        completed = (_collect(future, futures[future]) for future in as_completed(futures))
+
+    try:
+        for result in completed:
+            if result["error"]:
+                failures += 1
+                print(f"FAILED {result['input']}: {result['error']}")
+                continue
+
+            seconds = max(result["seconds"], 1e-9)
+            total_samples += result["samples"]
+            print(
+                f"{result['input']} -> {result['output']}: "
+                f"{result['samples'] / seconds / 1e6:.1f} Msamples/s, "
+                f"{result['duration'] / seconds:.1f}x realtime"
+            )
+    finally:
+        if args.workers > 1:
+            pool.shutdown()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Done: {len(tasks) - failures} ok, {failures} failed in {elapsed:.1f}s "
+        f"({total_samples / max(elapsed, 1e-9) / 1e6:.1f} Msamples/s overall)"
+    )
+    return 1 if failures else 0
+
+
+def run_presets(args: argparse.Namespace) -> int:
+    """Render one file with several presets in one pass; returns the exit code."""
+    bitcrusher = BitCrusher()
+    names = args.presets or list(bitcrusher.get_presets())
+    stem = os.path.splitext(os.path.basename(args.input))[0]
+    os.makedirs(args.output_dir, exist_ok=True)
+    template = os.path.join(args.output_dir, f"{stem}_{{preset}}.{args.format}")
+
+    start = time.perf_counter()
+    try:
+        frames = render_presets(
+            bitcrusher, args.input, names, template, args.block_size, args.workers,
+            downsample_mode=args.downsample_mode, waveshape_curve=args.waveshape_curve,
+            seed=args.seed
+        )
+        info = sf.info(args.input)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+    except (RuntimeError, OSError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    for name in names:
+        print(f"{args.input} -> {template.format(preset=name)}")
+    print(
+        f"Done: {len(names)} preset(s) in {elapsed:.1f}s "
+        f"({frames * len(names) / info.samplerate / elapsed:.1f}x realtime overall)"
+    )
+    return 0
+
+
+def run_bench(args: argparse.Namespace) -> int:
+    """Run the benchmark suite; with --compare, fail on throughput regressions."""
+    from .benchmark import BenchmarkSuite, compare_reports, load_report, save_report
+
+    baseline = load_report(args.compare) if args.compare else None
+
+    suite = BenchmarkSuite(
+        lengths=args.lengths, channels=args.channels, dtypes=args.dtypes,
+        repeats=args.repeats, downsample_mode=args.downsample_mode,
+        name_filter=args.filter
+    )
+
+    def show(result):
+        if result["name"] == "import":
+            budget = "" if result["within_budget"] else " (over the 200 ms budget)"
+            print(f"{result['id']}: {result['seconds'] * 1e3:.0f} ms{budget}")
+            return
+        print(
+            f"{result['id']}: {result['samples_per_sec'] / 1e6:.1f} Msamples/s, "
+            f"{result['realtime_factor']:.0f}x realtime, "
+            f"peak {result['peak_bytes'] / 1e6:.1f} MB"
+        )
+
+    report = suite.run(progress=show)
+    save_report(report, args.output)
+    print(f"Wrote {len(report['results'])} results to {args.output}")
+
+    if baseline is None:
+        return 0
+
+    regressions = compare_reports(baseline, report, args.threshold)
+    for regression in regressions:
+        print(
+            f"REGRESSED {regression['id']}: {regression['baseline'] / 1e6:.1f} -> "
+            f"{regression['current'] / 1e6:.1f} Msamples/s ({regression['change']:+.0%})"
+        )
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%} against {args.compare}")
+    return 1 if regressions else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="ghostkitty-bitcrusher",
+        description="Audio bitcrusher. Runs the GUI when no command is given."
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    commands.add_parser("gui", help="Launch the GUI (default)")
+
+    batch = commands.add_parser("batch", help="Render files headlessly")
+    batch.add_argument("inputs", nargs="+", help="Input files or glob patterns")
+    batch.add_argument("-o", "--output-dir", required=True, help="Output directory")
+    batch.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="wav",
+                       help="Output format (default: wav)")
+    batch.add_argument("-p", "--preset", help="Preset name from get_presets()")
+    batch.add_argument("--bit-depth", type=int, help="Target bit depth (1-16)")
+    batch.add_argument("--downsample", type=float, help="Downsampling factor (1.0+)")
+    batch.add_argument("--mix", type=float, help="Wet/dry mix (0.0-1.0)")
+    batch.add_argument("--waveshape", type=float, help="Waveshaping amount (0.0-1.0)")
+    batch.add_argument("--waveshape-curve", choices=available_curves(), default="tanh",
+                       help="Waveshaping transfer curve (default: tanh)")
+    batch.add_argument("--noise", type=float, help="Noise amount (0.0-1.0)")
+    batch.add_argument("--seed", type=int, help="Noise seed for reproducible renders")
+    batch.add_argument("--downsample-mode", choices=available_modes(), default="polyphase",
+                       help="Decimation engine (default: polyphase)")
+    batch.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                       help="Worker processes (default: CPU count)")
+    batch.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE,
+                       help="Samples per streamed block")
+
+    presets = commands.add_parser(
+        "presets", help="Render one file with several presets in one pass"
+    )
+    presets.add_argument("input", help="Input file")
+    presets.add_argument("-o", "--output-dir", required=True, help="Output directory")
+    presets.add_argument("-p", "--presets", nargs="+",
+                         help="Preset names from get_presets() (default: all)")
+    presets.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="wav",
+                         help="Output format (default: wav)")
+    presets.add_argument("--waveshape-curve", choices=available_curves(), default="tanh",
+                         help="Waveshaping transfer curve (default: tanh)")
+    presets.add_argument("--seed", type=int, help="Noise seed for reproducible renders")
+    presets.add_argument("--downsample-mode", choices=available_modes(), default="polyphase",
+                         help="Decimation engine (default: polyphase)")
+    presets.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                         help="Worker threads (default: CPU count)")
+    presets.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE,
+                         help="Samples per streamed block")
+
+    bench = commands.add_parser("bench", help="Run the benchmark suite headlessly")
+    bench.add_argument("-o", "--output", default="benchmark.json",
+                       help="JSON report path (default: benchmark.json)")
+    bench.add_argument("--lengths", type=float, nargs="+", default=[1.0, 10.0, 60.0],
+                       help="Signal lengths in seconds (e.g. 1 60 3600)")
+    bench.add_argument("--channels", type=int, nargs="+", default=[1, 2],
+                       help="Channel counts")
+    bench.add_argument("--dtypes", nargs="+", choices=["float32", "float64"],
+                       default=["float32", "float64"], help="Processing dtypes")
+    bench.add_argument("--repeats", type=int, default=3,
+                       help="Timed runs per case; the best is kept")
+    bench.add_argument("--downsample-mode", choices=available_modes(), default="polyphase",
+                       help="Decimation engine for process_audio cases")
+    bench.add_argument("--filter", help="Only run cases whose id contains this text")
+    bench.add_argument("--compare", metavar="BASELINE",
+                       help="Baseline report; exit non-zero on regressions")
+    bench.add_argument("--threshold", type=float, default=0.10,
+                       help="Allowed throughput loss for --compare (default: 0.10)")
+
+    return parser
+
+
+def run_gui() -> int:
+    """Launch the GUI application."""
+    print("Starting GhostKitty Bitcrusher...")
+
+    try:
+        from .gui import GhostKittyGUI
+        app = GhostKittyGUI()
+        app.run()
+
+    except KeyboardInterrupt:
+        print("\nGhostKitty Bitcrusher shutting down.")
+    except Exception as e:
+        print(f"Error: {e}")
+        print("Check your audio setup and ensure all dependencies are installed:")
+        print("  pip install -r requirements.txt")
+        return 1
+
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for the ``ghostkitty-bitcrusher`` command."""
+    args = build_parser().parse_args(argv)
+
+    if args.command == "batch":
+        return run_batch(args)
+    if args.command == "presets":
+        return run_presets(args)
+    if args.command == "bench":
+        return run_bench(args)
+    return run_gui()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+"""
+Decimation engines - downsample/upsample stages for aliasing artifacts.
+"""
+
+import numpy as np
+from fractions import Fraction
+from typing import Dict, List, Optional
+
+
+def _signal():
+    """``scipy.signal``, imported on first use (it takes over a second to import)."""
+    from scipy import signal
+    return signal
+
+
+def hold_sources(
+    n: np.ndarray,
+    factor: float,
+    out: np.ndarray,
+    scratch: np.ndarray,
+    mask: np.ndarray,
+) -> np.ndarray:
+    """
+    Held source sample of each stream position for a hold factor.
+
+    Position ``n`` holds ``ceil(k * f)`` for the last step ``k`` that starts
+    at or before ``n``. The estimate ``floor(n / f)`` can be a step off in
+    floating point near step starts, so it is corrected against the step
+    starts as computed here; every step start then holds itself.
+
+    Args:
+        n: Float64 stream positions.
+        factor: Hold factor (> 1.0).
+        out: Float64 destination with ``n``'s shape.
+        scratch: Float64 work buffer with ``n``'s shape.
+        mask: Boolean work buffer with ``n``'s shape.
+
+    Returns:
+        ``out``, holding the source positions.
+    """
+    np.divide(n, factor, out=out)
+    np.floor(out, out=out)
+
+    # One step back where the estimated step starts after n
+    np.multiply(out, factor, out=scratch)
+    np.ceil(scratch, out=scratch)
+    np.greater(scratch, n, out=mask)
+    np.subtract(out, 1.0, out=out, where=mask)
+
+    # One step on where the next step has already started
+    np.add(out, 1.0, out=scratch)
+    np.multiply(scratch, factor, out=scratch)
+    np.ceil(scratch, out=scratch)
+    np.less_equal(scratch, n, out=mask)
+    np.add(out, 1.0, out=out, where=mask)
+
+    np.multiply(out, factor, out=out)
+    np.ceil(out, out=out)
+    return out
+
+
+class Decimator:
+    """
+    Base class for downsample-then-upsample engines.
+
+    Engines are stateless: block renders pass the absolute stream position
+    of the first sample, and ``context`` tells the caller how many samples
+    of surrounding signal a block needs on each side to match a
+    whole-signal render at the seams.
+    """
+
+    name = ""
+
+    def process(
+        self,
+        audio: np.ndarray,
+        factor: float,
+        position: int = 0,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Downsample then upsample back to the original length.
+
+        Args:
+            audio: Input audio array (mono or stereo), time on axis 0.
+            factor: Downsampling factor (> 1.0).
+            position: Absolute stream position of ``audio[0]``.
+            out: Destination array (may be ``audio``).
+
+        Returns:
+            Processed audio with the same shape as the input.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _store(result: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+        """Copy a freshly computed result into ``out`` if one was given."""
+        if out is None:
+            return result
+        np.copyto(out, result, casting="same_kind")
+        return out
+
+    def context(self, factor: float) -> int:
+        """Samples of context needed on each side of a block."""
+        raise NotImplementedError
+
+
+class HoldDecimator(Decimator):
+    """
+    Sample-and-hold decimation in O(N).
+
+    Output sample ``n`` repeats input sample ``ceil(k * f)`` for the last
+    step ``k`` starting at or before ``n`` (see ``hold_sources``), which
+    supports fractional factors and keeps the hold grid anchored to the
+    absolute stream position across blocks. Held samples map to themselves
+    and every source precedes its destinations, so the hold runs in place
+    piece by piece: a source read by a later piece was only ever
+    overwritten with its own value. Index temporaries are piece-sized.
+    """
+
+    name = "hold"
+
+    def __init__(self, piece_frames: int = 65536):
+        self.piece_frames = piece_frames
+
+    def process(
+        self,
+        audio: np.ndarray,
+        factor: float,
+        position: int = 0,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        if out is None:
+            out = audio.copy()
+        elif out is not audio:
+            np.copyto(out, audio, casting="same_kind")
+
+        count = min(len(out), self.piece_frames)
+        held = np.empty(count)
+        scratch = np.empty(count)
+        mask = np.empty(count, dtype=bool)
+
+        for start in range(0, len(out), self.piece_frames):
+            stop = min(len(out), start + self.piece_frames)
+            count = stop - start
+            n = np.arange(position + start, position + stop, dtype=np.float64)
+            hold_sources(n, factor, held[:count], scratch[:count], mask[:count])
+            piece = held[:count]
+            piece -= position
+            np.maximum(piece, 0, out=piece)
+            out[start:stop] = out[piece.astype(np.intp)]
+
+        return out
+
+    def process_automated(
+        self,
+        audio: np.ndarray,
+        factor,
+        position: int = 0,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Sample-and-hold with a factor that changes per sample.
+
+        A new sample is held wherever the integer part of
+        ``factor.phase`` (the running sum of ``1 / factor``) changes. For
+        a constant factor that is the grid of ``process``.
+
+        Args:
+            audio: Input audio.
+            factor: ``Automation`` curve of downsample factors.
+            position: Absolute stream position of ``audio[0]``.
+            out: Optional destination (may be ``audio``).
+
+        Returns:
+            Audio with the same shape as the input.
+        """
+        if out is None:
+            out = audio.copy()
+        elif out is not audio:
+            np.copyto(out, audio, casting="same_kind")
+
+        held_start = 0
+        previous = None
+        for start in range(0, len(out), self.piece_frames):
+            stop = min(len(out), start + self.piece_frames)
+            grid = np.floor(factor.phase(position + start, position + stop))
+
+            changes = np.empty(len(grid), dtype=bool)
+            changes[0] = previous is None or grid[0] != previous
+            np.not_equal(grid[1:], grid[:-1], out=changes[1:])
+
+            # Each sample holds the latest change at or before it; a run
+            # carried over from the previous piece keeps its start
+            held = np.where(changes, np.arange(start, stop), held_start)
+            np.maximum.accumulate(held, out=held)
+            out[start:stop] = out[held]
+
+            held_start = int(held[-1])
+            previous = grid[-1]
+
+        return out
+
+    def context(self, factor: float) -> int:
+        return int(np.ceil(factor)) + 1
+
+
+class PolyphaseDecimator(Decimator):
+    """
+    Polyphase FIR decimation via ``scipy.signal.resample_poly``.
+
+    The factor is approximated by a ratio ``down / up`` with a small
+    denominator so the anti-aliasing filters stay short. Blocks are
+    aligned to multiples of ``down`` so every block sees the same
+    decimation grid, which also lets long signals be resampled piece by
+    piece with bounded temporaries.
+    """
+
+    name = "polyphase"
+
+    def __init__(self, max_denominator: int = 16, piece_frames: int = 65536):
+        self.max_denominator = max_denominator
+        self.piece_frames = piece_frames
+
+    def _ratio(self, factor: float):
+        ratio = Fraction(factor).limit_denominator(self.max_denominator)
+        return ratio.numerator, ratio.denominator
+
+    def process(
+        self,
+        audio: np.ndarray,
+        factor: float,
+        position: int = 0,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        down, up = self._ratio(factor)
+        if down <= up:
+            return self._store(audio, out)
+
+        context = self.context(factor)
+        if len(audio) <= self.piece_frames + 2 * context:
+            return self._store(self._resample(audio, up, down, position), out)
+
+        if out is None:
+            out = audio.copy()
+        elif out is not audio:
+            np.copyto(out, audio, casting="same_kind")
+
+        # Render piece by piece with context on both sides; pieces match a
+        # whole-signal render exactly, so temporaries stay piece-sized.
+        # `carry` keeps the unprocessed input just before the current piece.
+        carry = out[:0].copy()
+        for start in range(0, len(out), self.piece_frames):
+            stop = min(len(out), start + self.piece_frames)
+            window_stop = min(len(out), stop + context)
+            window = np.concatenate((carry, out[start:window_stop]))
+
+            lead = len(carry)
+            result = self._resample(window, up, down, position + start - lead)
+
+            carry = out[max(0, stop - context):stop].copy()
+            out[start:stop] = result[lead:lead + stop - start]
+
+        return out
+
+    def _resample(self, audio: np.ndarray, up: int, down: int, position: int) -> np.ndarray:
+        """Resample one window, aligned to the shared decimation grid."""
+        # Skip to the next sample on the grid; the skipped samples lie in
+        # the caller's context and pass through unchanged
+        skip = min((-position) % down, len(audio))
+        processed = audio.copy()
+        body = audio[skip:]
+        if len(body) == 0:
+            return processed
+
+        signal = _signal()
+        downsampled = signal.resample_poly(body, up, down, axis=0)
+        processed[skip:] = signal.resample_poly(downsampled, down, up, axis=0)[:len(body)]
+        return processed
+
+    def context(self, factor: float) -> int:
+        down, up = self._ratio(factor)
+        # resample_poly filters reach 10 * max(up, down) taps at the
+        # intermediate rate, i.e. that many / up input samples per pass
+        reach = int(np.ceil(10 * max(up, down) / up))
+        return down + 2 * reach + 2
+
+
+class FFTDecimator(Decimator):
+    """
+    FFT resampling via ``scipy.signal.resample`` (reference quality).
+
+    Cost grows with the prime factors of the signal length, so this mode
+    is slow on long renders.
+    """
+
+    name = "fft"
+
+    def __init__(self, context_samples: int = 512):
+        # Low-rate samples of context kept on each side of a streamed block
+        # so the resampler's edge ringing stays out of the kept region
+        self.context_samples = context_samples
+
+    def process(
+        self,
+        audio: np.ndarray,
+        factor: float,
+        position: int = 0,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        original_len = len(audio)
+        target_len = max(1, int(original_len / factor))
+
+        signal = _signal()
+        downsampled = signal.resample(audio, target_len, axis=0)
+        return self._store(signal.resample(downsampled, original_len, axis=0), out)
+
+    def context(self, factor: float) -> int:
+        return int(np.ceil(factor * self.context_samples))
+
+
+_DECIMATORS: Dict[str, Decimator] = {}
+
+
+def register_decimator(decimator: Decimator):
+    """Register a decimation engine under its ``name``."""
+    _DECIMATORS[decimator.name] = decimator
+
+
+def get_decimator(mode: str) -> Decimator:
+    """Look up a registered decimation engine by name."""
+    try:
+        return _DECIMATORS[mode]
+    except KeyError:
+        raise ValueError(
+            f"Unknown downsample mode '{mode}' (available: {', '.join(_DECIMATORS)})"
+        ) from None
+
+
+def available_modes() -> List[str]:
+    """Names of the registered decimation engines."""
+    return list(_DECIMATORS)
+
+
+register_decimator(HoldDecimator())
+register_decimator(PolyphaseDecimator())
+register_decimator(FFTDecimator())
@@ -2,6 +2,7 @@
 GhostKitty Bitcrusher GUI.
 """
 
+import queue
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog, messagebox
@@ -9,6 +10,12 @@ import numpy as np
 from typing import Optional, Callable, Dict, Any
 from .audio_engine import AudioEngine
 from .bitcrusher import BitCrusher
+from .decimation import available_modes
+from .waveshaping import available_curves
+
+
+# Level meter, playhead and worker-result refresh interval (about 30 fps)
+METER_INTERVAL_MS = 33
 
 
 class GhostKittyGUI:
@@ -31,11 +38,23 @@ class GhostKittyGUI:
         self.current_file = None
         self.is_playing = False
         self.is_live_mode = False
+        self.export_cancelled = False
 
         # Slider references for preset updates
         self.sliders: Dict[str, Any] = {}
         self.slider_labels: Dict[str, ctk.CTkLabel] = {}
         self.level_history = []
+
+        # Waveform view in frames; redraws are coalesced on the Tk thread
+        self.view_start = 0
+        self.view_stop = 0
+        self._waveform_redraw_pending = False
+        self._drag_x = 0
+        self._playhead = None
+        self._playhead_position = 0
+        self._meter_job = None
+        # Calls posted by worker threads, run by the Tk thread's poll loop
+        self._ui_queue: "queue.Queue" = queue.Queue()
         
         # Create the GUI
         self._setup_styles()
@@ -44,7 +63,9 @@ class GhostKittyGUI:
 
         self.audio_engine.set_level_callback(self._update_level_meter)
         self.audio_engine.set_progress_callback(self._update_progress)
-        self.audio_engine.set_waveform_callback(self._update_realtime_waveform)
+        self.audio_engine.set_waveform_callback(self._on_waveform_changed)
+        self.audio_engine.set_render_callback(self._on_render_complete)
+        self.audio_engine.set_export_callback(self._on_export_complete)
     
     def _setup_styles(self):
         """Set up color scheme and fonts."""
@@ -285,6 +306,9 @@ class GhostKittyGUI:
             0.0, 1.0, 0.0,
             self._on_noise_change
         )
+
+        # Downsample Mode Control
+        self._create_mode_group(controls_grid, 2, 1)
     
     def _create_control_group(self, parent, col, row, title, param_key,
                              min_label, max_label,
@@ -350,8 +374,59 @@ class GhostKittyGUI:
         )
         max_lbl.pack(side="right")
     
+    def _create_mode_group(self, parent, col, row):
+        """Create the decimation engine and waveshaper curve selectors."""
+        group_frame = ctk.CTkFrame(
+            parent,
+            fg_color=self.colors["bg_light"],
+            corner_radius=6
+        )
+        group_frame.grid(row=row, column=col, padx=8, pady=8, sticky="ew")
+
+        title_label = ctk.CTkLabel(
+            group_frame,
+            text="DOWNSAMPLE MODE",
+            font=self.fonts["section"],
+            text_color=self.colors["text_primary"]
+        )
+        title_label.pack(pady=(10, 4))
+
+        self.mode_menu = ctk.CTkOptionMenu(
+            group_frame,
+            values=available_modes(),
+            font=self.fonts["normal"],
+            fg_color=self.colors["bg_dark"],
+            button_color=self.colors["primary"],
+            button_hover_color=self.colors["primary_hover"],
+            text_color=self.colors["text_primary"],
+            command=self._on_downsample_mode_change
+        )
+        self.mode_menu.set(self.audio_engine.processing_params["downsample_mode"])
+        self.mode_menu.pack(padx=20, pady=(4, 8))
+
+        curve_label = ctk.CTkLabel(
+            group_frame,
+            text="WAVESHAPE CURVE",
+            font=self.fonts["section"],
+            text_color=self.colors["text_primary"]
+        )
+        curve_label.pack(pady=(4, 4))
+
+        self.curve_menu = ctk.CTkOptionMenu(
+            group_frame,
+            values=available_curves(),
+            font=self.fonts["normal"],
+            fg_color=self.colors["bg_dark"],
+            button_color=self.colors["primary"],
+            button_hover_color=self.colors["primary_hover"],
+            text_color=self.colors["text_primary"],
+            command=self._on_waveshape_curve_change
+        )
+        self.curve_menu.set(self.audio_engine.processing_params["waveshape_curve"])
+        self.curve_menu.pack(padx=20, pady=(4, 14))
+
     def _create_visualization_section(self):
-        """Create level meter section."""
+        """Create waveform and level meter section."""
         viz_frame = ctk.CTkFrame(
             self.content_frame,
             fg_color=self.colors["bg_medium"],
@@ -359,6 +434,21 @@ class GhostKittyGUI:
         )
         viz_frame.pack(fill="x", pady=(0, 8))
 
+        # Dry (filled) and wet (outline) waveforms; wheel zooms, drag pans
+        self.waveform_canvas = tk.Canvas(
+            viz_frame,
+            height=120,
+            bg=self.colors["bg_dark"],
+            highlightthickness=0
+        )
+        self.waveform_canvas.pack(fill="x", padx=20, pady=(12, 0))
+        self.waveform_canvas.bind("<Configure>", lambda event: self._request_waveform_redraw())
+        self.waveform_canvas.bind("<MouseWheel>", self._on_waveform_wheel)
+        self.waveform_canvas.bind("<Button-4>", self._on_waveform_wheel)
+        self.waveform_canvas.bind("<Button-5>", self._on_waveform_wheel)
+        self.waveform_canvas.bind("<ButtonPress-1>", self._on_waveform_press)
+        self.waveform_canvas.bind("<B1-Motion>", self._on_waveform_drag)
+
         level_frame = ctk.CTkFrame(viz_frame, fg_color="transparent")
         level_frame.pack(fill="x", padx=20, pady=12)
 
@@ -498,6 +588,10 @@ class GhostKittyGUI:
         """Handle downsample factor changes."""
         self.audio_engine.update_processing_params(downsample_factor=float(value))
 
+    def _on_downsample_mode_change(self, value):
+        """Handle decimation engine changes."""
+        self.audio_engine.update_processing_params(downsample_mode=value)
+
     def _on_mix_change(self, value):
         """Handle mix changes."""
         self.audio_engine.update_processing_params(mix=float(value))
@@ -506,6 +600,10 @@ class GhostKittyGUI:
         """Handle waveshape changes."""
         self.audio_engine.update_processing_params(waveshape=float(value))
 
+    def _on_waveshape_curve_change(self, value):
+        """Handle waveshaper curve changes."""
+        self.audio_engine.update_processing_params(waveshape_curve=value)
+
     def _on_noise_change(self, value):
         """Handle noise changes."""
         self.audio_engine.update_processing_params(noise=float(value))
@@ -547,6 +645,9 @@ class GhostKittyGUI:
                 self.export_info_label.configure(text="Ready to export")
                 self.audio_status_label.configure(text="Loaded")
 
+                self.view_start, self.view_stop = 0, info["samples"]
+                self._request_waveform_redraw()
+
             self._update_status("Audio loaded")
         else:
             messagebox.showerror("Error", "Failed to load audio file.")
@@ -555,9 +656,13 @@ class GhostKittyGUI:
     def _toggle_playback(self):
         """Toggle audio playback."""
         if not self.is_playing:
-            if self.audio_engine.current_audio is not None:
+            if self.audio_engine.source is not None:
                 success = self.audio_engine.start_playback()
                 if success:
+                    # Playback takes the output device from live input
+                    if self.is_live_mode:
+                        self.is_live_mode = False
+                        self.live_button.configure(text="Live Input")
                     self.is_playing = True
                     self.play_button.configure(text="Pause")
                     self.audio_status_label.configure(text="Playing")
@@ -581,13 +686,15 @@ class GhostKittyGUI:
     def _toggle_live_input(self):
         """Toggle live audio input."""
         if not self.is_live_mode:
+            if self.is_playing:
+                self._stop_playback()
             success = self.audio_engine.start_live_input()
             if success:
                 self.is_live_mode = True
                 self.live_button.configure(text="Stop Live")
                 self._update_status("Live input active")
             else:
-                messagebox.showinfo("Info", "Live input is not available in this version.")
+                messagebox.showerror("Error", "Could not start live input.")
         else:
             self.audio_engine.stop_live_input()
             self.is_live_mode = False
@@ -614,8 +721,14 @@ class GhostKittyGUI:
             self._update_status(f"Preset: {preset_name.upper()}")
     
     def _save_file(self):
-        """Save the processed audio."""
-        if self.audio_engine.current_audio is None:
+        """Export the processed audio, or cancel a running export."""
+        if self.audio_engine.is_exporting:
+            self.export_cancelled = True
+            self.audio_engine.cancel_export()
+            self._update_status("Cancelling export...")
+            return
+
+        if self.audio_engine.source is None:
             messagebox.showwarning("Warning", "Load an audio file first.")
             return
 
@@ -633,27 +746,163 @@ class GhostKittyGUI:
         )
 
         if filename:
-            self._update_status("Saving...")
+            self.export_cancelled = False
+            if self.audio_engine.export_audio(filename):
+                self.save_button.configure(text="Cancel Export")
+                self._update_status("Saving...")
+            else:
+                self._on_file_saved(filename, False)
 
-            processed = self.bitcrusher.process_audio(
-                self.audio_engine.current_audio,
-                **self.audio_engine.processing_params
-            )
+    def _post(self, function, *args, **kwargs):
+        """Run ``function(*args, **kwargs)`` on the Tk thread (safe from any thread)."""
+        self._ui_queue.put((function, args, kwargs))
 
-            success = self.audio_engine.save_audio_file(filename, processed)
-            self._on_file_saved(filename, success)
+    def _on_export_complete(self, filename, success):
+        """Export finished (called off the Tk thread)."""
+        self._post(self._on_file_saved, filename, success)
 
     def _on_file_saved(self, filename, success):
         """Handle file save completion."""
+        self.save_button.configure(text="Save to File")
+        self.export_info_label.configure(text="Ready to export")
+
         if success:
             self._update_status("Saved successfully")
+        elif self.export_cancelled:
+            self._update_status("Export cancelled")
         else:
             messagebox.showerror("Error", "Failed to save audio file.")
             self._update_status("Save failed")
     
-    def _update_realtime_waveform(self, waveform_chunk):
-        """Waveform callback (no-op for now)."""
-        pass
+    def _on_render_complete(self, params):
+        """Background render finished (called off the Tk thread)."""
+        self._post(self._show_render_complete)
+
+    def _show_render_complete(self):
+        """Reflect a finished background render in the UI."""
+        self.export_info_label.configure(text="Ready to export")
+
+    def _on_waveform_changed(self, kind):
+        """Dry or wet peaks changed (called off the Tk thread)."""
+        self._post(self._request_waveform_redraw)
+
+    def _request_waveform_redraw(self):
+        """Redraw the waveform on the next idle moment."""
+        if not self._waveform_redraw_pending:
+            self._waveform_redraw_pending = True
+            self.root.after_idle(self._draw_waveform)
+
+    def _draw_waveform(self):
+        """Draw the dry and wet waveforms for the current view."""
+        self._waveform_redraw_pending = False
+        canvas = self.waveform_canvas
+        canvas.delete("all")
+
+        width = canvas.winfo_width()
+        height = canvas.winfo_height()
+        middle = height / 2.0
+        canvas.create_line(0, middle, width, middle, fill=self.colors["bg_light"])
+        if width < 2 or self.view_stop <= self.view_start:
+            return
+
+        x = np.arange(width, dtype=np.float64)
+        for wet, color in ((False, self.colors["border"]), (True, self.colors["accent"])):
+            columns = self.audio_engine.get_waveform(
+                self.view_start, self.view_stop, width, wet=wet
+            )
+            if columns is None:
+                continue
+
+            # One column per pixel, channels folded together
+            mins, maxs, _ = columns
+            top = middle - maxs.max(axis=1) * middle * 0.95
+            bottom = middle - mins.min(axis=1) * middle * 0.95
+            outline = np.concatenate((
+                np.column_stack((x, top)).ravel(),
+                np.column_stack((x[::-1], bottom[::-1])).ravel(),
+            )).tolist()
+
+            if wet:
+                canvas.create_line(*outline, *outline[:2], fill=color)
+            else:
+                canvas.create_polygon(*outline, fill=color, outline=color)
+
+        self._playhead = canvas.create_line(-1, 0, -1, height, fill=self.colors["warning"])
+        self._move_playhead(self._playhead_position)
+
+    def _move_playhead(self, position):
+        """Place the playhead line at a source frame (O(1), no redraw)."""
+        self._playhead_position = position
+        span = self.view_stop - self.view_start
+        if self._playhead is None or span <= 0:
+            return
+
+        canvas = self.waveform_canvas
+        x = (position - self.view_start) * canvas.winfo_width() / span
+        canvas.coords(self._playhead, x, 0, x, canvas.winfo_height())
+
+    def _poll_playback(self):
+        """
+        Tk-thread poll loop: run posted worker results, then drive the
+        level meter and playhead from the playback clock.
+        """
+        self._meter_job = self.root.after(METER_INTERVAL_MS, self._poll_playback)
+
+        while True:
+            try:
+                function, args, kwargs = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            function(*args, **kwargs)
+
+        if not self.is_playing:
+            return
+        if not self.audio_engine.playback.is_playing:
+            # Playback reached the end of the file
+            self._stop_playback()
+            return
+
+        # Both reads are O(1): the clock and one envelope bin
+        position = self.audio_engine.playback_position()
+        rms, _ = self.audio_engine.level_at(position)
+        self._update_level_meter(rms)
+        self._move_playhead(position)
+
+    def _on_waveform_wheel(self, event):
+        """Zoom the waveform view around the pointer."""
+        info = self.audio_engine.get_audio_info()
+        if info is None:
+            return
+
+        zoom_in = event.num == 4 or getattr(event, "delta", 0) > 0
+        span = self.view_stop - self.view_start
+        width = max(1, self.waveform_canvas.winfo_width())
+        anchor = self.view_start + span * event.x / width
+
+        new_span = int(span * (0.8 if zoom_in else 1.25))
+        new_span = max(min(64, info["samples"]), min(info["samples"], new_span))
+        start = int(anchor - new_span * event.x / width)
+        self.view_start = max(0, min(info["samples"] - new_span, start))
+        self.view_stop = self.view_start + new_span
+        self._request_waveform_redraw()
+
+    def _on_waveform_press(self, event):
+        self._drag_x = event.x
+
+    def _on_waveform_drag(self, event):
+        """Pan the waveform view."""
+        info = self.audio_engine.get_audio_info()
+        if info is None:
+            return
+
+        span = self.view_stop - self.view_start
+        width = max(1, self.waveform_canvas.winfo_width())
+        shift = int((self._drag_x - event.x) * span / width)
+        self._drag_x = event.x
+
+        self.view_start = max(0, min(info["samples"] - span, self.view_start + shift))
+        self.view_stop = self.view_start + span
+        self._request_waveform_redraw()
 
     def _update_level_meter(self, level):
         """Update the audio level meter."""
@@ -666,8 +915,8 @@ class GhostKittyGUI:
         self.level_meter.set(display_level)
 
     def _update_progress(self, progress):
-        """Update playback progress (no-op for now)."""
-        pass
+        """Export progress (called off the Tk thread)."""
+        self._post(self.export_info_label.configure, text=f"Exporting {progress:.0%}")
 
     def _update_status(self, message):
         """Update the status bar message."""
@@ -675,10 +924,14 @@ class GhostKittyGUI:
 
     def _on_closing(self):
         """Handle application closing."""
+        if self._meter_job is not None:
+            self.root.after_cancel(self._meter_job)
+            self._meter_job = None
         self.audio_engine.cleanup_audio()
         self.root.destroy()
 
     def run(self):
         """Start the GUI main loop."""
         self._update_status("Ready")
+        self._poll_playback()
         self.root.mainloop()
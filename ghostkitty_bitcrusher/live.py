@@ -0,0 +1,250 @@
+"""
+Live processing - duplex input-to-output pipeline through the realtime processor.
+"""
+
+import time
+import numpy as np
+from typing import Any, Dict, Optional
+from .backends import AudioBackend, AudioStream
+from .realtime import RealtimeCrusher
+from .ringbuffer import RingBuffer
+
+
+class LivePipeline:
+    """
+    Process an input device into an output device with low latency.
+
+    The input callback only copies each captured buffer into a
+    single-producer/single-consumer ``RingBuffer``. The output callback
+    pulls up to ``block_size`` frames at a time from it through a
+    ``RealtimeCrusher`` into a second ring, which keeps the rest of the
+    last block when blocks and device buffers differ in size, and copies
+    one device buffer out. Neither callback takes a lock or allocates.
+
+    Parameter changes are resolved on the caller's thread (including the
+    waveshaper lookup and its table) into one immutable snapshot, which the
+    output callback switches to between blocks, so a block never mixes old
+    and new settings and the callback never touches the shaper cache lock.
+
+    Latency added by the pipeline is measured on every output callback:
+    the frames queued in both rings beyond the period just captured, plus
+    the time since that capture. Round-trip latency adds one input and
+    one output device buffer. Xruns are counted as input overruns (input
+    ring full), output underruns (no input ready), and resyncs (queued
+    input beyond ``max_queue``, e.g. from drifting device clocks, dropped
+    so latency returns to one period).
+
+    Args:
+        backend: Device layer for both streams.
+        sample_rate: Sample rate of both streams in Hz.
+        channels: Channel count of both streams.
+        chunksize: Frames per device buffer.
+        block_size: Frames per processing block.
+        prefill: Frames of silence queued ahead of the first input, as
+            margin for devices whose callbacks jitter (adds latency).
+        max_queue: Most input frames left waiting after an output callback
+            before a resync; defaults to two periods plus one block.
+        params: Initial processing parameters.
+        seed: Noise seed.
+        noise_table_frames: Frames of precomputed noise (0 generates it).
+    """
+
+    def __init__(
+        self,
+        backend: AudioBackend,
+        sample_rate: int = 48000,
+        channels: int = 2,
+        chunksize: int = 128,
+        block_size: int = 128,
+        prefill: int = 0,
+        max_queue: Optional[int] = None,
+        params: Optional[Dict[str, Any]] = None,
+        seed: Optional[int] = None,
+        noise_table_frames: int = 1 << 17,
+    ):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.chunksize = chunksize
+        self.block_size = block_size
+        self.prefill = prefill
+        self.max_queue = 2 * chunksize + block_size if max_queue is None else max_queue
+
+        self.crusher = RealtimeCrusher(
+            max_frames=block_size,
+            channels=channels,
+            dtype=np.float32,
+            seed=seed,
+            noise_table_frames=noise_table_frames,
+            sample_rate=sample_rate,
+        )
+        # (serial, parameters, prepared settings); replaced as a whole so
+        # the audio thread sees either the old or the new snapshot
+        self._params = (0, {}, None)
+        self._applied = 0
+        if params:
+            self.set_params(**params)
+
+        self._input_ring = RingBuffer(self.max_queue + 2 * chunksize, channels)
+        self._output_ring = RingBuffer(chunksize + block_size + prefill, channels)
+        self._block = np.zeros((block_size, channels), dtype=np.float32)
+        self._silence = np.zeros((prefill, channels), dtype=np.float32)
+
+        self._input: Optional[AudioStream] = None
+        self._output: Optional[AudioStream] = None
+        self._reset()
+
+    def _reset(self):
+        """Empty the rings and zero the counters (streams stopped)."""
+        self._input_ring.clear()
+        self._output_ring.clear()
+        self.crusher.reset()
+        # perf_counter time of the last input callback; 0 before the first
+        self._captured_at = 0.0
+        self._primed = False
+
+        # Input thread
+        self.overruns = 0
+        self.overrun_frames = 0
+        # Output thread
+        self.callbacks = 0
+        self.underruns = 0
+        self.resyncs = 0
+        self.resync_frames = 0
+        self._latency_total = 0.0
+        self._latency_count = 0
+        self.max_latency_frames = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the streams are open."""
+        return self._output is not None
+
+    def set_params(self, **params):
+        """
+        Update processing parameters (any thread); applied before the next block.
+
+        Args:
+            **params: ``RealtimeCrusher.set_params`` keywords.
+        """
+        serial, current, _ = self._params
+        merged = dict(current)
+        merged.update(params)
+        self._params = (serial + 1, merged, self.crusher.prepare(**merged))
+
+    def start(self) -> bool:
+        """
+        Open and start both streams.
+
+        Returns:
+            False if the pipeline was already running.
+        """
+        if self._output is not None:
+            return False
+
+        self._reset()
+        output = self.backend.open_output(
+            self._on_output, self.sample_rate, self.channels, self.chunksize
+        )
+        try:
+            capture = self.backend.open_input(
+                self._on_input, self.sample_rate, self.channels, self.chunksize
+            )
+        except Exception:
+            output.close()
+            raise
+
+        self._output, self._input = output, capture
+        # Output first, so no input piles up before it is consumed
+        output.start()
+        capture.start()
+        return True
+
+    def stop(self):
+        """Stop and close both streams."""
+        for stream in (self._input, self._output):
+            if stream is not None:
+                stream.stop()
+                stream.close()
+        self._input = self._output = None
+
+    def _on_input(self, buffer: np.ndarray):
+        """Input callback: queue the captured frames."""
+        written = self._input_ring.write(buffer)
+        if written < len(buffer):
+            self.overruns += 1
+            self.overrun_frames += len(buffer) - written
+        self._captured_at = time.perf_counter()
+
+    def _apply_params(self):
+        """Apply the latest parameter snapshot if it changed."""
+        serial, _, settings = self._params
+        if serial != self._applied:
+            self.crusher.apply(settings)
+            self._applied = serial
+
+    def _on_output(self, out: np.ndarray):
+        """Output callback: process queued input into one device buffer."""
+        captured_at = self._captured_at
+        if not captured_at:
+            out[:] = 0.0
+            return
+
+        frames = len(out)
+        ring_in, ring_out = self._input_ring, self._output_ring
+        if not self._primed:
+            ring_out.write(self._silence)
+            self._primed = True
+
+        excess = ring_in.available - self.max_queue
+        if excess > 0:
+            # Back to one period of queued input
+            self.resyncs += 1
+            self.resync_frames += ring_in.skip(ring_in.available - self.chunksize)
+
+        queued = ring_in.available + ring_out.available - self.chunksize
+        latency = max(0.0, queued + (time.perf_counter() - captured_at) * self.sample_rate)
+        self.callbacks += 1
+        self._latency_total += latency
+        self._latency_count += 1
+        if latency > self.max_latency_frames:
+            self.max_latency_frames = latency
+
+        while ring_out.available < frames and ring_in.available:
+            self._apply_params()
+            block = self._block[:min(self.block_size, ring_in.available)]
+            ring_in.read(block)
+            ring_out.write(self.crusher.process(block))
+
+        count = ring_out.read(out)
+        if count < frames:
+            out[count:] = 0.0
+            self.underruns += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Latency and xrun counters since the last ``start``.
+
+        Returns:
+            Dict with ``callbacks``; ``overruns``, ``underruns``,
+            ``resyncs``, their sum ``xruns`` and ``dropped_frames``;
+            ``latency_ms`` (mean added latency), ``max_latency_ms`` and
+            ``round_trip_ms`` (mean added latency plus both device
+            buffers).
+        """
+        to_ms = 1000.0 / self.sample_rate
+        mean = self._latency_total / self._latency_count if self._latency_count else 0.0
+        return {
+            "sample_rate": self.sample_rate,
+            "chunksize": self.chunksize,
+            "block_size": self.block_size,
+            "callbacks": self.callbacks,
+            "overruns": self.overruns,
+            "underruns": self.underruns,
+            "resyncs": self.resyncs,
+            "xruns": self.overruns + self.underruns + self.resyncs,
+            "dropped_frames": self.overrun_frames + self.resync_frames,
+            "latency_ms": mean * to_ms,
+            "max_latency_ms": self.max_latency_frames * to_ms,
+            "round_trip_ms": (mean + 2 * self.chunksize) * to_ms,
+        }
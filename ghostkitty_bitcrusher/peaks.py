@@ -0,0 +1,324 @@
+"""
+Waveform peaks - multi-resolution min/max/RMS summaries for drawing.
+"""
+
+import hashlib
+import os
+import threading
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from .sources import AudioSource
+
+
+# Frames summarized by one bin at the finest level
+BASE_FRAMES = 256
+
+# Level meter hop in frames (about 10 ms at 44.1-48 kHz)
+ENVELOPE_FRAMES = 512
+
+# Bumped when the file layout changes so stale cache files are ignored
+FORMAT_VERSION = 1
+
+
+class PeakPyramid:
+    """
+    Per-channel min/max/RMS of a signal at power-of-two resolutions.
+
+    Level 0 summarizes ``base_frames``-frame bins and every level above
+    merges pairs of bins from the one below, up to a single bin. The whole
+    pyramid takes about ``6 / base_frames`` of a float32 signal's memory.
+    A query for any window picks the coarsest level still finer than one
+    pixel, so it costs O(pixels) whatever the zoom.
+
+    ``update`` rewrites the bins covering a region and the bins above them
+    in O(region) time, so a render can publish blocks as they finish.
+    Updates and queries may come from different threads.
+    """
+
+    def __init__(self, frames: int, channels: int, base_frames: int = BASE_FRAMES):
+        self.frames = frames
+        self.channels = channels
+        self.base_frames = base_frames
+        self._lock = threading.Lock()
+
+        # Per level: (min, max, sum of squares), each (bins, channels)
+        self.levels: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        bins = max(1, -(-frames // base_frames))
+        while True:
+            self.levels.append(tuple(
+                np.zeros((bins, channels), dtype=np.float32) for _ in range(3)
+            ))
+            if bins == 1:
+                break
+            bins = -(-bins // 2)
+
+    @classmethod
+    def from_blocks(
+        cls,
+        blocks: Iterable[np.ndarray],
+        frames: int,
+        channels: int,
+        base_frames: int = BASE_FRAMES,
+    ) -> "PeakPyramid":
+        """
+        Build a pyramid from a stream of blocks.
+
+        Args:
+            blocks: Consecutive (frames, channels) blocks; every block but
+                the last must be a multiple of ``base_frames`` long.
+            frames: Total frames in the stream.
+            channels: Channel count.
+            base_frames: Frames per finest bin.
+
+        Returns:
+            The pyramid.
+        """
+        pyramid = cls(frames, channels, base_frames)
+        position = 0
+        for block in blocks:
+            pyramid.update(position, block)
+            position += len(block)
+        return pyramid
+
+    def bin_frames(self, level: int) -> int:
+        """Frames summarized by one bin of ``level``."""
+        return self.base_frames << level
+
+    def level_at(self, position: int, hop: int = ENVELOPE_FRAMES) -> Tuple[float, float]:
+        """
+        RMS and peak of the bin holding ``position``, for level meters.
+
+        Reads one bin of the level whose bins span ``hop`` frames, so the
+        pyramid doubles as a precomputed level envelope. The cost is O(1)
+        and takes no lock (a bin read during an update may mix old and new
+        values).
+
+        Args:
+            position: Frame to look up.
+            hop: Envelope resolution in frames (rounded down to a level).
+
+        Returns:
+            ``(rms, peak)`` over all channels; zeros outside the signal.
+        """
+        level = min(len(self.levels) - 1, max(0, (hop // self.base_frames).bit_length() - 1))
+        size = self.bin_frames(level)
+        index = position // size
+        mins, maxs, sumsq = self.levels[level]
+        if not 0 <= index < len(mins):
+            return 0.0, 0.0
+
+        frames = min(self.frames, (index + 1) * size) - index * size
+        peak = max(-float(mins[index].min()), float(maxs[index].max()))
+        rms = float(np.sqrt(max(0.0, float(sumsq[index].mean())) / frames))
+        return rms, peak
+
+    def update(self, position: int, audio: np.ndarray):
+        """
+        Summarize ``audio`` as the signal from frame ``position`` on.
+
+        Args:
+            position: Start frame; a multiple of ``base_frames``.
+            audio: (frames, channels) or mono (frames,) samples. The region
+                must end on a bin boundary or at the end of the signal.
+        """
+        size = self.base_frames
+        end = position + len(audio)
+        if position % size or (len(audio) % size and end != self.frames) or end > self.frames:
+            raise ValueError(
+                f"Peak update [{position}, {end}) is not aligned to {size}-frame bins"
+            )
+        if not len(audio):
+            return
+
+        samples = audio.reshape(len(audio), -1)
+        full = len(samples) // size
+        bins = -(-len(samples) // size)
+        mins = np.empty((bins, samples.shape[1]), dtype=np.float32)
+        maxs = np.empty_like(mins)
+        sumsq = np.empty_like(mins)
+
+        if full:
+            # Channel-major copy: reducing contiguous runs is far faster
+            # than reducing a strided middle axis
+            grouped = np.ascontiguousarray(
+                samples[:full * size].reshape(full, size, -1).transpose(0, 2, 1)
+            )
+            grouped.min(axis=2, out=mins[:full])
+            grouped.max(axis=2, out=maxs[:full])
+            sumsq[:full] = np.einsum("ikj,ikj->ik", grouped, grouped)
+        if bins > full:
+            tail = samples[full * size:]
+            mins[full] = tail.min(axis=0)
+            maxs[full] = tail.max(axis=0)
+            sumsq[full] = np.einsum("jk,jk->k", tail, tail)
+
+        first = position // size
+        with self._lock:
+            level_min, level_max, level_sumsq = self.levels[0]
+            level_min[first:first + bins] = mins
+            level_max[first:first + bins] = maxs
+            level_sumsq[first:first + bins] = sumsq
+
+            lo, hi = first, first + bins
+            for level in range(1, len(self.levels)):
+                lo, hi = lo // 2, -(-hi // 2)
+                self._merge(self.levels[level - 1], self.levels[level], lo, hi)
+
+    @staticmethod
+    def _merge(child, parent, lo: int, hi: int):
+        """Recompute parent bins ``[lo, hi)`` from their child pairs."""
+        stop = min(2 * hi, len(child[0]))
+        pairs = (stop - 2 * lo) // 2
+        ends = slice(lo, lo + pairs)
+        for reduce, source, target in zip((np.minimum, np.maximum, np.add), child, parent):
+            reduce(source[2 * lo:2 * lo + 2 * pairs:2], source[2 * lo + 1:2 * lo + 2 * pairs:2],
+                   out=target[ends])
+            if 2 * lo + 2 * pairs < stop:
+                # Odd child count: the last parent covers one child
+                target[lo + pairs] = source[stop - 1]
+
+    def query(
+        self,
+        start: int,
+        stop: int,
+        pixels: int,
+        audio: Optional[Union[np.ndarray, AudioSource]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Summarize frames ``[start, stop)`` into ``pixels`` columns.
+
+        Args:
+            start: First frame of the window.
+            stop: End frame of the window.
+            pixels: Number of columns.
+            audio: The summarized signal. When given, windows zoomed in
+                past ``base_frames`` frames per pixel read the samples
+                directly (at most ``base_frames * pixels`` frames); without
+                it, each column shows its level-0 bin.
+
+        Returns:
+            ``(mins, maxs, rms)``, each a (pixels, channels) float32 array.
+        """
+        start, stop = max(0, start), min(self.frames, stop)
+        if pixels <= 0 or stop <= start:
+            empty = np.zeros((max(0, pixels), self.channels), dtype=np.float32)
+            return empty, empty.copy(), empty.copy()
+
+        edges = start + (np.arange(pixels + 1) * ((stop - start) / pixels)).astype(np.int64)
+        edges[-1] = stop
+        per_pixel = (stop - start) / pixels
+
+        if per_pixel < self.base_frames and audio is not None:
+            if isinstance(audio, AudioSource):
+                samples = audio.read(start, stop)
+            else:
+                samples = audio[start:stop]
+            samples = samples.reshape(len(samples), -1)
+            return self._reduce(
+                (samples, samples, samples * samples), edges[:-1] - start, edges[-1] - start
+            )
+
+        level = int(np.log2(per_pixel / self.base_frames)) if per_pixel >= self.base_frames else 0
+        level = min(level, len(self.levels) - 1)
+        size = self.bin_frames(level)
+
+        with self._lock:
+            return self._reduce(
+                self.levels[level], edges[:-1] // size, -(-int(edges[-1]) // size), size
+            )
+
+    def _reduce(self, arrays, first: np.ndarray, stop: int, size: int = 1):
+        """Merge (min, max, sumsq) items from ``first[i]`` up to the next column's."""
+        count = len(arrays[0])
+        first = np.minimum(first, count - 1)
+        # Each column ends where the next begins; reduceat takes the single
+        # item at first[i] when the next column starts at or before it
+        ends = np.maximum(np.append(first[1:], min(stop, count)), first + 1)
+
+        lo, hi = int(first[0]), int(ends[-1])
+        mins = np.minimum.reduceat(arrays[0][lo:hi], first - lo, axis=0)
+        maxs = np.maximum.reduceat(arrays[1][lo:hi], first - lo, axis=0)
+        sumsq = np.add.reduceat(arrays[2][lo:hi], first - lo, axis=0)
+
+        covered = np.minimum(ends * size, self.frames) - first * size
+        rms = np.sqrt(np.maximum(sumsq, 0.0) / covered[:, None])
+        return (
+            mins.astype(np.float32, copy=False),
+            maxs.astype(np.float32, copy=False),
+            rms.astype(np.float32, copy=False),
+        )
+
+    def save(self, path: str):
+        """Write the pyramid to ``path`` (an ``.npz`` file)."""
+        arrays: Dict[str, Any] = {
+            "header": np.array(
+                [FORMAT_VERSION, self.frames, self.channels, self.base_frames], dtype=np.int64
+            )
+        }
+        with self._lock:
+            for level, (mins, maxs, sumsq) in enumerate(self.levels):
+                arrays[f"min{level}"] = mins
+                arrays[f"max{level}"] = maxs
+                arrays[f"sumsq{level}"] = sumsq
+
+        # Write then rename so readers never see a partial file
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as handle:
+            np.savez(handle, **arrays)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "PeakPyramid":
+        """Read a pyramid written by ``save``."""
+        with np.load(path, allow_pickle=False) as data:
+            version, frames, channels, base_frames = (int(v) for v in data["header"])
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported peak file version {version}")
+
+            pyramid = cls(frames, channels, base_frames)
+            for level in range(len(pyramid.levels)):
+                pyramid.levels[level] = (
+                    data[f"min{level}"], data[f"max{level}"], data[f"sumsq{level}"]
+                )
+        return pyramid
+
+
+def cache_path(cache_dir: str, filename: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Peak file location for a source file and, for renders, its parameters.
+
+    The name hashes the file's path, size and modification time, so an
+    edited file gets fresh peaks.
+
+    Args:
+        cache_dir: Directory for peak files.
+        filename: Source audio file.
+        params: Render parameters, or None for the dry signal.
+
+    Returns:
+        Path of the ``.npz`` peak file.
+    """
+    stat = os.stat(filename)
+    identity = repr((
+        os.path.abspath(filename), stat.st_size, stat.st_mtime_ns,
+        sorted(params.items()) if params is not None else None,
+    ))
+    digest = hashlib.sha1(identity.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{digest[:24]}.peaks.npz")
+
+
+def prune_cache(cache_dir: str, max_bytes: int = 256 * 1024 * 1024):
+    """Delete the least recently written peak files beyond ``max_bytes``."""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".peaks.npz"):
+            path = os.path.join(cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
@@ -0,0 +1,121 @@
+"""
+Streaming playback - device callbacks pull blocks through the realtime processor.
+"""
+
+import time
+import numpy as np
+from typing import Optional
+from .realtime import RealtimeCrusher
+from .ringbuffer import RingBuffer
+from .sources import AudioSource
+
+
+class StreamingPlayback:
+    """
+    Pull-model playback of an audio source.
+
+    Each device callback renders just enough ``block_size`` blocks through
+    the ``RealtimeCrusher`` to fill its buffer; the ring buffer holds the
+    remainder of the last block. Starting playback costs the same for any
+    file length, and parameter changes reach the output within one device
+    buffer. The callback reads through the source's ``reader``, so it
+    never waits for a decode started by a background render.
+    """
+
+    def __init__(self, crusher: RealtimeCrusher, block_size: int = 256):
+        self.crusher = crusher
+        self.block_size = block_size
+        self.source: Optional[AudioSource] = None
+        # What the audio thread reads; closed here when it is not ``source``
+        self._reader: Optional[AudioSource] = None
+        self.position = 0
+        self.frames_played = 0
+        self.is_playing = False
+        self._ring: Optional[RingBuffer] = None
+        # (frames played before the last buffer, its frames, fill time);
+        # replaced as a whole so readers on other threads see one snapshot
+        self._clock = (0, 0, 0.0)
+
+    def load(self, source: AudioSource):
+        """Set the source and rewind (with the device stopped)."""
+        if source is not self.source:
+            self.close()
+            self._reader = source.reader()
+            self.source = source
+        self.rewind()
+
+    def close(self):
+        """Drop the source and release playback's reader of it (device stopped)."""
+        if self._reader is not None and self._reader is not self.source:
+            self._reader.close()
+        self.source = self._reader = None
+        self.is_playing = False
+
+    def rewind(self):
+        """Restart from the beginning of the source."""
+        self.position = 0
+        self.frames_played = 0
+        self._clock = (0, 0, 0.0)
+        self.crusher.reset()
+        if self._ring is not None:
+            self._ring.clear()
+
+    def fill(self, out: np.ndarray) -> int:
+        """
+        Fill one device buffer (called from the audio thread).
+
+        Args:
+            out: Device buffer of shape (frames, channels).
+
+        Returns:
+            Frames of audio written; the rest of ``out`` is silence.
+        """
+        reader = self._reader
+        if not self.is_playing or reader is None:
+            out[:] = 0.0
+            return 0
+
+        ring = self._ring
+        if ring is None or ring.capacity < len(out) + self.block_size:
+            ring = self._ring = RingBuffer(
+                len(out) + self.block_size, out.shape[1], self.crusher.dtype
+            )
+
+        # Render on demand until the ring covers this buffer
+        frames = reader.frames
+        while ring.available < len(out) and self.position < frames:
+            block = reader.read(self.position, min(frames, self.position + self.block_size))
+            ring.write(self.crusher.process(block))
+            self.position += len(block)
+
+        count = ring.read(out)
+        out[count:] = 0.0
+        self._clock = (self.frames_played, count, time.perf_counter())
+        self.frames_played += count
+
+        if count < len(out):
+            self.is_playing = False
+
+        return count
+
+    def clock(self, sample_rate: int, latency: int = 0) -> int:
+        """
+        Source frame being heard now, for meters and playheads.
+
+        Interpolates from the last device buffer by wall time, so it moves
+        smoothly between callbacks and never runs ahead of the audio.
+
+        Args:
+            sample_rate: Output sample rate.
+            latency: Frames between a buffer being filled and being heard
+                (typically one device buffer).
+
+        Returns:
+            Stream position in frames.
+        """
+        before, count, filled_at = self._clock
+        if not filled_at:
+            return before
+        elapsed = int((time.perf_counter() - filled_at) * sample_rate)
+        return max(0, before + min(count, elapsed) - latency)
+
@@ -0,0 +1,253 @@
+"""
+Realtime processor - stateful, allocation-free chunk processing.
+"""
+
+import numpy as np
+from typing import Any, Dict, Optional
+from .decimation import hold_sources
+from .noise import NoiseGenerator, NoiseTable
+from .stats import ProcessingStats
+from .waveshaping import TableShaper, get_shaper
+
+
+# Parameters accepted by set_params and prepare
+PARAMS = ("bit_depth", "downsample_factor", "mix", "waveshape", "waveshape_curve", "noise")
+
+
+class RealtimeCrusher:
+    """
+    Chunk processor for audio callbacks.
+
+    All work buffers are allocated once for ``max_frames`` frames, every
+    stage runs vectorized into those buffers, and the sample-and-hold phase
+    is carried across calls so chunk boundaries are seamless. Downsampling
+    uses the same hold grid as the ``hold`` decimation engine, and noise
+    is read by stream position from a ``NoiseGenerator``. With the same
+    seed, a stream of chunks therefore matches a whole-file ``hold`` render.
+    With ``noise_table_frames`` set, noise is read from a precomputed
+    ``NoiseTable`` instead, so it costs a copy rather than RNG work.
+
+    With ``stats`` attached, every chunk's processing time is checked
+    against its duration at ``sample_rate`` and overruns are counted as
+    deadline misses.
+    """
+
+    def __init__(
+        self,
+        max_frames: int = 1024,
+        channels: int = 2,
+        dtype=np.float32,
+        seed: Optional[int] = None,
+        noise_table_frames: int = 0,
+        sample_rate: int = 44100,
+    ):
+        self.max_frames = max_frames
+        self.sample_rate = sample_rate
+        self.stats: Optional[ProcessingStats] = None
+        self.channels = channels
+        self.dtype = dtype
+
+        self.bit_depth = 8
+        self.downsample_factor = 1.0
+        self.mix = 1.0
+        self.waveshape = 0.0
+        self.waveshape_curve = "tanh"
+        self.noise = 0.0
+
+        # Sample buffers; row 0 of _held carries the last held value
+        self._held = np.zeros((max_frames + 1, channels), dtype=dtype)
+        self._wet = np.zeros((max_frames, channels), dtype=dtype)
+        self._noise = np.zeros((max_frames, channels), dtype=dtype)
+        self._out = np.zeros((max_frames, channels), dtype=dtype)
+
+        # Table-driven waveshaper buffers; tables are built in set_params
+        self._shaper = get_shaper("tanh")
+        self._shape_table = None
+        self._shape_position = np.zeros((max_frames, channels), dtype=dtype)
+        self._shape_scratch = np.zeros((max_frames, channels), dtype=dtype)
+        self._shape_index = np.zeros((max_frames, channels), dtype=np.intp)
+
+        # Hold-grid buffers
+        self._ramp = np.arange(max_frames, dtype=np.float64)
+        self._grid = np.zeros(max_frames, dtype=np.float64)
+        self._now = np.zeros(max_frames, dtype=np.float64)
+        self._step = np.zeros(max_frames, dtype=np.float64)
+        self._mask = np.zeros(max_frames, dtype=bool)
+        self._index = np.zeros(max_frames, dtype=np.intp)
+
+        # Noise source; generator blocks are cached one at a time
+        if noise_table_frames:
+            self._noise_source = NoiseTable(noise_table_frames, channels, seed)
+        else:
+            self._noise_source = NoiseGenerator(seed)
+            self._noise_block = np.zeros(
+                (self._noise_source.block_frames, channels), dtype=np.float32
+            )
+            self._noise_index = -1
+
+        self._position = 0
+
+    def set_params(self, **params):
+        """Update processing parameters; takes effect on the next chunk."""
+        self.apply(self.prepare(**params))
+
+    def prepare(self, **params) -> Dict[str, Any]:
+        """
+        Resolve parameters into complete settings for ``apply``.
+
+        Looks up the waveshaper and builds its lookup table, which takes the
+        shaper's cache lock, so call this off the audio thread.
+
+        Args:
+            **params: Parameters to change; the rest keep their current values.
+
+        Returns:
+            Settings for ``apply``.
+        """
+        settings = {key: getattr(self, key) for key in PARAMS}
+        settings.update((key, value) for key, value in params.items() if key in PARAMS)
+
+        shaper = get_shaper(settings["waveshape_curve"])
+        table = None
+        if isinstance(shaper, TableShaper) and settings["waveshape"] > 0.0:
+            table = shaper.table(settings["waveshape"], self.dtype)
+        settings["shaper"] = shaper
+        settings["shape_table"] = table
+        return settings
+
+    def apply(self, settings: Dict[str, Any]):
+        """Switch to settings from ``prepare``; takes no lock (audio thread)."""
+        self.bit_depth = settings["bit_depth"]
+        self.downsample_factor = settings["downsample_factor"]
+        self.mix = settings["mix"]
+        self.waveshape = settings["waveshape"]
+        self.waveshape_curve = settings["waveshape_curve"]
+        self.noise = settings["noise"]
+        self._shaper = settings["shaper"]
+        self._shape_table = settings["shape_table"]
+
+    def reset(self):
+        """Restart the hold phase as if the stream began again."""
+        self._position = 0
+        self._held[0] = 0.0
+
+    def process(self, chunk: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Process one chunk.
+
+        Args:
+            chunk: Input frames, shape (frames, channels) or (frames,) when
+                the processor has one channel. May be the same array as ``out``.
+            out: Destination with the chunk's shape. Defaults to an internal
+                buffer that is overwritten by the next call.
+
+        Returns:
+            The processed chunk (``out`` or a view of the internal buffer).
+        """
+        frames = len(chunk)
+        if frames > self.max_frames:
+            raise ValueError(f"Chunk of {frames} frames exceeds max_frames={self.max_frames}")
+
+        stats = self.stats
+        if stats is not None:
+            mark = stats.start()
+
+        held = self._held[1:frames + 1]
+        wet = self._wet[:frames]
+        if out is None:
+            out = self._out[:frames]
+        if chunk.ndim == 1:
+            held, wet = held[:, 0], wet[:, 0]
+            if out.ndim == 2:
+                out = out[:, 0]
+
+        # Quantize straight into the hold buffer
+        if self.bit_depth < 16:
+            max_val = 2 ** int(self.bit_depth) - 1
+            np.add(chunk, 1.0, out=held)
+            np.multiply(held, 0.5 * max_val, out=held)
+            np.rint(held, out=held)
+            np.multiply(held, 2.0 / max_val, out=held)
+            np.subtract(held, 1.0, out=held)
+        else:
+            np.copyto(held, chunk, casting="same_kind")
+
+        if self.downsample_factor > 1.0:
+            self._hold(frames, chunk.ndim)
+        else:
+            np.copyto(wet, held)
+
+        if frames:
+            self._held[0] = self._wet[frames - 1]
+        start = self._position
+        self._position += frames
+
+        if self.waveshape > 0.0:
+            table = self._shape_table
+            if table is not None:
+                position = self._shape_position[:frames]
+                index = self._shape_index[:frames]
+                scratch = self._shape_scratch[:frames]
+                if chunk.ndim == 1:
+                    position, index, scratch = position[:, 0], index[:, 0], scratch[:, 0]
+                table.evaluate(wet, wet, position, index, scratch)
+            else:
+                self._shaper.process(wet, self.waveshape, out=wet)
+
+        if self.noise > 0.0:
+            noise = self._noise[:frames]
+            self._fill_noise(noise, start)
+            np.multiply(noise, self.noise * 0.1, out=noise)
+            np.add(wet, noise if chunk.ndim == 2 else noise[:, 0], out=wet)
+
+        if self.mix < 1.0:
+            np.multiply(chunk, 1.0 - self.mix, out=out, casting="same_kind")
+            np.multiply(wet, self.mix, out=wet)
+            np.add(out, wet, out=out)
+        else:
+            np.copyto(out, wet, casting="same_kind")
+
+        np.clip(out, -1.0, 1.0, out=out)
+
+        if stats is not None:
+            elapsed = stats.stop("realtime", mark, out.size)
+            stats.record_deadline(elapsed, frames / self.sample_rate)
+        return out
+
+    def _hold(self, frames: int, ndim: int):
+        """Sample-and-hold from ``_held`` into ``_wet`` on the absolute grid."""
+        now = self._now[:frames]
+        grid = self._grid[:frames]
+        index = self._index[:frames]
+
+        np.add(self._ramp[:frames], self._position, out=now)
+        hold_sources(
+            now, self.downsample_factor, grid, self._step[:frames], self._mask[:frames]
+        )
+
+        # Sources before this chunk map to row 0, the carried held value
+        np.subtract(grid, self._position - 1, out=grid)
+        np.maximum(grid, 0.0, out=grid)
+        np.copyto(index, grid, casting="unsafe")
+
+        wet = self._wet[:frames]
+        np.take(self._held[:frames + 1], index, axis=0, out=wet, mode="clip")
+
+    def _fill_noise(self, noise: np.ndarray, start: int):
+        """Write the noise for frames starting at stream position ``start``."""
+        source = self._noise_source
+        if isinstance(source, NoiseTable):
+            source.fill(noise, start)
+            return
+
+        size = source.block_frames
+        done = 0
+        while done < len(noise):
+            index, offset = divmod(start + done, size)
+            if index != self._noise_index:
+                source.block(index, self.channels, out=self._noise_block)
+                self._noise_index = index
+
+            count = min(len(noise) - done, size - offset)
+            noise[done:done + count] = self._noise_block[offset:offset + count]
+            done += count
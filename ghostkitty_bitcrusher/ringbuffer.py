@@ -0,0 +1,87 @@
+"""
+Ring buffer - single-producer/single-consumer audio FIFO.
+"""
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity frame FIFO for one producer and one consumer.
+
+    The producer only advances the write counter and the consumer only
+    advances the read counter, so the two sides never need a lock. Counters
+    grow monotonically; slots are addressed modulo the capacity.
+    """
+
+    def __init__(self, capacity: int, channels: int = 2, dtype=np.float32):
+        self.capacity = capacity
+        self.channels = channels
+        self._data = np.zeros((capacity, channels), dtype=dtype)
+        self._write = 0
+        self._read = 0
+
+    @property
+    def available(self) -> int:
+        """Frames ready to be read."""
+        return self._write - self._read
+
+    @property
+    def free(self) -> int:
+        """Frames that can be written without overrunning the reader."""
+        return self.capacity - (self._write - self._read)
+
+    def write(self, frames: np.ndarray) -> int:
+        """
+        Append frames, writing as many as fit.
+
+        Args:
+            frames: Array of shape (n, channels).
+
+        Returns:
+            Number of frames written.
+        """
+        count = min(len(frames), self.free)
+        start = self._write % self.capacity
+        first = min(count, self.capacity - start)
+
+        self._data[start:start + first] = frames[:first]
+        self._data[:count - first] = frames[first:count]
+
+        self._write += count
+        return count
+
+    def read(self, out: np.ndarray) -> int:
+        """
+        Pop frames into ``out``, reading as many as are available.
+
+        Args:
+            out: Destination of shape (n, channels).
+
+        Returns:
+            Number of frames read; the rest of ``out`` is left untouched.
+        """
+        count = min(len(out), self.available)
+        start = self._read % self.capacity
+        first = min(count, self.capacity - start)
+
+        out[:first] = self._data[start:start + first]
+        out[first:count] = self._data[:count - first]
+
+        self._read += count
+        return count
+
+    def skip(self, count: int) -> int:
+        """
+        Drop up to ``count`` of the oldest frames (consumer side).
+
+        Returns:
+            Number of frames dropped.
+        """
+        count = min(count, self.available)
+        self._read += count
+        return count
+
+    def clear(self):
+        """Drop all buffered frames (consumer side)."""
+        self._read = self._write
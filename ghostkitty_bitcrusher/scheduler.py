@@ -0,0 +1,149 @@
+"""
+Render scheduler - coalescing background renders for interactive tweaking.
+"""
+
+import threading
+import numpy as np
+from typing import Callable, Dict, Hashable, Optional, Tuple, Union
+from .bitcrusher import BitCrusher
+from .sources import AudioSource
+from .streaming import DEFAULT_BLOCK_SIZE, render_blocks
+
+
+class RenderScheduler:
+    """
+    Renders the most recently submitted parameter set on a worker thread.
+
+    Submitting while a render is running supersedes it: the running job is
+    dropped at its next block boundary and only the latest request is
+    rendered. ``on_complete`` is called from the worker thread with the
+    result and the parameters it was rendered with; GUI callers must hand
+    it over to their own thread. ``on_block``, if set, is called from the
+    worker with ``(audio, position, processed)`` as each block finishes, so
+    views of the render can update before it completes. ``on_release``,
+    if set, is called with a job's audio once the scheduler is done with
+    it: after the job completes or is superseded, or when it is dropped
+    from the queue.
+    """
+
+    def __init__(self, bitcrusher: BitCrusher, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.bitcrusher = bitcrusher
+        self.block_size = block_size
+        self.on_complete: Optional[Callable[[np.ndarray, Dict], None]] = None
+        self.on_block: Optional[Callable[[Union[np.ndarray, AudioSource], int, np.ndarray], None]] = None
+        self.on_release: Optional[Callable[[Union[np.ndarray, AudioSource]], None]] = None
+
+        self._condition = threading.Condition()
+        self._pending: Optional[Tuple[Union[np.ndarray, AudioSource], Dict, Optional[Hashable]]] = None
+        self._generation = 0
+        self._running = True
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(
+        self,
+        audio: Union[np.ndarray, AudioSource],
+        params: Dict,
+        cache_key: Optional[Hashable] = None,
+    ) -> int:
+        """
+        Queue a render, superseding any queued or running one.
+
+        Args:
+            audio: Source audio (an array, or a source read lazily by block).
+            params: Processing parameters.
+            cache_key: Identity of ``audio`` for the bitcrusher's stage cache.
+
+        Returns:
+            Generation number of the submitted job.
+        """
+        with self._condition:
+            self._generation += 1
+            dropped, self._pending = self._pending, (audio, dict(params), cache_key)
+
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="render-scheduler", daemon=True
+                )
+                self._thread.start()
+
+            self._condition.notify()
+            generation = self._generation
+
+        self._release(dropped)
+        return generation
+
+    def cancel(self):
+        """Drop the queued job and stop the running one."""
+        with self._condition:
+            self._generation += 1
+            dropped, self._pending = self._pending, None
+        self._release(dropped)
+
+    def shutdown(self):
+        """Cancel all work and stop the worker thread."""
+        with self._condition:
+            self._running = False
+            self._generation += 1
+            dropped, self._pending = self._pending, None
+            self._condition.notify()
+        self._release(dropped)
+
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._pending is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+
+                audio, params, cache_key = self._pending
+                self._pending = None
+                generation = self._generation
+
+            try:
+                result = self._render(audio, params, cache_key, generation)
+            finally:
+                self._release((audio, params, cache_key))
+
+            if result is not None and self.on_complete is not None:
+                self.on_complete(result, params)
+
+    def _release(self, job: Optional[Tuple]):
+        """Report that a job's audio is no longer used."""
+        if job is not None and self.on_release is not None:
+            self.on_release(job[0])
+
+    def _render(
+        self,
+        audio: Union[np.ndarray, AudioSource],
+        params: Dict,
+        cache_key: Optional[Hashable],
+        generation: int,
+    ) -> Optional[np.ndarray]:
+        """Render block by block; returns None if superseded mid-flight."""
+        if isinstance(audio, AudioSource):
+            blocks = audio.blocks(self.block_size)
+        else:
+            blocks = (
+                audio[start:start + self.block_size]
+                for start in range(0, len(audio), self.block_size)
+            )
+        result = np.empty(audio.shape, dtype=self.bitcrusher.dtype)
+
+        position = 0
+        rendered = render_blocks(
+            self.bitcrusher, blocks, self.block_size, cache_key=cache_key, **params
+        )
+        for processed in rendered:
+            if generation != self._generation:
+                return None
+            result[position:position + len(processed)] = processed
+            if self.on_block is not None:
+                self.on_block(audio, position, processed)
+            position += len(processed)
+
+        return result if generation == self._generation else None
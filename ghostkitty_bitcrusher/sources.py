@@ -0,0 +1,265 @@
+"""
+Audio sources - lazy, block-readable access to source audio.
+"""
+
+import os
+import struct
+import threading
+import numpy as np
+import soundfile as sf
+from typing import Iterator, Optional
+
+
+# WAVE format codes
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# (format code, bits per sample) -> sample dtype for memory mapping
+_MAPPABLE_WAV = {
+    (WAVE_FORMAT_PCM, 16): "<i2",
+    (WAVE_FORMAT_PCM, 32): "<i4",
+    (WAVE_FORMAT_IEEE_FLOAT, 32): "<f4",
+    (WAVE_FORMAT_IEEE_FLOAT, 64): "<f8",
+}
+
+
+class AudioSource:
+    """
+    Random-access audio read block by block as float32 frames.
+
+    ``read`` may return a view into the underlying storage (a memory map
+    or array), so callers must treat the result as read-only. Sources
+    with fewer channels than requested are broadcast, not copied.
+    """
+
+    frames = 0
+    channels = 2
+    samplerate = 44100
+
+    def __len__(self) -> int:
+        return self.frames
+
+    @property
+    def shape(self):
+        return (self.frames, self.channels)
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        """Frames ``[start, stop)`` as a (frames, channels) array."""
+        raise NotImplementedError
+
+    def blocks(self, block_size: int) -> Iterator[np.ndarray]:
+        """Iterate over the whole source in blocks."""
+        for start in range(0, self.frames, block_size):
+            yield self.read(start, min(self.frames, start + block_size))
+
+    def to_array(self) -> np.ndarray:
+        """Materialize the whole source in memory."""
+        return np.ascontiguousarray(self.read(0, self.frames), dtype=np.float32)
+
+    def reader(self) -> "AudioSource":
+        """
+        A source over the same audio for a thread that must not wait on others.
+
+        Sources whose reads never block return themselves; the caller
+        closes any other result when done with it.
+        """
+        return self
+
+    def close(self):
+        """Release the underlying storage."""
+        pass
+
+
+def _broadcast(block: np.ndarray, channels: int) -> np.ndarray:
+    """Broadcast a mono block to ``channels`` as a view."""
+    if block.ndim == 1:
+        block = block[:, np.newaxis]
+    if block.shape[1] == 1 and channels > 1:
+        return np.broadcast_to(block, (len(block), channels))
+    return block
+
+
+class ArraySource(AudioSource):
+    """Source over an in-memory array; reads are views."""
+
+    def __init__(self, audio: np.ndarray, samplerate: int = 44100, channels: Optional[int] = None):
+        self.audio = audio
+        self.samplerate = samplerate
+        self.frames = len(audio)
+        native = 1 if audio.ndim == 1 else audio.shape[1]
+        self.channels = channels or native
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        return _broadcast(self.audio[start:stop], self.channels)
+
+
+class MemmapSource(AudioSource):
+    """
+    Source over uncompressed sample data mapped with ``np.memmap``.
+
+    Opening costs a header parse and a mapping, not a decode; pages are
+    read from disk only when blocks are. float32 data is returned as
+    views of the mapping, other sample types are converted per block.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        offset: int,
+        frames: int,
+        file_channels: int,
+        samplerate: int,
+        dtype: str,
+        channels: Optional[int] = None,
+    ):
+        self.filename = filename
+        self.samplerate = samplerate
+        self.frames = frames
+        self.channels = channels or file_channels
+        self._data = np.memmap(
+            filename, dtype=dtype, mode="r", offset=offset, shape=(frames, file_channels)
+        )
+
+        kind = np.dtype(dtype)
+        # Same normalization libsndfile uses when reading PCM as float
+        self._scale = 1.0 / -np.iinfo(kind).min if kind.kind == "i" else None
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        block = self._data[start:stop]
+        if self._scale is not None:
+            block = block.astype(np.float32)
+            block *= self._scale
+        elif block.dtype != np.float32:
+            block = block.astype(np.float32)
+        return _broadcast(block, self.channels)
+
+    def close(self):
+        # Dropping the reference unmaps the file once views are gone
+        self._data = None
+
+
+class SoundFileSource(AudioSource):
+    """Source decoded block by block with ``soundfile`` (any format)."""
+
+    def __init__(self, filename: str, channels: Optional[int] = None):
+        self._file = sf.SoundFile(filename)
+        # Playback and background renders share the file position
+        self._lock = threading.Lock()
+        self.filename = filename
+        self.samplerate = self._file.samplerate
+        self.frames = self._file.frames
+        self.channels = channels or self._file.channels
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        with self._lock:
+            self._file.seek(start)
+            block = self._file.read(stop - start, dtype="float32", always_2d=True)
+        return _broadcast(block, self.channels)
+
+    def reader(self) -> "SoundFileSource":
+        # Reads share one decoder and its lock, so give the caller its own
+        return SoundFileSource(self.filename, self.channels)
+
+    def close(self):
+        self._file.close()
+
+
+def _wav_layout(filename: str) -> Optional[tuple]:
+    """
+    Locate the sample data of a plain RIFF/WAVE file.
+
+    Returns:
+        ``(offset, frames, channels, samplerate, dtype)`` when the data can
+        be memory-mapped, otherwise None.
+    """
+    file_size = os.path.getsize(filename)
+
+    with open(filename, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return None
+
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk)
+
+            if chunk_id == b"fmt ":
+                body = f.read(chunk_size)
+                if len(body) < 16:
+                    return None
+                code, channels, samplerate, _, block_align, bits = struct.unpack("<HHIIHH", body[:16])
+                if code == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    # First two bytes of the SubFormat GUID hold the real code
+                    code = struct.unpack("<H", body[24:26])[0]
+                fmt = (code, channels, samplerate, block_align, bits)
+                if chunk_size % 2:
+                    f.seek(1, os.SEEK_CUR)
+
+            elif chunk_id == b"data":
+                if fmt is None:
+                    return None
+                code, channels, samplerate, block_align, bits = fmt
+                dtype = _MAPPABLE_WAV.get((code, bits))
+                if dtype is None or block_align != channels * bits // 8:
+                    return None
+
+                offset = f.tell()
+                # Streamed writers may leave the size unset or too large
+                size = min(chunk_size, file_size - offset)
+                return offset, size // block_align, channels, samplerate, dtype
+
+            else:
+                f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+
+def open_source(filename: str, channels: Optional[int] = None) -> AudioSource:
+    """
+    Open an audio file as a lazily read source.
+
+    Uncompressed 16/32-bit PCM and float WAV files are memory-mapped;
+    everything else is decoded block by block with ``soundfile``.
+
+    Args:
+        filename: Audio file path.
+        channels: Channel count to present (mono files are broadcast).
+
+    Returns:
+        An ``AudioSource``.
+    """
+    layout = _wav_layout(filename)
+    if layout is not None:
+        offset, frames, file_channels, samplerate, dtype = layout
+        return MemmapSource(filename, offset, frames, file_channels, samplerate, dtype, channels)
+
+    return SoundFileSource(filename, channels)
+
+
+def open_raw(
+    filename: str,
+    samplerate: int,
+    file_channels: int,
+    dtype: str = "<i2",
+    offset: int = 0,
+    channels: Optional[int] = None,
+) -> MemmapSource:
+    """
+    Memory-map headerless sample data.
+
+    Args:
+        filename: Raw sample file path.
+        samplerate: Sample rate of the data.
+        file_channels: Interleaved channels in the file.
+        dtype: Sample dtype ("<i2", "<i4", "<f4", "<f8").
+        offset: Byte offset of the first sample.
+        channels: Channel count to present (mono data is broadcast).
+
+    Returns:
+        A ``MemmapSource``.
+    """
+    frame_bytes = np.dtype(dtype).itemsize * file_channels
+    frames = (os.path.getsize(filename) - offset) // frame_bytes
+    return MemmapSource(filename, offset, frames, file_channels, samplerate, dtype, channels)
@@ -0,0 +1,175 @@
+"""
+Processing statistics - per-stage timings and realtime deadline tracking.
+"""
+
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, Tuple
+
+
+class StageStats:
+    """Accumulated counters for one stage."""
+
+    __slots__ = ("calls", "seconds", "samples", "allocated_bytes", "max_seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.samples = 0
+        self.allocated_bytes = 0
+        self.max_seconds = 0.0
+
+
+class ProcessingStats:
+    """
+    Low-overhead counters for processing stages and realtime deadlines.
+
+    Processors hold an optional ``stats`` attribute. While it is None,
+    instrumentation costs one attribute check per stage call. Once a stats
+    object is attached, each stage costs two ``perf_counter`` calls and a
+    short locked update. One object can be shared by several processors.
+
+    With ``trace_memory`` set, ``tracemalloc`` runs, and each stage records
+    the peak traced allocation above the level at its start. This covers
+    NumPy buffers, but tracing slows allocation-heavy code and needs
+    Python 3.9+. Concurrent renders attribute memory approximately.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory and hasattr(tracemalloc, "reset_peak")
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        self._lock = threading.Lock()
+        self._stages: Dict[str, StageStats] = {}
+
+        # Realtime deadline counters
+        self.chunks = 0
+        self.deadline_misses = 0
+        self.max_load = 0.0
+        self.last_load = 0.0
+
+    def start(self) -> Tuple[float, int]:
+        """Mark the start of a stage; pass the result to ``stop``."""
+        if self.trace_memory:
+            traced, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            return time.perf_counter(), traced
+        return time.perf_counter(), 0
+
+    def stop(self, stage: str, mark: Tuple[float, int], samples: int) -> float:
+        """
+        Record a finished stage.
+
+        Args:
+            stage: Stage name.
+            mark: Value returned by ``start``.
+            samples: Samples the stage processed.
+
+        Returns:
+            The stage's wall time in seconds.
+        """
+        elapsed = time.perf_counter() - mark[0]
+        allocated = 0
+        if self.trace_memory:
+            allocated = max(0, tracemalloc.get_traced_memory()[1] - mark[1])
+
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = StageStats()
+            entry.calls += 1
+            entry.seconds += elapsed
+            entry.samples += samples
+            entry.allocated_bytes += allocated
+            if elapsed > entry.max_seconds:
+                entry.max_seconds = elapsed
+        return elapsed
+
+    def record_deadline(self, seconds: float, budget: float):
+        """
+        Record one realtime chunk against its playback duration.
+
+        Args:
+            seconds: Time spent processing the chunk.
+            budget: Duration of the chunk's audio.
+        """
+        load = seconds / budget if budget > 0 else 0.0
+        with self._lock:
+            self.chunks += 1
+            self.last_load = load
+            if load > self.max_load:
+                self.max_load = load
+            if seconds > budget:
+                self.deadline_misses += 1
+
+    def reset(self):
+        """Zero all counters."""
+        with self._lock:
+            self._stages.clear()
+            self.chunks = 0
+            self.deadline_misses = 0
+            self.max_load = 0.0
+            self.last_load = 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of all counters."""
+        with self._lock:
+            stages = {
+                name: {
+                    "calls": entry.calls,
+                    "seconds": entry.seconds,
+                    "samples": entry.samples,
+                    "allocated_bytes": entry.allocated_bytes,
+                    "max_seconds": entry.max_seconds,
+                    "samples_per_sec": entry.samples / entry.seconds if entry.seconds else 0.0,
+                }
+                for name, entry in self._stages.items()
+            }
+            return {
+                "stages": stages,
+                "realtime": {
+                    "chunks": self.chunks,
+                    "deadline_misses": self.deadline_misses,
+                    "max_load": self.max_load,
+                    "last_load": self.last_load,
+                },
+            }
+
+    def to_prometheus(self, prefix: str = "ghostkitty") -> str:
+        """Counters in the Prometheus text exposition format."""
+        snapshot = self.get_stats()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+
+        stages = sorted(snapshot["stages"].items())
+        for name, field, kind, help_text in (
+            ("stage_calls_total", "calls", "counter", "Stage invocations."),
+            ("stage_seconds_total", "seconds", "counter", "Wall time spent in each stage."),
+            ("stage_samples_total", "samples", "counter", "Samples processed by each stage."),
+            ("stage_allocated_bytes_total", "allocated_bytes", "counter",
+             "Peak bytes allocated per stage call, summed (with trace_memory)."),
+            ("stage_max_seconds", "max_seconds", "gauge", "Slowest single stage call."),
+        ):
+            metric(name, kind, help_text, [
+                (f'{{stage="{stage}"}}', values[field]) for stage, values in stages
+            ])
+
+        realtime = snapshot["realtime"]
+        metric("realtime_chunks_total", "counter", "Realtime chunks processed.",
+               [("", realtime["chunks"])])
+        metric("realtime_deadline_misses_total", "counter",
+               "Realtime chunks that took longer than their audio duration.",
+               [("", realtime["deadline_misses"])])
+        metric("realtime_max_load_ratio", "gauge",
+               "Worst processing time over chunk duration.", [("", realtime["max_load"])])
+        metric("realtime_last_load_ratio", "gauge",
+               "Latest processing time over chunk duration.", [("", realtime["last_load"])])
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,417 @@
+"""
+Streaming renderer - block-based processing with bounded memory.
+"""
+
+import os
+import threading
+import numpy as np
+import soundfile as sf
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+from .automation import is_automated
+from .bitcrusher import BitCrusher
+from .chain import ChainStage, EffectChain, SharedPlan
+from .noise import NOISE_BLOCK_FRAMES, NoiseGenerator
+from .sources import AudioSource
+
+
+DEFAULT_BLOCK_SIZE = 65536
+
+# Source subtypes that can be crushed without leaving the integer domain.
+# PCM_32 is left out: the float path reads it as float32, so its output
+# does not lie on any grid the integer path could reproduce exactly.
+INTEGER_SUBTYPES = {"PCM_16": "int16", "PCM_24": "int32"}
+
+
+def integer_dtype(subtype: str, params: dict) -> Optional[str]:
+    """
+    Integer read dtype for the PCM fast path, if it applies.
+
+    The fast path applies when the source is 16- or 24-bit PCM, no
+    explicit effect chain or automation is given, the bit depth is a whole
+    number, and every stage other than bit reduction is a no-op. Its
+    output then matches the float path sample for sample.
+
+    Args:
+        subtype: Source file subtype (e.g. "PCM_16").
+        params: Processing parameters.
+
+    Returns:
+        "int16"/"int32", or None when the float pipeline is needed.
+    """
+    if (
+        params.get("chain") is not None
+        or any(is_automated(value) for value in params.values())
+        or params.get("downsample_factor", 1.0) > 1.0
+        or params.get("waveshape", 0.0) > 0.0
+        or params.get("noise", 0.0) > 0.0
+        or params.get("mix", 1.0) < 1.0
+        or not float(params.get("bit_depth", 8)).is_integer()
+    ):
+        return None
+    return INTEGER_SUBTYPES.get(subtype)
+
+
+def render_blocks(
+    bitcrusher: BitCrusher,
+    blocks: Iterable[np.ndarray],
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    **params
+) -> Iterator[np.ndarray]:
+    """
+    Process a stream of audio blocks, yielding processed blocks.
+
+    Input blocks may have any length. Each output block covers
+    ``block_size`` samples (the last one may be shorter) and is rendered
+    with enough context on both sides for the downsampler, so the
+    concatenated output matches a whole-file render exactly with the hold
+    and polyphase engines (the FFT engine differs at seams and file edges,
+    see ``BitCrusher.process_audio_parallel``). Memory use is bounded
+    by ``block_size`` plus twice the context, not by the stream length.
+
+    Args:
+        bitcrusher: Processor to render with.
+        blocks: Iterable of (frames, channels) or (frames,) arrays.
+        block_size: Output block length in samples.
+        **params: Processing parameters for ``BitCrusher.process_block``.
+
+    Yields:
+        Processed blocks in stream order.
+    """
+    context = bitcrusher.stream_context(
+        params.get("downsample_factor", 1.0),
+        params.get("downsample_mode", "fft"),
+        params.get("chain")
+    )
+    for window, before, after, position in _windows(blocks, block_size, context):
+        yield bitcrusher.process_block(window, before, after, position, **params)
+
+
+def _windows(
+    blocks: Iterable[np.ndarray],
+    block_size: int,
+    context: int,
+) -> Iterator[Tuple[np.ndarray, int, int, int]]:
+    """
+    Cut a stream of blocks into overlapping render windows.
+
+    Yields:
+        ``(window, before, after, position)``: ``block_size`` frames (fewer
+        at the end) preceded by ``before`` frames of history and followed
+        by ``after`` frames of lookahead, and the stream position of
+        ``window[0]``.
+    """
+    # buffer holds up to `context` already-rendered samples (history)
+    # followed by samples still waiting to be rendered; position is the
+    # stream index of buffer[0]
+    buffer: Optional[np.ndarray] = None
+    history = 0
+    position = 0
+
+    for block in blocks:
+        buffer = block if buffer is None else np.concatenate((buffer, block))
+
+        while len(buffer) - history >= block_size + context:
+            window_end = history + block_size + context
+            yield buffer[:window_end], history, context, position
+
+            # Keep only the context the next block needs behind it
+            keep_from = max(0, history + block_size - context)
+            buffer = buffer[keep_from:]
+            position += keep_from
+            history = min(context, history + block_size)
+
+    if buffer is None:
+        return
+
+    # Flush the tail with whatever lookahead is left (none at end of stream)
+    while len(buffer) > history:
+        window_end = min(len(buffer), history + block_size + context)
+        after = window_end - min(len(buffer), history + block_size)
+        yield buffer[:window_end], history, after, position
+
+        keep_from = max(0, history + block_size - context)
+        buffer = buffer[keep_from:]
+        position += keep_from
+        history = min(context, history + block_size, len(buffer))
+
+
+def write_blocks(
+    blocks: Iterable[np.ndarray],
+    output_filename: str,
+    samplerate: int,
+    channels: int,
+    frames: int = 0,
+    subtype: Optional[str] = None,
+    format: Optional[str] = None,
+    progress: Optional[Callable[[float], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> bool:
+    """
+    Write a stream of blocks to an audio file.
+
+    Only one block is held at a time. If ``cancel`` is set between blocks
+    the partial file is deleted.
+
+    Args:
+        blocks: Iterable of (frames, channels) arrays.
+        output_filename: Destination audio file.
+        samplerate: Output sample rate.
+        channels: Output channel count.
+        frames: Expected total frames, for progress reporting.
+        subtype: Output subtype (defaults to the format's default).
+        format: Output format (defaults to the output extension).
+        progress: Called with the completed fraction (0.0-1.0) after each block.
+        cancel: Event that stops the export when set.
+
+    Returns:
+        True if every block was written, False if cancelled.
+    """
+    written = 0
+
+    with sf.SoundFile(
+        output_filename, "w",
+        samplerate=samplerate, channels=channels,
+        subtype=subtype, format=format
+    ) as destination:
+        for block in blocks:
+            if cancel is not None and cancel.is_set():
+                break
+
+            destination.write(block)
+            written += len(block)
+
+            if progress is not None and frames:
+                progress(min(1.0, written / frames))
+
+    if cancel is not None and cancel.is_set():
+        os.remove(output_filename)
+        return False
+
+    return True
+
+
+def render_file(
+    bitcrusher: BitCrusher,
+    input_filename: str,
+    output_filename: str,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    subtype: Optional[str] = None,
+    format: Optional[str] = None,
+    **params
+) -> int:
+    """
+    Render a file to another file block by block.
+
+    Blocks are read with ``soundfile`` and written straight to the output,
+    so peak memory is bounded by the block size regardless of file length.
+    Pure bit-crush renders of integer PCM stay in the integer domain
+    (see ``integer_dtype``).
+
+    Args:
+        bitcrusher: Processor to render with.
+        input_filename: Source audio file.
+        output_filename: Destination audio file.
+        block_size: Samples per block.
+        subtype: Output subtype (defaults to the source subtype when the
+            output format supports it, else the format's default).
+        format: Output format (defaults to the output extension).
+        **params: Processing parameters for ``BitCrusher.process_block``.
+
+    Returns:
+        Number of frames written.
+    """
+    written = 0
+
+    with sf.SoundFile(input_filename) as source:
+        if subtype is None:
+            out_format = format or os.path.splitext(output_filename)[1][1:].upper()
+            if sf.check_format(out_format, source.subtype):
+                subtype = source.subtype
+
+        with sf.SoundFile(
+            output_filename, "w",
+            samplerate=source.samplerate, channels=source.channels,
+            subtype=subtype, format=format
+        ) as destination:
+            int_dtype = integer_dtype(source.subtype, params)
+            if int_dtype is not None:
+                bit_depth = int(params.get("bit_depth", 8))
+                for block in source.blocks(blocksize=block_size, dtype=int_dtype, always_2d=True):
+                    destination.write(bitcrusher.reduce_bit_depth_int(block, bit_depth, out=block))
+                    written += len(block)
+                return written
+
+            blocks = source.blocks(blocksize=block_size, dtype="float32", always_2d=True)
+
+            for processed in render_blocks(bitcrusher, blocks, block_size, **params):
+                destination.write(processed)
+                written += len(processed)
+
+    return written
+
+
+def render_presets(
+    bitcrusher: BitCrusher,
+    source: Union[str, AudioSource],
+    presets: Union[Iterable[str], Dict[str, Dict[str, Any]]],
+    outputs: Union[str, Dict[str, str]],
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    workers: Optional[int] = None,
+    subtype: Optional[str] = None,
+    format: Optional[str] = None,
+    **params
+) -> int:
+    """
+    Render one source with several presets in a single pass.
+
+    The source is decoded once, block by block. All presets are compiled
+    into one ``SharedPlan``, so stages the presets have in common (the
+    same bit depth, the same downsampler after it, ...) run once per
+    block for all of them. Passes at the same depth of the plan, and the
+    writes of each block's outputs, run concurrently on a thread pool.
+    Noise stages with the same seed draw from one generator that keeps the
+    current block's noise, so it is generated once for all presets.
+    Blocks carry the largest context any preset needs, so every output
+    matches ``render_file`` with that preset up to the resampling edge
+    differences of the FFT engine.
+
+    Args:
+        bitcrusher: Processor to render with.
+        source: Audio file name or ``AudioSource``.
+        presets: Preset names from ``get_presets()``, or a mapping of
+            output names to parameter dicts (which may hold a ``chain``).
+        outputs: Output file per preset name, or a file name template
+            with a ``{preset}`` field.
+        block_size: Samples per block.
+        workers: Worker threads (defaults to the CPU count).
+        subtype: Output subtype (defaults to the source subtype when the
+            output format supports it, else the format's default).
+        format: Output format (defaults to each output's extension).
+        **params: Processing parameters shared by all presets (e.g.
+            ``downsample_mode``, ``seed``); presets override them.
+
+    Returns:
+        Number of frames written to each output.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if not isinstance(presets, dict):
+        table = bitcrusher.get_presets()
+        unknown = [name for name in presets if name not in table]
+        if unknown:
+            raise ValueError(
+                f"Unknown preset(s) {', '.join(unknown)} (available: {', '.join(table)})"
+            )
+        presets = {name: table[name] for name in presets}
+
+    chains: Dict[str, EffectChain] = {}
+    for name, preset in presets.items():
+        merged = dict(params)
+        merged.update(preset)
+        chain = merged.pop("chain", None)
+        chains[name] = chain if chain is not None else EffectChain.from_params(**merged)
+    context = SharedPlan(chains).context()
+    window_frames = block_size + 2 * context
+    plan = SharedPlan(_share_noise(
+        bitcrusher, chains, -(-window_frames // NOISE_BLOCK_FRAMES) + 1
+    ))
+
+    if isinstance(outputs, str):
+        outputs = {name: outputs.format(preset=name) for name in presets}
+
+    written = 0
+    with ExitStack() as stack:
+        if isinstance(source, str):
+            decoder = stack.enter_context(sf.SoundFile(source))
+            samplerate, channels, source_subtype = (
+                decoder.samplerate, decoder.channels, decoder.subtype
+            )
+            blocks = decoder.blocks(blocksize=block_size, dtype="float32", always_2d=True)
+        else:
+            samplerate, channels, source_subtype = source.samplerate, source.channels, None
+            blocks = source.blocks(block_size)
+
+        files = {}
+        for name in presets:
+            filename = outputs[name]
+            out_subtype = subtype
+            if out_subtype is None and source_subtype is not None:
+                out_format = format or os.path.splitext(filename)[1][1:].upper()
+                if sf.check_format(out_format, source_subtype):
+                    out_subtype = source_subtype
+            files[name] = stack.enter_context(sf.SoundFile(
+                filename, "w", samplerate=samplerate, channels=channels,
+                subtype=out_subtype, format=format
+            ))
+
+        pool = stack.enter_context(ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1))
+        stats = bitcrusher.stats
+        dtype = bitcrusher.dtype
+        # One output buffer per pass, reused for every block
+        buffers = [
+            np.empty((window_frames, channels), dtype=dtype) for _ in plan.nodes
+        ]
+        results: list = [None] * len(plan.nodes)
+
+        for window, before, after, position in _windows(blocks, block_size, context):
+            window = window if window.dtype == dtype else window.astype(dtype)
+            end = len(window) - after
+            block = window[before:end]
+
+            def run(index: int):
+                step, parent = plan.nodes[index]
+                audio = window if parent < 0 else results[parent]
+                if plan.windowed[index]:
+                    step_position, dry = position, window
+                else:
+                    # Context is only needed up to the last downsampler
+                    step_position, dry = position + before, block
+                    if len(audio) != len(block):
+                        audio = audio[before:end]
+                if stats is not None:
+                    mark = stats.start()
+                results[index] = step.run(
+                    bitcrusher, audio, buffers[index][:len(audio)], step_position, dry
+                )
+                if stats is not None:
+                    stats.stop(step.name, mark, audio.size)
+
+            def write(name: str):
+                index = plan.outputs[name]
+                rendered = block if index < 0 else results[index]
+                if len(rendered) != len(block):
+                    rendered = rendered[before:end]
+                files[name].write(rendered)
+
+            with bitcrusher.processing_lock:
+                for level in plan.levels:
+                    # list() re-raises the first failure
+                    list(pool.map(run, level))
+            list(pool.map(write, files))
+            written += len(block)
+
+    return written
+
+
+def _share_noise(
+    bitcrusher: BitCrusher,
+    chains: Dict[str, EffectChain],
+    cache_blocks: int,
+) -> Dict[str, EffectChain]:
+    """Copies of ``chains`` whose noise stages draw from one caching generator per seed."""
+    generators: Dict[Any, NoiseGenerator] = {}
+    shared = {}
+    for name, chain in chains.items():
+        stages = []
+        for stage in chain.stages:
+            if stage.kind == "noise" and not isinstance(stage.params["seed"], NoiseGenerator):
+                seed = stage.params["seed"]
+                if seed is None:
+                    seed = bitcrusher.noise.seed
+                if seed not in generators:
+                    generators[seed] = NoiseGenerator(seed, cache_blocks=cache_blocks)
+                stage = ChainStage("noise", amount=stage.params["amount"], seed=generators[seed])
+            stages.append(stage)
+        shared[name] = EffectChain(stages)
+    return shared
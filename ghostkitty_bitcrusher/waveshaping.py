@@ -0,0 +1,329 @@
+"""
+Waveshaping engines - transfer curves for soft clipping and distortion.
+"""
+
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from .automation import frame_values
+
+
+# Output gain applied after every curve (matches the original tanh stage)
+OUTPUT_GAIN = 0.8
+
+
+def drive_gain(drive: float) -> float:
+    """Input gain for a drive amount (0.0-1.0)."""
+    return 1.0 + drive * 3.0
+
+
+def _gain_column(audio: np.ndarray, drive: np.ndarray) -> np.ndarray:
+    """Per-frame input gains in ``audio``'s dtype and shape."""
+    return drive_gain(frame_values(np.asarray(drive), audio))
+
+
+class Shaper:
+    """
+    Base class for waveshaping engines.
+
+    An engine maps ``OUTPUT_GAIN * curve(drive_gain(drive) * x)`` over the
+    signal. Engines are stateless apart from caches and are safe to share
+    between threads.
+    """
+
+    name = ""
+
+    def process(
+        self,
+        audio: np.ndarray,
+        drive: float,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Apply the transfer curve.
+
+        Args:
+            audio: Input audio array.
+            drive: Distortion amount (0.0-1.0).
+            out: Destination array (may be ``audio``).
+
+        Returns:
+            Shaped audio.
+        """
+        raise NotImplementedError
+
+    def process_automated(
+        self,
+        audio: np.ndarray,
+        drive: np.ndarray,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Apply the transfer curve with a drive per frame.
+
+        Args:
+            audio: Input audio array.
+            drive: Drive amount for each frame of ``audio``.
+            out: Destination array (may be ``audio``).
+
+        Returns:
+            Shaped audio.
+        """
+        raise NotImplementedError
+
+
+class TanhShaper(Shaper):
+    """
+    Exact ``tanh`` soft clipping.
+
+    NumPy evaluates ``tanh`` with SIMD kernels, and a float32 ``tanh`` pass
+    is several times faster than even one table gather, so the default
+    curve is not tabulated.
+    """
+
+    name = "tanh"
+
+    def process(
+        self,
+        audio: np.ndarray,
+        drive: float,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        out = np.multiply(audio, drive_gain(drive), out=out)
+        np.tanh(out, out=out)
+        out *= OUTPUT_GAIN
+        return out
+
+    def process_automated(
+        self,
+        audio: np.ndarray,
+        drive: np.ndarray,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        out = np.multiply(audio, _gain_column(audio, drive), out=out)
+        np.tanh(out, out=out)
+        out *= OUTPUT_GAIN
+        return out
+
+
+class TransferTable:
+    """
+    One curve at one drive, sampled on a uniform grid over ``[-limit, limit]``.
+
+    Values between grid points are linearly interpolated and inputs
+    outside the grid are clamped to its ends. Linear interpolation errs by
+    at most ``h**2 / 8 * max|y''|`` for grid step ``h``; ``max_error`` holds
+    the largest deviation from the exact curve measured at build time on a
+    grid 8x finer.
+    """
+
+    def __init__(
+        self,
+        curve: Callable[[np.ndarray], np.ndarray],
+        drive: float,
+        size: int,
+        limit: float,
+        dtype=np.float64,
+    ):
+        gain = drive_gain(drive)
+        grid = np.linspace(-limit, limit, size)
+        values = OUTPUT_GAIN * curve(gain * grid)
+
+        self.size = size
+        self.limit = limit
+        self.scale = (size - 1) / (2.0 * limit)
+        self.values = values.astype(dtype)
+        # Trailing zero slope lets the top grid point index without clamping
+        self.slopes = np.append(np.diff(values), 0.0).astype(dtype)
+
+        fine = np.linspace(-limit, limit, (size - 1) * 8 + 1)
+        exact = OUTPUT_GAIN * curve(gain * fine)
+        self.max_error = float(np.max(np.abs(np.interp(fine, grid, values) - exact)))
+
+    def evaluate(
+        self,
+        audio: np.ndarray,
+        out: np.ndarray,
+        position: np.ndarray,
+        index: np.ndarray,
+        scratch: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Look up ``audio`` into ``out`` using caller-provided work buffers.
+
+        Args:
+            audio: Input samples.
+            out: Destination with ``audio``'s shape (may be ``audio``).
+            position: Float work buffer with ``audio``'s shape and dtype.
+            index: ``np.intp`` work buffer with ``audio``'s shape.
+            scratch: Float work buffer with ``audio``'s shape and dtype.
+
+        Returns:
+            ``out``.
+        """
+        # Fractional grid position, clamped to the table
+        np.multiply(audio, self.scale, out=position)
+        np.add(position, (self.size - 1) / 2.0, out=position)
+        np.clip(position, 0.0, self.size - 1, out=position)
+        # Split into grid point and fraction without mixed-dtype temporaries
+        np.floor(position, out=scratch)
+        np.copyto(index, scratch, casting="unsafe")
+        np.subtract(position, scratch, out=position)
+
+        np.take(self.values, index, out=out, mode="clip")
+        np.take(self.slopes, index, out=scratch, mode="clip")
+        np.multiply(scratch, position, out=scratch)
+        np.add(out, scratch, out=out)
+        return out
+
+
+class TableShaper(Shaper):
+    """
+    Waveshaper for arbitrary transfer curves via cached lookup tables.
+
+    The curve is called only to build a ``TransferTable`` the first time a
+    drive value is used. After that, shaping costs a gather and a
+    multiply-add per sample, whatever the curve computes. Tables are kept
+    per (drive, dtype) in an LRU of ``max_tables`` entries. Input beyond
+    ``[-limit, limit]`` sees the curve's value at the limit.
+
+    With the default 8193 points over [-4, 4], tabulating ``tanh`` at full
+    drive errs by less than 1.2e-6 (about 1/25 of a 16-bit LSB). Smooth
+    curves do about as well. Curves with kinks (such as ``fold``) are only
+    inexact within one grid step of each kink.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        curve: Callable[[np.ndarray], np.ndarray],
+        size: int = 8193,
+        limit: float = 4.0,
+        max_tables: int = 32,
+        piece_frames: int = 65536,
+    ):
+        self.name = name
+        self.curve = curve
+        self.size = size
+        self.limit = limit
+        self.max_tables = max_tables
+        self.piece_frames = piece_frames
+        self._tables: "OrderedDict[Tuple[float, np.dtype], TransferTable]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def table(self, drive: float, dtype=np.float64) -> TransferTable:
+        """Cached table for ``drive`` evaluated in ``dtype``."""
+        key = (float(drive), np.dtype(dtype))
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+
+        table = TransferTable(self.curve, drive, self.size, self.limit, dtype)
+
+        with self._lock:
+            self._tables[key] = table
+            while len(self._tables) > self.max_tables:
+                self._tables.popitem(last=False)
+        return table
+
+    def process(
+        self,
+        audio: np.ndarray,
+        drive: float,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        dtype = audio.dtype if audio.dtype.kind == "f" else np.dtype(np.float64)
+        if out is None:
+            out = np.empty(audio.shape, dtype=dtype)
+        table = self.table(drive, out.dtype)
+
+        # Work buffers for one piece, reused across pieces
+        shape = (min(len(audio), self.piece_frames),) + audio.shape[1:]
+        position = np.empty(shape, dtype=out.dtype)
+        scratch = np.empty(shape, dtype=out.dtype)
+        index = np.empty(shape, dtype=np.intp)
+
+        for start in range(0, len(audio), self.piece_frames):
+            stop = min(len(audio), start + self.piece_frames)
+            count = stop - start
+            table.evaluate(
+                audio[start:stop], out[start:stop],
+                position[:count], index[:count], scratch[:count]
+            )
+        return out
+
+    def process_automated(
+        self,
+        audio: np.ndarray,
+        drive: np.ndarray,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        # Every frame has its own gain, so no table applies; the curve is
+        # evaluated exactly, clamped to the table range as ``process`` is
+        if out is None:
+            dtype = audio.dtype if audio.dtype.kind == "f" else np.dtype(np.float64)
+            out = np.empty(audio.shape, dtype=dtype)
+        np.clip(audio, -self.limit, self.limit, out=out)
+        out *= _gain_column(out, drive)
+        out[...] = self.curve(out)
+        out *= OUTPUT_GAIN
+        return out
+
+
+def _fold(x: np.ndarray) -> np.ndarray:
+    """Triangle foldback: the signal reflects off +/-1 instead of clipping."""
+    return 1.0 - np.abs(np.mod(x - 1.0, 4.0) - 2.0)
+
+
+def _tube(x: np.ndarray) -> np.ndarray:
+    """Biased tanh; the asymmetry adds even harmonics."""
+    return np.tanh(x + 0.3) - np.tanh(0.3)
+
+
+_SHAPERS: Dict[str, Shaper] = {}
+
+
+def register_shaper(shaper: Shaper):
+    """Register a waveshaping engine under its ``name``."""
+    _SHAPERS[shaper.name] = shaper
+
+
+def register_curve(name: str, curve: Callable[[np.ndarray], np.ndarray], **options) -> TableShaper:
+    """
+    Register a custom transfer curve as a table-driven shaper.
+
+    Args:
+        name: Curve name used as the ``waveshape_curve`` parameter.
+        curve: Vectorized function of the driven input; called only when
+            tables are built.
+        **options: ``TableShaper`` options (size, limit, max_tables).
+
+    Returns:
+        The registered shaper.
+    """
+    shaper = TableShaper(name, curve, **options)
+    register_shaper(shaper)
+    return shaper
+
+
+def get_shaper(name: str) -> Shaper:
+    """Look up a registered waveshaping engine by name."""
+    try:
+        return _SHAPERS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown waveshape curve '{name}' (available: {', '.join(_SHAPERS)})"
+        ) from None
+
+
+def available_curves() -> List[str]:
+    """Names of the registered waveshaping engines."""
+    return list(_SHAPERS)
+
+
+register_shaper(TanhShaper())
+register_curve("fold", _fold)
+register_curve("tube", _tube)
@@ -0,0 +1,31 @@
+"""
+Per-sample automation renders.
+"""
+
+import numpy as np
+import pytest
+
+from ghostkitty_bitcrusher.bitcrusher import BitCrusher
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+@pytest.mark.parametrize("channels", [1, 2])
+def test_array_automation_is_not_modified_by_renders(dtype, channels):
+    bitcrusher = BitCrusher(dtype=dtype)
+    shape = (50000,) if channels == 1 else (50000, channels)
+    audio = np.random.default_rng(0).uniform(-1.0, 1.0, shape).astype(dtype)
+
+    automation = {
+        "mix": np.full(len(audio), 0.25, dtype=dtype),
+        "bit_depth": np.linspace(3.0, 12.0, len(audio)).astype(dtype),
+        "waveshape": np.linspace(0.0, 1.0, len(audio)).astype(dtype),
+        "noise": np.full(len(audio), 0.2, dtype=dtype),
+    }
+    originals = {name: values.copy() for name, values in automation.items()}
+
+    first = bitcrusher.process_audio(audio, seed=1, downsample_mode="hold", **automation)
+    second = bitcrusher.process_audio(audio, seed=1, downsample_mode="hold", **automation)
+
+    np.testing.assert_array_equal(first, second)
+    for name, values in automation.items():
+        np.testing.assert_array_equal(values, originals[name], err_msg=name)
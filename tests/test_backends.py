@@ -0,0 +1,39 @@
+"""
+Clocked test backends.
+"""
+
+import numpy as np
+import soundfile as sf
+
+from ghostkitty_bitcrusher.backends import FileLoopbackBackend
+from ghostkitty_bitcrusher.sources import open_source
+
+
+def _file(tmp_path) -> str:
+    path = str(tmp_path / "in.flac")
+    sf.write(path, np.zeros((1000, 2)), 44100)
+    return path
+
+
+def test_loopback_reopen_closes_previous_source(tmp_path):
+    backend = FileLoopbackBackend(_file(tmp_path), realtime=False)
+    assert backend.file_sample_rate == 44100
+    probe = backend._opened
+
+    backend.open_input(lambda buffer: None, 44100).close()
+    first = backend._opened
+    backend.open_input(lambda buffer: None, 44100).close()
+
+    assert probe._file.closed
+    assert first._file.closed
+    assert not backend._opened._file.closed
+
+
+def test_loopback_leaves_caller_source_open(tmp_path):
+    source = open_source(_file(tmp_path))
+    backend = FileLoopbackBackend(source, realtime=False)
+    backend.open_input(lambda buffer: None, 44100).close()
+    backend.open_input(lambda buffer: None, 44100).close()
+
+    assert not source._file.closed
+    source.close()
@@ -0,0 +1,65 @@
+"""
+Headless command-line rendering.
+"""
+
+import os
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import soundfile as sf
+
+from ghostkitty_bitcrusher import cli
+
+
+def _write(path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    sf.write(path, np.zeros((2000, 2)), 44100)
+
+
+def test_batch_mirrors_input_folders(tmp_path):
+    for name in ("a/kick.wav", "b/kick.wav"):
+        _write(str(tmp_path / "stems" / name))
+    out = tmp_path / "out"
+
+    status = cli.main([
+        "batch", str(tmp_path / "stems" / "**" / "*.wav"), "-o", str(out), "-j", "1"
+    ])
+
+    assert status == 0
+    assert (out / "a" / "kick.wav").exists()
+    assert (out / "b" / "kick.wav").exists()
+
+
+def test_batch_refuses_clashing_outputs(tmp_path):
+    _write(str(tmp_path / "kick.wav"))
+    sf.write(str(tmp_path / "kick.flac"), np.zeros((2000, 2)), 44100)
+
+    status = cli.main(["batch", str(tmp_path / "kick.*"), "-o", str(tmp_path / "out")])
+    assert status == 2
+
+
+def test_dead_worker_is_reported_as_a_failure():
+    future = Future()
+    future.set_exception(BrokenProcessPool("worker died"))
+
+    result = cli._collect(future, ("in.wav", "out.wav", {}, 4096))
+    assert result["input"] == "in.wav"
+    assert result["error"] == "worker died"
+
+
+def test_presets_pass_the_waveshape_curve(tmp_path):
+    source = str(tmp_path / "in.wav")
+    sf.write(source, np.random.default_rng(0).uniform(-0.5, 0.5, (5000, 2)), 44100)
+
+    rendered = {}
+    for curve in ("tanh", "fold"):
+        out = tmp_path / curve
+        status = cli.main([
+            "presets", source, "-o", str(out), "-p", "harsh", "--seed", "1",
+            "--waveshape-curve", curve, "-j", "1",
+        ])
+        assert status == 0
+        rendered[curve] = sf.read(str(out / "in_harsh.wav"))[0]
+
+    assert not np.array_equal(rendered["tanh"], rendered["fold"])
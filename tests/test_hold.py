@@ -0,0 +1,57 @@
+"""
+Sample-and-hold grid and its realtime and in-place renders.
+"""
+
+import numpy as np
+import pytest
+
+from ghostkitty_bitcrusher.decimation import HoldDecimator, hold_sources
+from ghostkitty_bitcrusher.realtime import RealtimeCrusher
+
+
+FACTORS = [1.3, 2.1, 2.7, 3.3, 7.77]
+
+
+def _sources(frames: int, factor: float) -> np.ndarray:
+    n = np.arange(frames, dtype=np.float64)
+    return hold_sources(
+        n, factor, np.empty(frames), np.empty(frames), np.empty(frames, dtype=bool)
+    )
+
+
+@pytest.mark.parametrize("factor", FACTORS)
+def test_step_starts_hold_themselves(factor):
+    n = np.arange(200000, dtype=np.float64)
+    sources = _sources(len(n), factor)
+
+    assert np.all(sources <= n)
+    assert np.all(np.diff(sources) >= 0)
+    # Every held sample is the start of its own step
+    np.testing.assert_array_equal(sources[sources.astype(np.intp)], sources)
+    # Steps are the factor long, rounded up or down
+    starts = np.unique(sources)
+    assert np.all(np.abs(np.diff(starts) - factor) < 1.0)
+
+
+@pytest.mark.parametrize("factor", FACTORS)
+def test_in_place_pieces_match_gather(factor):
+    audio = np.random.default_rng(0).uniform(-1.0, 1.0, (50000, 2))
+    expected = audio[_sources(len(audio), factor).astype(np.intp)]
+
+    held = HoldDecimator(piece_frames=1000).process(audio.copy(), factor)
+    np.testing.assert_array_equal(held, expected)
+
+
+@pytest.mark.parametrize("factor", FACTORS)
+@pytest.mark.parametrize("chunk", [64, 128, 333])
+def test_realtime_chunks_match_whole_hold(factor, chunk):
+    audio = np.random.default_rng(1).uniform(-1.0, 1.0, (40000, 2)).astype(np.float32)
+    expected = HoldDecimator().process(audio, factor)
+
+    crusher = RealtimeCrusher(max_frames=chunk, channels=2)
+    crusher.set_params(bit_depth=16, downsample_factor=factor)
+    streamed = np.concatenate([
+        crusher.process(audio[start:start + chunk]).copy()
+        for start in range(0, len(audio), chunk)
+    ])
+    np.testing.assert_array_equal(streamed, expected)
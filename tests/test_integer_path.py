@@ -0,0 +1,39 @@
+"""
+Integer PCM fast path of ``render_file`` against the float path.
+"""
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from ghostkitty_bitcrusher.bitcrusher import BitCrusher
+from ghostkitty_bitcrusher.streaming import integer_dtype, render_blocks, render_file
+
+
+@pytest.mark.parametrize("subtype", ["PCM_16", "PCM_24", "PCM_32"])
+@pytest.mark.parametrize("bit_depth", [1, 4, 8, 8.0, 5.5, 12, 15])
+def test_render_file_matches_float_path(tmp_path, subtype, bit_depth):
+    bitcrusher = BitCrusher()
+    source = str(tmp_path / "in.wav")
+    audio = np.random.default_rng(0).uniform(-1.0, 1.0, (30000, 2))
+    sf.write(source, audio, 44100, subtype=subtype)
+
+    rendered = str(tmp_path / "fast.wav")
+    render_file(bitcrusher, source, rendered, block_size=8192, bit_depth=bit_depth)
+
+    # The float path as render_file runs it: float32 blocks, same subtype
+    reference = str(tmp_path / "float.wav")
+    blocks = sf.blocks(source, blocksize=8192, dtype="float32", always_2d=True)
+    processed = np.concatenate(list(render_blocks(bitcrusher, blocks, 8192, bit_depth=bit_depth)))
+    sf.write(reference, processed, 44100, subtype=subtype)
+
+    np.testing.assert_array_equal(
+        sf.read(rendered, dtype="int32")[0], sf.read(reference, dtype="int32")[0]
+    )
+
+
+def test_fast_path_needs_a_whole_bit_depth():
+    assert integer_dtype("PCM_16", {"bit_depth": 8.0}) == "int16"
+    assert integer_dtype("PCM_24", {"bit_depth": 6}) == "int32"
+    assert integer_dtype("PCM_16", {"bit_depth": 5.5}) is None
+    assert integer_dtype("PCM_32", {"bit_depth": 8}) is None
@@ -0,0 +1,57 @@
+"""
+Peak memory of in-place float32 renders and block-streamed equality.
+"""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from ghostkitty_bitcrusher.bitcrusher import BitCrusher
+from ghostkitty_bitcrusher.streaming import render_blocks
+
+
+PARAMS = {
+    "bit_depth": 6,
+    "downsample_factor": 3.3,
+    "waveshape": 0.4,
+    "noise": 0.1,
+    "mix": 0.8,
+    "seed": 3,
+}
+
+
+def _signal(frames: int) -> np.ndarray:
+    return np.random.default_rng(0).uniform(-1.0, 1.0, (frames, 2)).astype(np.float32)
+
+
+@pytest.mark.parametrize("mode", ["hold", "polyphase"])
+def test_float32_render_peak_is_about_one_output(mode):
+    bitcrusher = BitCrusher(dtype=np.float32)
+    audio = _signal(1 << 22)
+    # Warm caches and lazy imports outside the measurement
+    bitcrusher.process_audio(audio[:50000], downsample_mode=mode, **PARAMS)
+
+    tracemalloc.start()
+    try:
+        bitcrusher.process_audio(audio, downsample_mode=mode, **PARAMS)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    # The output buffer plus scratch-sized pieces
+    assert peak <= 1.1 * audio.nbytes
+
+
+@pytest.mark.parametrize("mode", ["hold", "polyphase"])
+def test_streamed_blocks_match_whole_file(mode):
+    bitcrusher = BitCrusher(dtype=np.float32)
+    audio = _signal(300000)
+    whole = bitcrusher.process_audio(audio, downsample_mode=mode, **PARAMS)
+
+    # Input blocks deliberately out of step with the output block size
+    blocks = (audio[start:start + 10007] for start in range(0, len(audio), 10007))
+    streamed = np.concatenate(
+        list(render_blocks(bitcrusher, blocks, 32768, downsample_mode=mode, **PARAMS))
+    )
+    np.testing.assert_array_equal(streamed, whole)
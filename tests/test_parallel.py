@@ -0,0 +1,49 @@
+"""
+Parallel renders against serial ones.
+"""
+
+import numpy as np
+import pytest
+
+from ghostkitty_bitcrusher.bitcrusher import BitCrusher
+
+
+PARAMS = {"bit_depth": 8, "waveshape": 0.3, "noise": 0.1, "mix": 0.9, "seed": 1}
+
+
+def _signal(frames: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).uniform(-1.0, 1.0, (frames, 2)).astype(np.float32)
+
+
+@pytest.mark.parametrize("mode", ["hold", "polyphase"])
+@pytest.mark.parametrize("factor", [1.0, 1.5, 3.3])
+def test_parallel_matches_serial_exactly(mode, factor):
+    bitcrusher = BitCrusher(dtype=np.float32)
+    audio = _signal(300000)
+    params = dict(PARAMS, downsample_factor=factor, downsample_mode=mode)
+
+    serial = bitcrusher.process_audio(audio, **params)
+    parallel = bitcrusher.process_audio_parallel(
+        audio, workers=4, segment_size=65536, **params
+    )
+    np.testing.assert_array_equal(parallel, serial)
+
+
+@pytest.mark.parametrize("factor", [1.25, 1.5, 3.3, 7.0])
+def test_parallel_fft_seams_within_tolerance(factor):
+    bitcrusher = BitCrusher(dtype=np.float32)
+    audio = _signal(300000, seed=2)
+    # Nothing after the downsampler, so only resampling differences show
+    params = {"bit_depth": 16, "downsample_factor": factor, "downsample_mode": "fft"}
+
+    serial = bitcrusher.process_audio(audio, **params)
+    parallel = bitcrusher.process_audio_parallel(
+        audio, workers=4, segment_size=65536, **params
+    )
+
+    # Interior seams differ by up to about 3e-2; the file edges, where the
+    # whole-file render wraps around, by up to about 0.7
+    context = bitcrusher.stream_context(factor, "fft", None)
+    error = np.abs(parallel - serial)
+    assert error[context:-context].max() <= 3e-2
+    assert error.max() <= 1.0
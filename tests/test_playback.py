@@ -0,0 +1,54 @@
+"""
+Streaming playback from compressed sources.
+"""
+
+import threading
+import time
+
+import numpy as np
+import soundfile as sf
+
+from ghostkitty_bitcrusher.playback import StreamingPlayback
+from ghostkitty_bitcrusher.realtime import RealtimeCrusher
+from ghostkitty_bitcrusher.sources import SoundFileSource
+
+
+def test_callback_does_not_wait_for_background_reads(tmp_path):
+    path = str(tmp_path / "in.flac")
+    audio = np.random.default_rng(0).uniform(-0.5, 0.5, (20000, 2))
+    sf.write(path, audio, 44100)
+    source = SoundFileSource(path)
+
+    crusher = RealtimeCrusher(max_frames=256, channels=2)
+    crusher.set_params(bit_depth=16)
+    playback = StreamingPlayback(crusher, block_size=256)
+    playback.load(source)
+    playback.is_playing = True
+
+    # A background render holds the source's decoder for a long read
+    held = threading.Event()
+    release = threading.Event()
+
+    def long_read():
+        with source._lock:
+            held.set()
+            release.wait(5.0)
+
+    reader = threading.Thread(target=long_read)
+    reader.start()
+    held.wait()
+    try:
+        out = np.empty((512, 2), dtype=np.float32)
+        start = time.perf_counter()
+        count = playback.fill(out)
+        elapsed = time.perf_counter() - start
+    finally:
+        release.set()
+        reader.join()
+
+    assert count == len(out)
+    assert elapsed < 1.0
+    np.testing.assert_allclose(out, source.read(0, 512), atol=1e-4)
+
+    playback.close()
+    source.close()